@@ -0,0 +1,337 @@
+"""
+Benchmarks rizlib's data structures against the standard library ones.
+
+For every structure and size it measures the insertion throughput (enqueue/push), the removal
+throughput (dequeue/pop) and the memory used per element, traced with tracemalloc.
+Results are printed as a table and can be saved as JSON to track changes over time.
+
+Usage:
+    python -m benchmarks.data_structures
+    python -m benchmarks.data_structures --sizes 1000 100000 --json bench.json
+    python -m benchmarks.data_structures --scaling          # powers of ten up to 10^7
+"""
+
+__all__ = ["Case", "CASES", "run", "render_table"]
+
+__author__ = "Valerio Molinari"
+__credits__ = "Valerio Molinari"
+__maintainer__ = "Valerio Molinari"
+__email__ = "valeriomolinariprogrammazione@gmail.com"
+
+import argparse
+import contextlib
+import gc
+import io
+import json
+import platform
+import queue
+import sys
+import tracemalloc
+from collections import deque
+from dataclasses import dataclass, asdict
+from time import perf_counter
+from typing import Any, Callable, Optional
+from rizlib.terminal.data_structures.queue import Queue, QueueNode
+from rizlib.terminal.data_structures.stack import Stack, StackNode
+from rizlib.terminal.text.stdin import Stdin, BulkStdin
+
+
+@dataclass
+class Case:
+    """A benchmarked structure
+
+    Args:
+        name: the name shown in the report
+        kind: the family of the structure (fifo, lifo or stdin), used to group results
+        build: a function taking n and returning the structure filled with n elements
+        drain: a function taking the filled structure and n, removing n elements
+        limit: the greatest size this case is run with, used to skip quadratic cases
+        inserts: a function taking n and returning the insert operations done by build,
+            when these aren't n, e.g. n words enqueued as fewer lines
+    """
+    name: str
+    kind: str
+    build: Callable[[int], Any]
+    drain: Callable[[Any, int], None]
+    limit: Optional[int] = None
+    inserts: Optional[Callable[[int], int]] = None
+
+
+@dataclass
+class Result:
+    name: str
+    kind: str
+    size: int
+    insert_ops_per_s: float
+    remove_ops_per_s: float
+    bytes_per_element: float
+
+
+# -- fifo ------------------------------------------------------------------------------------------
+
+def _build_queue(n: int) -> Queue:
+    q = Queue[QueueNode]()
+    enqueue = q.enqueue
+    for i in range(n):
+        enqueue(i)
+    return q
+
+
+def _drain_queue(q: Queue, n: int) -> None:
+    dequeue = q.dequeue
+    for _ in range(n):
+        dequeue()
+
+
+def _build_deque(n: int) -> deque:
+    d = deque()
+    append = d.append
+    for i in range(n):
+        append(i)
+    return d
+
+
+def _drain_deque_left(d: deque, n: int) -> None:
+    popleft = d.popleft
+    for _ in range(n):
+        popleft()
+
+
+def _build_sync_queue(n: int) -> queue.Queue:
+    q = queue.Queue()
+    put = q.put_nowait
+    for i in range(n):
+        put(i)
+    return q
+
+
+def _drain_sync_queue(q: queue.Queue, n: int) -> None:
+    get = q.get_nowait
+    for _ in range(n):
+        get()
+
+
+def _build_list(n: int) -> list:
+    lst = []
+    append = lst.append
+    for i in range(n):
+        append(i)
+    return lst
+
+
+def _drain_list_front(lst: list, n: int) -> None:
+    pop = lst.pop
+    for _ in range(n):
+        pop(0)
+
+
+# -- lifo ------------------------------------------------------------------------------------------
+
+def _build_stack(n: int) -> Stack:
+    s = Stack[StackNode]()
+    push = s.push
+    for i in range(n):
+        push(i)
+    return s
+
+
+def _drain_stack(s: Stack, n: int) -> None:
+    pop = s.pop
+    for _ in range(n):
+        pop()
+
+
+def _drain_pop(container, n: int) -> None:
+    pop = container.pop
+    for _ in range(n):
+        pop()
+
+
+# -- stdin -----------------------------------------------------------------------------------------
+
+def _build_stdin_words(n: int) -> Stdin:
+    stdin = Stdin()
+    enqueue = stdin.enqueue
+    for i in range(n):
+        enqueue(str(i))
+    return stdin
+
+
+_LINE_WORDS = 16
+
+
+def _stdin_lines(n: int) -> int:
+    return -(-n // _LINE_WORDS)
+
+
+def _build_stdin_line(n: int) -> Stdin:
+    stdin = Stdin()
+    enqueue = stdin.enqueue
+    for start in range(0, n, _LINE_WORDS):
+        enqueue(' '.join(map(str, range(start, min(start + _LINE_WORDS, n)))))
+    return stdin
+
+
+def _build_bulk_stdin(n: int) -> BulkStdin:
+    return BulkStdin(io.BytesIO(b' '.join(str(i).encode() for i in range(n))))
+
+
+def _drain_bulk_stdin(stdin: BulkStdin, n: int) -> None:
+    for _ in range(n):
+        stdin(int)
+
+
+def _drain_bulk_stdin_ints(stdin: BulkStdin, n: int) -> None:
+    stdin.read_ints(n)
+
+
+class _NullStream:
+    """A text stream that discards everything, so the echo of dequeued inputs costs no I/O."""
+
+    @staticmethod
+    def write(text: str) -> int:
+        return len(text)
+
+    @staticmethod
+    def flush() -> None:
+        pass
+
+
+def _drain_stdin(stdin: Stdin, n: int) -> None:
+    with contextlib.redirect_stdout(_NullStream()):
+        for _ in range(n):
+            stdin(int)
+
+
+CASES: list[Case] = [
+    Case('rizlib.Queue', 'fifo', _build_queue, _drain_queue),
+    Case('collections.deque', 'fifo', _build_deque, _drain_deque_left),
+    Case('queue.Queue', 'fifo', _build_sync_queue, _drain_sync_queue),
+    Case('list.pop(0)', 'fifo', _build_list, _drain_list_front, limit=10 ** 5),
+    Case('rizlib.Stack', 'lifo', _build_stack, _drain_stack),
+    Case('list', 'lifo', _build_list, _drain_pop),
+    Case('collections.deque', 'lifo', _build_deque, _drain_pop),
+    Case('rizlib.Stdin (words)', 'stdin', _build_stdin_words, _drain_stdin, limit=10 ** 6),
+    Case('rizlib.Stdin (lines)', 'stdin', _build_stdin_line, _drain_stdin, limit=10 ** 6, inserts=_stdin_lines),
+    Case('rizlib.BulkStdin', 'stdin', _build_bulk_stdin, _drain_bulk_stdin),
+    Case('rizlib.BulkStdin.read_ints', 'stdin', _build_bulk_stdin, _drain_bulk_stdin_ints),
+]
+
+
+def _bytes_per_element(case: Case, n: int) -> float:
+    """Traces the memory allocated while filling the structure with n elements"""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        baseline = tracemalloc.get_traced_memory()[0]
+        structure = case.build(n)
+        used = tracemalloc.get_traced_memory()[0] - baseline
+    finally:
+        tracemalloc.stop()
+    del structure
+    return used / n
+
+
+def _measure(case: Case, n: int, memory_size: int) -> Result:
+    gc.collect()
+    gc.disable()
+    try:
+        t = perf_counter()
+        structure = case.build(n)
+        insert = perf_counter() - t
+
+        t = perf_counter()
+        case.drain(structure, n)
+        remove = perf_counter() - t
+    finally:
+        gc.enable()
+    del structure
+
+    inserts = case.inserts(n) if case.inserts is not None else n
+    return Result(name=case.name,
+                  kind=case.kind,
+                  size=n,
+                  insert_ops_per_s=inserts / insert if insert else float('inf'),
+                  remove_ops_per_s=n / remove if remove else float('inf'),
+                  bytes_per_element=_bytes_per_element(case, min(n, memory_size)))
+
+
+def run(sizes: list[int],
+        cases: Optional[list[Case]] = None,
+        kinds: Optional[list[str]] = None,
+        memory_size: int = 10 ** 5,
+        progress: Callable[[str], None] = lambda s: None
+        ) -> list[Result]:
+    """Runs every case with every size
+
+    :param sizes: numbers of elements to insert and remove
+    :param cases: (optional) the cases to run, CASES by default
+    :param kinds: (optional) only run the cases of these kinds
+    :param memory_size: the greatest number of elements traced by tracemalloc, which is slow
+    :param progress: a function called with the name of each measurement before running it
+    :return: a list of results
+    """
+    results = []
+    for case in cases if cases is not None else CASES:
+        if kinds and case.kind not in kinds:
+            continue
+        for n in sizes:
+            if case.limit is not None and n > case.limit:
+                continue
+            progress(f'{case.kind:<6}{case.name} n={n}')
+            results.append(_measure(case, n, memory_size))
+    return results
+
+
+def _human(number: float) -> str:
+    for unit in ('', 'K', 'M', 'G'):
+        if abs(number) < 1000:
+            return f'{number:.1f}{unit}'
+        number /= 1000
+    return f'{number:.1f}T'
+
+
+def render_table(results: list[Result]) -> str:
+    """Formats the results as a readable table"""
+    header = ('kind', 'structure', 'n', 'insert/s', 'remove/s', 'B/elem')
+    rows = [(r.kind, r.name, f'{r.size:,}', _human(r.insert_ops_per_s), _human(r.remove_ops_per_s),
+             f'{r.bytes_per_element:.1f}') for r in results]
+    widths = [max(len(str(cell)) for cell in column) for column in zip(header, *rows)]
+    lines = []
+    for i, row in enumerate((header, *rows)):
+        cells = [cell.ljust(w) if j < 2 else cell.rjust(w) for j, (cell, w) in enumerate(zip(row, widths))]
+        lines.append('  '.join(cells))
+        if not i:
+            lines.append('  '.join('-' * w for w in widths))
+    return '\n'.join(lines)
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10 ** 3, 10 ** 4, 10 ** 5],
+                        help='numbers of elements to benchmark')
+    parser.add_argument('--scaling', action='store_true', help='run every power of ten from 10^3 to 10^7')
+    parser.add_argument('--kind', choices=['fifo', 'lifo', 'stdin'], nargs='+', help='only run these kinds')
+    parser.add_argument('--memory-size', type=int, default=10 ** 5,
+                        help='greatest number of elements traced for memory per element')
+    parser.add_argument('--json', help='path of the JSON file where results are saved')
+    args = parser.parse_args(argv)
+
+    sizes = [10 ** e for e in range(3, 8)] if args.scaling else args.sizes
+    results = run(sizes, kinds=args.kind, memory_size=args.memory_size,
+                  progress=lambda s: print(s, file=sys.stderr))
+    print(render_table(results))
+
+    if args.json:
+        report = {
+            'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'platform': platform.platform(),
+            'results': [asdict(r) for r in results],
+        }
+        with open(args.json, 'w') as file:
+            json.dump(report, file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,130 @@
+"""
+Measures the import time of rizlib modules with `python -X importtime` and guards startup latency.
+
+Every module is imported in a fresh interpreter, several times, and the best cumulative time
+is kept. The run fails (exit status 1) when a module exceeds its time budget or when it imports
+a heavy dependency it must not load eagerly.
+
+Usage:
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --repeat 10 --json import_time.json
+    python -m benchmarks.import_time --budget rizlib.terminal.interface.menu=15000
+"""
+
+__all__ = ["Measure", "measure", "BUDGETS", "FORBIDDEN"]
+
+__author__ = "Valerio Molinari"
+__credits__ = "Valerio Molinari"
+__maintainer__ = "Valerio Molinari"
+__email__ = "valeriomolinariprogrammazione@gmail.com"
+
+import argparse
+import json
+import subprocess
+import sys
+from dataclasses import dataclass, asdict, field
+from typing import Optional
+
+# best cumulative import time allowed for each module, in microseconds
+BUDGETS: dict[str, int] = {
+    'rizlib': 6_000,
+    'rizlib.terminal.text': 6_000,
+    'rizlib.terminal.text.colors': 30_000,
+    'rizlib.terminal.text.logs': 30_000,
+    'rizlib.terminal.text.stdin': 35_000,
+    'rizlib.terminal.interface.menu': 45_000,
+    'rizlib.terminal.cli.pipe': 30_000,
+    'rizlib.terminal.data_structures.queue': 35_000,
+    'rizlib.io.database': 40_000,
+    'rizlib.http.webscraping.session': 6_000,
+}
+
+# modules which must not be imported when importing any rizlib module listed in BUDGETS
+FORBIDDEN: tuple[str, ...] = ('requests', 'bs4', 'termcolor')
+
+
+@dataclass
+class Measure:
+    module: str
+    self_us: int
+    cumulative_us: int
+    imported: int
+    forbidden: list[str] = field(default_factory=list)
+
+
+def _import_time(module: str) -> dict[str, tuple[int, int]]:
+    """Imports module in a fresh interpreter and parses the -X importtime report
+
+    :return: a mapping from every imported module to its (self, cumulative) time in microseconds
+    """
+    process = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                             capture_output=True, text=True)
+    if process.returncode:
+        raise ImportError(f"can't import {module}:\n{process.stderr}")
+
+    times = {}
+    for line in process.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        times[name.strip()] = int(self_us), int(cumulative_us)
+    return times
+
+
+def measure(module: str, repeat: int = 5) -> Measure:
+    """Measures the import time of module, keeping the best of repeat runs"""
+    best: Optional[Measure] = None
+    for _ in range(repeat):
+        times = _import_time(module)
+        self_us, cumulative_us = times[module]
+        forbidden = sorted(name for name in times if name.split('.')[0] in FORBIDDEN)
+        if best is None or cumulative_us < best.cumulative_us:
+            best = Measure(module, self_us, cumulative_us, len(times), forbidden)
+    return best
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('modules', nargs='*', help='modules to measure, every module with a budget by default')
+    parser.add_argument('--repeat', type=int, default=5, help='runs per module, the best one is kept')
+    parser.add_argument('--budget', nargs='+', default=[], metavar='MODULE=US',
+                        help='override or add a budget in microseconds')
+    parser.add_argument('--json', help='path of the JSON file where results are saved')
+    args = parser.parse_args(argv)
+
+    budgets = dict(BUDGETS)
+    for item in args.budget:
+        module, us = item.split('=')
+        budgets[module] = int(us)
+
+    failures = []
+    rows = []
+    for module in args.modules or budgets:
+        result = measure(module, args.repeat)
+        budget = budgets.get(module)
+        over = budget is not None and result.cumulative_us > budget
+        if over:
+            failures.append(f'{module} took {result.cumulative_us}us, budget is {budget}us')
+        if result.forbidden:
+            failures.append(f'{module} imports {", ".join(result.forbidden)}')
+        rows.append((result, budget, over))
+
+    width = max(len(r.module) for r, _, _ in rows)
+    print(f'{"module":<{width}}  {"cumulative":>10}  {"self":>7}  {"budget":>7}  {"modules":>7}')
+    for result, budget, over in rows:
+        mark = ' !' if over or result.forbidden else ''
+        print(f'{result.module:<{width}}  {result.cumulative_us:>8}us  {result.self_us:>5}us  '
+              f'{budget if budget is not None else "-":>7}  {result.imported:>7}{mark}')
+
+    if args.json:
+        with open(args.json, 'w') as file:
+            json.dump({'python': sys.version,
+                       'results': [asdict(r) | {'budget_us': b} for r, b, _ in rows]}, file, indent=2)
+
+    for failure in failures:
+        print(f'FAIL: {failure}', file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
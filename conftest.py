@@ -0,0 +1 @@
+"""Lets pytest import rizlib from the repository root without installing it"""
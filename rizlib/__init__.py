@@ -0,0 +1,10 @@
+"""A library containing all the utilities one might need.
+
+Subpackages are imported lazily, on first access.
+"""
+
+from rizlib.tools.lazy import lazy_exports
+
+__getattr__, __dir__, __all__ = lazy_exports(__name__, globals(), {}, submodules=[
+    'documentation', 'http', 'io', 'terminal', 'testing', 'tools',
+])
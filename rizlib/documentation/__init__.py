@@ -0,0 +1,5 @@
+from rizlib.tools.lazy import lazy_exports
+
+__getattr__, __dir__, __all__ = lazy_exports(__name__, globals(), {
+    'PathHint': 'types',
+}, submodules=['types'])
@@ -1,25 +1,27 @@
-from bs4 import BeautifulSoup as bs
-import requests
-
-
 class Session:
+    # requests and bs4 are slow to import, so they're imported on the first request
+
     def __init__(self, session):
         self.session = session
 
-    def get(self, url, **kwargs):
+    def get(self, url, **kwargs) -> 'bs4.BeautifulSoup':
         return self.__request(url, self.session.get, kwargs)
 
-    def post(self, url, **kwargs):
+    def post(self, url, **kwargs) -> 'bs4.BeautifulSoup':
         return self.__request(url, self.session.post, kwargs)
 
     @staticmethod
-    def __request(url, method, kwargs):
+    def __request(url, method, kwargs) -> 'bs4.BeautifulSoup':
+        from bs4 import BeautifulSoup as bs
+
         answer = method(url, **kwargs)
         answer.raise_for_status()
         return bs(answer.content, features="html.parser")
 
     @staticmethod
     def do(callback: callable):
+        import requests
+
         with requests.Session() as s:
             s = Session(s)
             return callback(s)
@@ -0,0 +1,11 @@
+from rizlib.tools.lazy import lazy_exports
+
+__getattr__, __dir__, __all__ = lazy_exports(__name__, globals(), {
+    'JSONDatabase': 'database',
+    'Snapshot': 'database',
+    'get_parent_dir': 'path',
+    'scan': 'scanner',
+    'hash_file': 'scanner',
+    'hash_files': 'scanner',
+    'find_duplicates': 'scanner',
+}, submodules=['database', 'path', 'scanner'])
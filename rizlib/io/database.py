@@ -1,16 +1,131 @@
-__all__ = {'JSONDatabase'}
+"""
+Provides JSONDatabase, a database kept in a json file, with point-in-time snapshots.
+
+The file is always replaced atomically: a new version is written to a temporary file which is
+then renamed over the database. So a reader that opened the file, or a hard link to it, keeps
+seeing one complete version while writers go on, and snapshots don't need to block them.
+
+Example:
+    db = JSONDatabase('users')
+    snapshot = db.snapshot(keep=10)     # users.json.snapshots/users.<time>.json.gz, older ones are pruned
+    ...
+    db.restore(snapshot)
+"""
+
+__all__ = ['JSONDatabase', 'Snapshot']
 
 __author__ = "Valerio Molinari"
 __credits__ = "Valerio Molinari"
 __maintainer__ = "Valerio Molinari"
 __email__ = "valeriomolinariprogrammazione@gmail.com"
 
+import os
+import stat
+import threading
 from json import dumps, loads
 from pathlib import Path
+from datetime import datetime, timedelta, timezone
+from typing import BinaryIO, Callable, Optional, Union
 from rizlib.documentation.types import PathHint
 from rizlib.terminal.text.logs import warning, success, Silence
 from os.path import exists
 
+_SNAPSHOT_SUFFIX = '.json.gz'
+_TIME_FORMAT = '%Y%m%dT%H%M%S%fZ'
+_TIME_LENGTH = len('20260101T000000000000Z')
+_CHUNK = 1 << 20
+
+
+class Snapshot:
+    __slots__ = ('path', 'created', 'checksum')
+
+    def __init__(self, path: Path, created: datetime, checksum: Optional[str]) -> None:
+        """A compressed copy of a database, created by :meth:`JSONDatabase.snapshot`
+
+        :param path: the path of the gzip file
+        :param created: when the snapshot was taken, in UTC
+        :param checksum: the sha256 of the uncompressed database, None if its .sha256 file is missing
+        """
+        self.path = path
+        self.created = created
+        self.checksum = checksum
+
+    def __repr__(self) -> str:
+        return f'Snapshot(path={self.path!r}, created={self.created!r}, checksum={self.checksum!r})'
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Snapshot):
+            return NotImplemented
+        return (self.path, self.created, self.checksum) == (other.path, other.created, other.checksum)
+
+    def __hash__(self) -> int:
+        return hash((self.path, self.created, self.checksum))
+
+    @classmethod
+    def open(cls, path: PathHint) -> 'Snapshot':
+        """Returns the snapshot saved at path, reading its checksum file"""
+        path = Path(path)
+        try:
+            stamp = path.name[:-len(_SNAPSHOT_SUFFIX)].rsplit('.', 1)[-1]
+            created = datetime.strptime(stamp, _TIME_FORMAT)
+            created = created.replace(tzinfo=timezone.utc)
+        except ValueError:
+            created = datetime.fromtimestamp(path.stat().st_mtime, timezone.utc)
+        try:
+            checksum = _checksum_path(path).read_text().split(maxsplit=1)[0]
+        except (OSError, IndexError):
+            checksum = None
+        return cls(path, created, checksum)
+
+    @property
+    def size(self) -> int:
+        """The size of the compressed file in bytes"""
+        return self.path.stat().st_size
+
+
+def _is_stamp(text: str) -> bool:
+    """Tells whether text is a time formatted with _TIME_FORMAT"""
+    return (len(text) == _TIME_LENGTH and text[8] == 'T' and text[-1] == 'Z'
+            and text[:8].isdigit() and text[9:-1].isdigit())
+
+
+def _checksum_path(path: Path) -> Path:
+    return path.with_name(path.name + '.sha256')
+
+
+def _remove(path: PathHint) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _replace(path: PathHint, write: Callable[[BinaryIO], None]) -> None:
+    """Replaces a file atomically: write fills a temporary file, which is synced to disk and renamed
+    over path, so that readers see either the old content or the new one, even after a crash.
+
+    A symbolic link is followed and its target is replaced, and the permissions of the old file are kept.
+    If write raises, the file is left untouched.
+
+    :param path: the path of the file
+    :param write: called with the temporary file opened in binary mode
+    """
+    target = os.path.realpath(path)
+    tmp = f'{target}.{os.getpid()}.{threading.get_ident()}.tmp'
+    try:
+        with open(tmp, 'wb') as file:
+            write(file)
+            file.flush()
+            os.fsync(file.fileno())
+        try:
+            os.chmod(tmp, stat.S_IMODE(os.stat(target).st_mode))
+        except FileNotFoundError:
+            pass
+        os.replace(tmp, target)
+    except BaseException:
+        _remove(tmp)
+        raise
+
 
 class JSONDatabase:
     def __init__(self, json_db_path: PathHint):
@@ -33,8 +148,7 @@ class JSONDatabase:
         :return: True if database file has been created, False if it already exists
         """
         if not exists(self.__path):
-            with open(self.__path, 'w') as file:
-                file.write(dumps({}))
+            _replace(self.__path, lambda file: file.write(dumps({}).encode()))
             success(f"{self.__path} created", silence)
 
             return True
@@ -66,14 +180,156 @@ class JSONDatabase:
         :return: the previous value of the database
         """
         old_db = self.read(Silence.success)
-        with open(self.__path, 'w') as file:
-            database_str = dumps(database)
-            success('database parsed', silence)
-            file.write(database_str)
-            success('database updated', silence)
+        database_str = dumps(database)
+        success('database parsed', silence)
+        _replace(self.__path, lambda file: file.write(database_str.encode()))
+        success('database updated', silence)
 
         return old_db
 
+    def snapshot_dir(self) -> Path:
+        """Returns the default directory of the snapshots, <database>.json.snapshots next to the database"""
+        path = Path(self.__path)
+        return path.with_name(path.name + '.snapshots')
+
+    def __snapshot_prefix(self) -> str:
+        """Snapshots are named <database>.<time>.json.gz, so that many databases can share a directory"""
+        return Path(self.__path).name.removesuffix('.json') + '.'
+
+    def snapshot(self, directory: Optional[PathHint] = None, keep: Optional[int] = None,
+                 silence: Silence = Silence.none) -> Snapshot:
+        """Saves a gzip compressed copy of the database and the sha256 of its content, without blocking writers.
+
+        The current version of the database is pinned with a hard link, or simply by opening it where
+        hard links aren't supported, and writers replace the file instead of changing it, so the copy is
+        always one complete version. The file is copied as bytes, never parsed.
+
+        :param directory: (optional) where the snapshot is saved, :meth:`snapshot_dir` by default
+        :param keep: (optional) the number of snapshots to keep, older ones are removed afterwards
+        :param silence: Used to silence logs. See rizlib.text.logs.Silence enum class.
+        :return: the new snapshot
+        """
+        import gzip
+        import hashlib
+
+        self.create(Silence.warning)
+        directory = Path(directory) if directory is not None else self.snapshot_dir()
+        directory.mkdir(parents=True, exist_ok=True)
+
+        # the name is reserved by creating its checksum file exclusively, so that two snapshots taken
+        # in the same microsecond, even by different processes, never overwrite each other
+        created = datetime.now(timezone.utc)
+        while True:
+            path = directory / f'{self.__snapshot_prefix()}{created.strftime(_TIME_FORMAT)}{_SNAPSHOT_SUFFIX}'
+            checksum_path = _checksum_path(path)
+            try:
+                os.close(os.open(checksum_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666))
+                break
+            except FileExistsError:
+                created += timedelta(microseconds=1)
+        pin = f'{path}.{os.getpid()}.link'
+
+        def compress(out: BinaryIO) -> None:
+            nonlocal checksum
+            source = os.path.realpath(self.__path)
+            try:
+                os.link(source, pin)
+                source = pin
+            except OSError:
+                pass
+            digest = hashlib.sha256()
+            with open(source, 'rb') as file, gzip.GzipFile(path.name[:-3], 'wb', 6, out) as gz:
+                while chunk := file.read(_CHUNK):
+                    digest.update(chunk)
+                    gz.write(chunk)
+            checksum = digest.hexdigest()
+            # the checksum is written first, so that a snapshot is never seen without it
+            _replace(checksum_path, lambda file: file.write(f'{checksum}  {path.name}\n'.encode()))
+
+        checksum = None
+        try:
+            _replace(path, compress)
+        except BaseException:
+            _remove(checksum_path)
+            raise
+        finally:
+            _remove(pin)
+        success(f'{self.__path} saved in {path}', silence)
+
+        if keep is not None:
+            self.prune(keep, directory, silence)
+        return Snapshot(path, created, checksum)
+
+    def snapshots(self, directory: Optional[PathHint] = None) -> list[Snapshot]:
+        """Returns the snapshots of this database saved in directory, from the oldest.
+        The snapshots of other databases in the same directory are ignored.
+
+        :param directory: (optional) where the snapshots are saved, :meth:`snapshot_dir` by default
+        """
+        directory = Path(directory) if directory is not None else self.snapshot_dir()
+        if not directory.is_dir():
+            return []
+        prefix = self.__snapshot_prefix()
+        paths = []
+        for path in directory.iterdir():
+            name = path.name
+            if name.startswith(prefix) and name.endswith(_SNAPSHOT_SUFFIX) \
+                    and _is_stamp(name[len(prefix):-len(_SNAPSHOT_SUFFIX)]):
+                paths.append(path)
+        # after the common prefix the names are the times of the snapshots, so they sort chronologically
+        paths.sort()
+        return [Snapshot.open(p) for p in paths]
+
+    def prune(self, keep: int, directory: Optional[PathHint] = None,
+              silence: Silence = Silence.none) -> list[Snapshot]:
+        """Removes the oldest snapshots of this database, keeping the newest ones
+
+        :param keep: the number of snapshots to keep
+        :param directory: (optional) where the snapshots are saved, :meth:`snapshot_dir` by default
+        :param silence: Used to silence logs. See rizlib.text.logs.Silence enum class.
+        :return: the removed snapshots
+        """
+        if keep < 0:
+            raise ValueError("keep can't be negative")
+        snapshots = self.snapshots(directory)
+        removed = snapshots[:max(0, len(snapshots) - keep)]
+        for snapshot in removed:
+            _remove(snapshot.path)
+            _remove(_checksum_path(snapshot.path))
+        if removed:
+            success(f'{len(removed)} old snapshots removed', silence)
+        return removed
+
+    def restore(self, snapshot: Union[Snapshot, PathHint], silence: Silence = Silence.none) -> None:
+        """Replaces the database with the content of a snapshot, atomically.
+
+        The content is checked against the checksum of the snapshot before the database is replaced,
+        so a damaged snapshot leaves the database untouched.
+
+        :param snapshot: a snapshot or the path of its gzip file
+        :param silence: Used to silence logs. See rizlib.text.logs.Silence enum class.
+        :raises ValueError: if the content doesn't match the checksum of the snapshot
+        """
+        import gzip
+        import hashlib
+
+        if not isinstance(snapshot, Snapshot):
+            snapshot = Snapshot.open(snapshot)
+        if snapshot.checksum is None:
+            warning(f'{snapshot.path} has no checksum, it is restored without checking it', silence)
+
+        def decompress(out: BinaryIO) -> None:
+            digest = hashlib.sha256()
+            with gzip.open(snapshot.path, 'rb') as file:
+                while chunk := file.read(_CHUNK):
+                    digest.update(chunk)
+                    out.write(chunk)
+            if snapshot.checksum is not None and digest.hexdigest() != snapshot.checksum:
+                raise ValueError(f'{snapshot.path} is damaged: its checksum does not match')
+
+        _replace(self.__path, decompress)
+        success(f'{self.__path} restored from {snapshot.path}', silence)
+
     @property
     def path(self) -> str:
         """Getter
@@ -92,21 +348,15 @@ class JSONDatabase:
 
 
 if __name__ == '__main__':
-    pass
-#     test = 'db_test'
-#     db = JSONDatabase(test)
-#
-#     db_test = db.read()
-#
-#     print(db_test)
-#
-#     db_test = db.read()
-#     print(db_test)
-#
-#     db_test |= {'nome': 'john smith'}
-#     print(db_test)
-#
-#     old = db.write(db_test)
-#     print(old)
-#
-#     print(db.read())
+    from tempfile import TemporaryDirectory
+
+    with TemporaryDirectory() as root:
+        db = JSONDatabase(os.path.join(root, 'db_test'))
+        db.write({'name': 'john smith'})
+        for i in range(5):
+            db.write(db.read(Silence.success) | {'count': i}, Silence.success)
+            db.snapshot(keep=3, silence=Silence.success)
+        snapshots = db.snapshots()
+        print([s.path.name for s in snapshots])
+        db.restore(snapshots[0])
+        print(db.read(Silence.success))
@@ -1,4 +1,4 @@
-from pathlib import Path
+import os
 
 
 def get_parent_dir(file: str, with_slash: bool = True) -> str:
@@ -8,6 +8,14 @@ def get_parent_dir(file: str, with_slash: bool = True) -> str:
     :param with_slash: (optional) to add the slash character at the end of the path (default = False)
     :return: the path to file's parent dir
     """
-    return str(Path(file).parent.resolve()) + ('/' if with_slash else '')
+    # str(Path(file).parent.resolve()) without building Path objects: the components are split like
+    # pathlib does, dropping empty and '.' ones, and '..' is left to realpath, which follows the links
+    drive, rest = os.path.splitdrive(os.fspath(file))
+    if os.altsep:
+        rest = rest.replace(os.altsep, os.sep)
+    root = os.sep if rest.startswith(os.sep) else ''
+    parts = [part for part in rest.split(os.sep) if part and part != '.']
+    parent = drive + root + os.sep.join(parts[:-1]) or '.'
+    return os.path.realpath(parent) + ('/' if with_slash else '')
 
 
@@ -0,0 +1,249 @@
+"""
+Provides a parallel directory scanner built on os.scandir, and the tools to hash files
+and find duplicates.
+
+Directories are listed by a pool of threads, while the caller consumes the entries lazily.
+The entries are os.DirEntry objects, so their type and stat results are cached: on most systems
+is_file and is_dir cost no system call, and stat costs one call at most.
+
+Example:
+    for entry in scan('~/photos', pattern=['*.jpg', '*.png'], exclude=['.git', 'node_modules']):
+        print(entry.path, entry.stat().st_size)
+
+    for group in find_duplicates(scan('~/photos')):
+        print(*group, sep='\\n', end='\\n\\n')
+"""
+
+__all__ = ["scan", "hash_file", "hash_files", "find_duplicates"]
+
+__author__ = "Valerio Molinari"
+__credits__ = "Valerio Molinari"
+__maintainer__ = "Valerio Molinari"
+__email__ = "valeriomolinariprogrammazione@gmail.com"
+
+import fnmatch
+import hashlib
+import os
+import re
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, Iterator, Optional, Union
+from rizlib.documentation.types import PathHint
+from rizlib.tools.parallelism import pmap
+
+Patterns = Union[str, Iterable[str], None]
+
+
+def _compile(patterns: Patterns) -> Optional[Callable[[str], Optional[re.Match]]]:
+    """Returns a function matching a name against some glob patterns, None for no pattern"""
+    if patterns is None:
+        return None
+    if isinstance(patterns, str):
+        patterns = [patterns]
+    return re.compile('|'.join(fnmatch.translate(p) for p in patterns)).match
+
+
+def _list(path: str, match, extensions: Optional[tuple], exclude, include_dirs: bool,
+          follow_symlinks: bool, onerror: Optional[Callable[[OSError], None]]) -> tuple[list, list]:
+    """Runs in the threads, lists a directory and returns the matching entries and the subdirectories"""
+    found = []
+    subdirs = []
+    try:
+        with os.scandir(path) as iterator:
+            for entry in iterator:
+                name = entry.name
+                try:
+                    is_dir = entry.is_dir(follow_symlinks=follow_symlinks)
+                    # a link to a directory which isn't followed is neither scanned nor yielded as a file
+                    if not is_dir and not follow_symlinks and entry.is_symlink() and entry.is_dir():
+                        continue
+                except OSError:
+                    is_dir = False
+                if is_dir:
+                    if exclude is not None and exclude(name):
+                        continue
+                    subdirs.append(entry)
+                    if not include_dirs:
+                        continue
+                if match is not None and not match(name):
+                    continue
+                if extensions is not None and not name.lower().endswith(extensions):
+                    continue
+                found.append(entry)
+    except OSError as e:
+        if onerror is not None:
+            onerror(e)
+    return found, subdirs
+
+
+def scan(root: PathHint,
+         *,
+         pattern: Patterns = None,
+         extensions: Optional[Iterable[str]] = None,
+         exclude: Patterns = None,
+         recursive: bool = True,
+         max_depth: Optional[int] = None,
+         include_dirs: bool = False,
+         follow_symlinks: bool = False,
+         workers: int = 8,
+         onerror: Optional[Callable[[OSError], None]] = None
+         ) -> Iterator[os.DirEntry]:
+    """Yields the entries of a directory tree, listing many directories at the same time.
+
+    Entries are yielded as soon as their directory has been listed, so the order is roughly breadth
+    first and not sorted. Directories which can't be read are skipped.
+
+    :param root: the directory to scan, ~ is expanded
+    :param pattern: (optional) one or more glob patterns, only entries whose name matches one are yielded
+    :param extensions: (optional) only files with one of these extensions are yielded, e.g. ['.jpg', '.png'],
+        ignoring the case
+    :param exclude: (optional) one or more glob patterns, directories whose name matches one aren't scanned
+    :param recursive: if False, only the root directory is listed
+    :param max_depth: (optional) the maximum depth of the listed directories, the root has depth 0
+    :param include_dirs: if True, directories are yielded too
+    :param follow_symlinks: if True, symbolic links to directories are scanned, each directory only once,
+        otherwise they're skipped
+    :param workers: the number of threads listing directories
+    :param onerror: (optional) called with the OSError raised by a directory which can't be read
+    :return: an iterator of os.DirEntry
+    """
+    match = _compile(pattern)
+    skip = _compile(exclude)
+    if extensions is not None:
+        extensions = tuple(e.lower() if e.startswith('.') else f'.{e.lower()}' for e in extensions)
+    if not recursive:
+        max_depth = 0
+    root = os.path.expanduser(os.fsdecode(root))
+
+    visited = set()
+    if follow_symlinks:
+        st = os.stat(root)
+        visited.add((st.st_dev, st.st_ino))
+
+    options = (match, extensions, skip, include_dirs, follow_symlinks, onerror)
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='rizlib-scan') as pool:
+        pending = deque([(pool.submit(_list, root, *options), 0)])
+        try:
+            while pending:
+                future, depth = pending.popleft()
+                found, subdirs = future.result()
+                if max_depth is None or depth < max_depth:
+                    for subdir in subdirs:
+                        if follow_symlinks:
+                            try:
+                                st = subdir.stat()
+                            except OSError:
+                                continue
+                            if (st.st_dev, st.st_ino) in visited:
+                                continue
+                            visited.add((st.st_dev, st.st_ino))
+                        pending.append((pool.submit(_list, subdir.path, *options), depth + 1))
+                yield from found
+        finally:
+            for future, _ in pending:
+                future.cancel()
+
+
+def hash_file(path: PathHint, algorithm: str = 'blake2b', limit: Optional[int] = None,
+              chunk_size: int = 1 << 20) -> str:
+    """Returns the hex digest of a file
+
+    :param path: the path of the file
+    :param algorithm: a hashlib algorithm
+    :param limit: (optional) only the first limit bytes are hashed
+    :param chunk_size: the size of the reads
+    """
+    digest = hashlib.new(algorithm)
+    buffer = bytearray(min(chunk_size, limit) if limit else chunk_size)
+    view = memoryview(buffer)
+    left = limit
+    with open(path, 'rb', buffering=0) as file:
+        while left is None or left > 0:
+            n = file.readinto(buffer)
+            if not n:
+                break
+            if left is not None:
+                n = min(n, left)
+                left -= n
+            digest.update(view[:n])
+    return digest.hexdigest()
+
+
+def _hash(path: str, algorithm: str, limit: Optional[int]) -> tuple[str, Optional[str]]:
+    try:
+        return path, hash_file(path, algorithm, limit)
+    except OSError:
+        return path, None
+
+
+def hash_files(paths: Iterable[Union[PathHint, os.DirEntry]], algorithm: str = 'blake2b',
+               limit: Optional[int] = None, workers: int = 8) -> Iterator[tuple[str, Optional[str]]]:
+    """Hashes many files in a pool of threads, hashlib releases the GIL while hashing large buffers
+
+    :param paths: the paths of the files, or the entries yielded by :func:`scan`
+    :param algorithm: a hashlib algorithm
+    :param limit: (optional) only the first limit bytes of every file are hashed
+    :param workers: the number of threads
+    :return: an iterator of (path, hex digest) in input order, the digest is None if the file can't be read
+    """
+    paths = (p.path if isinstance(p, os.DirEntry) else os.fsdecode(p) for p in paths)
+    return pmap(lambda path: _hash(path, algorithm, limit), paths, executor='thread', workers=workers, chunk_size=1)
+
+
+def find_duplicates(files: Iterable[Union[PathHint, os.DirEntry]],
+                    *,
+                    algorithm: str = 'blake2b',
+                    min_size: int = 1,
+                    head: int = 1 << 16,
+                    workers: int = 8) -> list[list[str]]:
+    """Finds the files with the same content.
+
+    Files are grouped by size first, then the first head bytes of files with the same size are hashed,
+    and only the files whose heads are equal are hashed entirely, so most files are never read
+    or only partially.
+
+    :param files: the paths of the files, or the entries yielded by :func:`scan` whose stat is cached
+    :param algorithm: a hashlib algorithm
+    :param min_size: smaller files are ignored, empty files by default
+    :param head: the number of bytes hashed to tell files of the same size apart
+    :param workers: the number of threads hashing files
+    :return: the groups of paths of identical files, every group has at least two paths
+    """
+    by_size = defaultdict(list)
+    for file in files:
+        try:
+            if isinstance(file, os.DirEntry):
+                path, size = file.path, file.stat().st_size
+            else:
+                path = os.fsdecode(file)
+                size = os.stat(path).st_size
+        except OSError:
+            continue
+        if size >= min_size:
+            by_size[size].append(path)
+
+    candidates = [(size, group) for size, group in by_size.items() if len(group) > 1]
+    duplicates = []
+    for limit in (head, None):
+        paths = [path for _, group in candidates for path in group]
+        digests = dict(hash_files(paths, algorithm, limit, workers))
+        groups = []
+        for size, group in candidates:
+            by_digest = defaultdict(list)
+            for path in group:
+                if digests[path] is not None:
+                    by_digest[digests[path]].append(path)
+            same = [g for g in by_digest.values() if len(g) > 1]
+            # the head of a small file is the whole file
+            (duplicates if limit is None or size <= limit else groups).extend((size, g) for g in same)
+        candidates = groups
+    return [group for _, group in duplicates]
+
+
+if __name__ == '__main__':
+    import sys
+    from time import perf_counter
+
+    start = perf_counter()
+    count = sum(1 for _ in scan(sys.argv[1] if len(sys.argv) > 1 else '.'))
+    print(f'{count} files in {perf_counter() - start:.3f}s')
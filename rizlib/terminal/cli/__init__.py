@@ -0,0 +1,12 @@
+from rizlib.tools.lazy import lazy_exports
+
+__getattr__, __dir__, __all__ = lazy_exports(__name__, globals(), {
+    'get_pipe': 'pipe',
+    'is_piped': 'pipe',
+    'iter_pipe_lines': 'pipe',
+    'iter_pipe_chunks': 'pipe',
+    'map_pipe': 'pipe',
+    'aiter_pipe_lines': 'pipe',
+    'ordered_map': 'parallel',
+    'pipe_map': 'parallel',
+}, submodules=['pipe', 'parallel'])
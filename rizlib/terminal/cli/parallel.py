@@ -0,0 +1,91 @@
+"""Declares functions to process the stdin pipe in parallel, turning a script into a fast unix filter"""
+
+__all__ = ["ordered_map", "pipe_map"]
+
+__author__ = "Valerio Molinari"
+__credits__ = "Valerio Molinari"
+__maintainer__ = "Valerio Molinari"
+__email__ = "valeriomolinariprogrammazione@gmail.com"
+
+import sys
+from typing import Any, Callable, Iterable, Iterator, Literal, Optional, TextIO
+from rizlib.terminal.cli.pipe import iter_pipe_lines
+from rizlib.tools.parallelism import pmap
+
+
+def ordered_map(function: Callable[[Any], Any],
+                iterable: Iterable,
+                *,
+                executor: Literal['process', 'thread'] = 'process',
+                workers: Optional[int] = None,
+                chunk_size: Optional[int] = None,
+                max_in_flight: Optional[int] = None
+                ) -> Iterator[Any]:
+    """Applies function to every item of iterable in a pool of workers and yields the results
+    in input order as soon as they are ready, see :func:`rizlib.tools.parallelism.pmap`.
+
+    The items are sent to the workers in chunks and at most max_in_flight chunks are pending at
+    the same time, so the memory used is bounded even if iterable is endless. By default chunks are
+    sized so that each one takes a few milliseconds, measuring the completed ones.
+
+    :param function: the function to apply, it must be picklable (defined at module level)
+        when executor is 'process'
+    :param iterable: the items to process, consumed lazily
+    :param executor: 'process' for CPU bound functions, 'thread' for I/O bound ones
+    :param workers: the number of workers, the number of CPUs by default
+    :param chunk_size: (optional) the number of items sent to a worker at once, automatic by default
+    :param max_in_flight: the maximum number of pending chunks, twice the workers by default
+    :return: an iterator over the results
+    :raises ParallelError: when function raises
+    """
+    return pmap(function, iterable, executor=executor, workers=workers, chunk_size=chunk_size,
+                max_in_flight=max_in_flight)
+
+
+def pipe_map(function: Callable[[str], Any],
+             *,
+             executor: Literal['process', 'thread'] = 'process',
+             workers: Optional[int] = None,
+             chunk_size: Optional[int] = None,
+             max_in_flight: Optional[int] = None,
+             output: Optional[TextIO] = None
+             ) -> int:
+    """Streams the lines piped to the program through function in parallel and writes the results,
+    one per line and in input order, as soon as they are ready. If function returns None the line
+    is dropped, so it can also be used as a filter.
+
+    Example
+        Program:
+
+        >>> def shout(line: str) -> str:
+        ...     return line.upper()
+        >>> if __name__ == '__main__':
+        >>>    pipe_map(shout)
+
+        Terminal:
+
+        % cat words.txt | python3 shout.py
+
+    :param function: the function applied to each line, without the line terminator
+    :param executor: 'process' for CPU bound functions, 'thread' for I/O bound ones
+    :param workers: the number of workers, the number of CPUs by default
+    :param chunk_size: (optional) the number of lines sent to a worker at once, automatic by default
+    :param max_in_flight: the maximum number of pending chunks, twice the workers by default
+    :param output: the stream results are written to, stdout by default
+    :return: the number of lines written
+    """
+    output = output if output is not None else sys.stdout
+    write = output.write
+    written = 0
+    results = ordered_map(function, iter_pipe_lines(), executor=executor, workers=workers,
+                          chunk_size=chunk_size, max_in_flight=max_in_flight)
+    for result in results:
+        if result is not None:
+            write(f'{result}\n')
+            written += 1
+    output.flush()
+    return written
+
+
+if __name__ == '__main__':
+    pipe_map(str.upper)
@@ -1,18 +1,35 @@
 """Declares functions to menage the stdin pipe in the console"""
 
-__all__ = ["get_pipe"]
+__all__ = ["get_pipe", "is_piped", "iter_pipe_lines", "iter_pipe_chunks", "map_pipe", "aiter_pipe_lines"]
 
 __author__ = "Valerio Molinari"
 __credits__ = "Valerio Molinari"
 __maintainer__ = "Valerio Molinari"
 __email__ = "valeriomolinariprogrammazione@gmail.com"
 
+import mmap
+import os
 import select
+import stat
 import sys
+from typing import AsyncIterator, Iterator, Optional
 
 
-def get_pipe() -> list:
-    """Returns the value piped to the program who called this function
+def is_piped(timeout: float = 0.0) -> bool:
+    """Returns whether something has been piped to the program, without blocking
+
+    :param timeout: seconds to wait for the data to be available, 0 by default
+    """
+    return bool(select.select([sys.stdin, ], [], [], timeout)[0])
+
+
+def get_pipe() -> str:
+    """Returns the value piped to the program who called this function, without its last newline,
+    or an empty string if nothing has been piped. Input which doesn't end with a newline is returned
+    whole, and \r\n and \r line endings are turned into \n.
+
+    The whole input is loaded in memory, for large inputs prefer :func:`iter_pipe_lines`,
+    :func:`iter_pipe_chunks` or :func:`map_pipe`.
 
     Example
         Program:
@@ -26,7 +43,119 @@ def get_pipe() -> list:
 
         hello world
     """
-    return sys.stdin.read()[:-1] if select.select([sys.stdin, ], [], [], 0.0)[0] else []
+    if not is_piped():
+        return ''
+    data = sys.stdin.buffer.read()
+    end = len(data)
+    if data.endswith(b'\n'):
+        end -= 2 if data.endswith(b'\r\n') else 1
+    # decoded from a view of the bytes, so that removing the last newline doesn't copy the whole input
+    text = str(memoryview(data)[:end], sys.stdin.encoding or 'utf-8', sys.stdin.errors or 'strict')
+    del data
+    return text.replace('\r\n', '\n').replace('\r', '\n') if '\r' in text else text
+
+
+def iter_pipe_lines(keepends: bool = False) -> Iterator[str]:
+    """Yields the lines piped to the program one by one, so that only one line at a time is kept
+    in memory. Nothing is yielded if there's nothing piped.
+
+    Example
+        >>> for line in iter_pipe_lines():
+        ...     print(line.upper())
+
+    :param keepends: if True the line terminator is kept
+    :return: an iterator over the piped lines
+    """
+    if not is_piped():
+        return
+    for line in sys.stdin:
+        yield line if keepends else line.rstrip('\n')
+
+
+def iter_pipe_chunks(chunk_size: int = 1 << 16) -> Iterator[bytes]:
+    """Yields the bytes piped to the program in chunks. Nothing is yielded if there's nothing piped.
+
+    :param chunk_size: the maximum size of each chunk, 64 KiB by default
+    :return: an iterator over the piped chunks
+    """
+    if not is_piped():
+        return
+    read = sys.stdin.buffer.read1
+    while chunk := read(chunk_size):
+        yield chunk
+
+
+def map_pipe() -> Optional[mmap.mmap]:
+    """Maps stdin to memory when it's redirected from a regular file, e.g. `python3 script.py < file`.
+    The file content isn't copied, pages are loaded lazily by the operating system.
+
+    Example
+        >>> view = map_pipe()
+        >>> if view is not None:
+        ...     with view:
+        ...         lines = view[:].count(b'\\n')
+
+    :return: a read-only mmap of stdin, None if stdin isn't a regular file or it is empty
+    """
+    fd = sys.stdin.fileno()
+    info = os.fstat(fd)
+    if not stat.S_ISREG(info.st_mode) or not info.st_size:
+        return None
+    return mmap.mmap(fd, 0, access=mmap.ACCESS_READ)
+
+
+async def aiter_pipe_lines(keepends: bool = False, limit: int = 1 << 16) -> AsyncIterator[str]:
+    """Asynchronously yields the lines piped to the program, without blocking the event loop.
+    Nothing is yielded if there's nothing piped.
+
+    Example
+        >>> async def main():
+        ...     async for line in aiter_pipe_lines():
+        ...         await process(line)
+
+    :param keepends: if True the line terminator is kept
+    :param limit: the buffer limit of the underlying stream reader, longer lines are read in pieces of
+        this size and joined
+    :return: an async iterator over the piped lines
+    """
+    if not is_piped():
+        return
+
+    import asyncio  # asyncio is slow to import, it's only loaded by who needs it
+
+    loop = asyncio.get_running_loop()
+    mode = os.fstat(sys.stdin.fileno()).st_mode
+    if not (stat.S_ISFIFO(mode) or stat.S_ISSOCK(mode)):
+        # regular files, terminals and devices like /dev/null can't be watched by the event loop,
+        # they're read in a thread
+        while line := await loop.run_in_executor(None, sys.stdin.buffer.readline):
+            yield line.decode() if keepends else line.decode().rstrip('\n')
+        return
+
+    reader = asyncio.StreamReader(limit=limit)
+    # the transport closes its pipe when it's done, so it's given a duplicate of stdin
+    pipe = os.fdopen(os.dup(sys.stdin.fileno()), 'rb', buffering=0)
+    transport, _ = await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), pipe)
+
+    async def readline() -> bytes:
+        # like reader.readline, but a line longer than the limit is read in pieces instead of raising
+        parts = []
+        while True:
+            try:
+                parts.append(await reader.readuntil(b'\n'))
+                break
+            except asyncio.IncompleteReadError as e:  # the last line, without a newline
+                parts.append(e.partial)
+                break
+            except asyncio.LimitOverrunError as e:
+                parts.append(await reader.readexactly(e.consumed))
+        return b''.join(parts)
+
+    try:
+        while line := await readline():
+            yield line.decode() if keepends else line.decode().rstrip('\n')
+    finally:
+        transport.close()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,12 @@
+from rizlib.tools.lazy import lazy_exports
+
+__getattr__, __dir__, __all__ = lazy_exports(__name__, globals(), {
+    'Queue': 'queue',
+    'QueueNode': 'queue',
+    'Stack': 'stack',
+    'StackNode': 'stack',
+    'PriorityQueue': 'priority_queue',
+    'IndexedHeap': 'indexed_heap',
+    'HeapNode': 'indexed_heap',
+    'PersistentQueue': 'persistent_queue',
+}, submodules=['queue', 'stack', 'priority_queue', 'indexed_heap', 'persistent_queue'])
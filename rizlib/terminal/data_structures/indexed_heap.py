@@ -0,0 +1,195 @@
+"""
+Provides classes to instantiate an indexed min heap. There's a default class called HeapNode which
+is returned by every push and works as a handle to update or remove the element later,
+and an IndexedHeap class to instantiate the heap.
+"""
+
+__all__ = ["HeapNode", "IndexedHeap", "HeapHandleError"]
+
+__author__ = "Valerio Molinari"
+__credits__ = "Valerio Molinari"
+__maintainer__ = "Valerio Molinari"
+__email__ = "valeriomolinariprogrammazione@gmail.com"
+
+from typing import Any, Generic, Optional, TypeVar
+from dataclasses import dataclass
+
+T = TypeVar('T')
+
+
+@dataclass(eq=False)
+class HeapNode:
+    """This class implements a heap node which is also the handle of the element inside the heap
+
+    Args:
+        data: Any type of data to store
+        priority: any comparable value, the lowest priority is on top of the heap
+        index: the position of the node inside the heap, -1 when the node is not in a heap
+    """
+    data: Any
+    priority: Any
+    index: int = -1
+
+
+class HeapHandleError(ValueError):
+    """Raised when an IndexedHeap method receives a node which doesn't belong to the heap"""
+
+
+class IndexedHeap(Generic[T]):
+    def __init__(self):
+        """This class implements a binary min heap whose nodes know their own position.
+        Thanks to that, the node returned by push can be used to change the priority of an element
+        or to remove it in O(log n), without searching it.
+        """
+        self.__heap: list[HeapNode] = []
+
+    def is_empty(self) -> bool:
+        """Returns whether the heap is empty or not"""
+        return not self.__heap
+
+    def __len__(self) -> int:
+        return len(self.__heap)
+
+    def __contains__(self, node: HeapNode) -> bool:
+        return 0 <= node.index < len(self.__heap) and self.__heap[node.index] is node
+
+    def push(self, data: Any, priority: Any) -> HeapNode:
+        """Adds a new element to the heap
+
+        :param data: Any type of data to store
+        :param priority: any comparable value, the lowest priority is on top of the heap
+        :return: the new node, to be used as handle by decrease_key, update and remove
+        """
+        node = HeapNode(data, priority, len(self.__heap))
+        self.__heap.append(node)
+        self.__sift_up(node.index)
+        return node
+
+    def pop(self) -> Any:
+        """Pops the element with the lowest priority from the heap
+
+        :return: the element's data or None if the heap is empty
+        """
+        if self.is_empty():
+            return None
+        return self.__remove_at(0).data
+
+    def pop_node(self) -> Optional[HeapNode]:
+        """Pops the node with the lowest priority from the heap
+
+        :return: the node or None if the heap is empty
+        """
+        if self.is_empty():
+            return None
+        return self.__remove_at(0)
+
+    def peek(self) -> Optional[HeapNode]:
+        """Returns the node with the lowest priority without removing it
+
+        :return: the node or None if the heap is empty
+        """
+        return self.__heap[0] if self.__heap else None
+
+    def decrease_key(self, node: HeapNode, priority: Any) -> None:
+        """Lowers the priority of a node already in the heap
+
+        :param node: the handle returned by push
+        :param priority: the new priority, it must not be greater than the current one
+        :raises HeapHandleError: if the node is not in the heap
+        :raises ValueError: if the new priority is greater than the current one
+        """
+        self.__check(node)
+        if node.priority < priority:
+            raise ValueError(f"new priority {priority!r} is greater than current priority {node.priority!r}")
+        node.priority = priority
+        self.__sift_up(node.index)
+
+    def update(self, node: HeapNode, priority: Any) -> None:
+        """Changes the priority of a node already in the heap, either lowering or raising it
+
+        :param node: the handle returned by push
+        :param priority: the new priority
+        :raises HeapHandleError: if the node is not in the heap
+        """
+        self.__check(node)
+        node.priority = priority
+        self.__sift_up(node.index)
+        self.__sift_down(node.index)
+
+    def remove(self, node: HeapNode) -> Any:
+        """Removes a node from the heap
+
+        :param node: the handle returned by push
+        :return: the removed node's data
+        :raises HeapHandleError: if the node is not in the heap
+        """
+        self.__check(node)
+        return self.__remove_at(node.index).data
+
+    def clear(self) -> None:
+        """Removes every node from the heap"""
+        for node in self.__heap:
+            node.index = -1
+        self.__heap.clear()
+
+    def __check(self, node: HeapNode) -> None:
+        if node not in self:
+            raise HeapHandleError(f"{node} doesn't belong to this heap")
+
+    def __remove_at(self, index: int) -> HeapNode:
+        """Swaps the node at index with the last one, removes it and restores the heap property"""
+        heap = self.__heap
+        node = heap[index]
+        last = heap.pop()
+        if last is not node:
+            heap[index] = last
+            last.index = index
+            self.__sift_up(index)
+            self.__sift_down(last.index)
+        node.index = -1
+        return node
+
+    def __sift_up(self, index: int) -> None:
+        heap = self.__heap
+        node = heap[index]
+        while index > 0:
+            parent_index = (index - 1) >> 1
+            parent = heap[parent_index]
+            if not node.priority < parent.priority:
+                break
+            heap[index] = parent
+            parent.index = index
+            index = parent_index
+        heap[index] = node
+        node.index = index
+
+    def __sift_down(self, index: int) -> None:
+        heap = self.__heap
+        size = len(heap)
+        node = heap[index]
+        while True:
+            child_index = 2 * index + 1
+            if child_index >= size:
+                break
+            right_index = child_index + 1
+            if right_index < size and heap[right_index].priority < heap[child_index].priority:
+                child_index = right_index
+            child = heap[child_index]
+            if not child.priority < node.priority:
+                break
+            heap[index] = child
+            child.index = index
+            index = child_index
+        heap[index] = node
+        node.index = index
+
+
+if __name__ == '__main__':
+    heap = IndexedHeap[str]()
+    a = heap.push('a', 5)
+    b = heap.push('b', 3)
+    c = heap.push('c', 4)
+    heap.decrease_key(a, 1)
+    heap.remove(c)
+    while not heap.is_empty():
+        print(heap.pop())
@@ -0,0 +1,332 @@
+"""
+Provides the PersistentQueue class, a FIFO queue which survives crashes. Every element is appended
+to segmented memory-mapped files on disk, while only a bounded window of elements is kept in memory.
+"""
+
+__all__ = ["PersistentQueue", "SegmentError"]
+
+__author__ = "Valerio Molinari"
+__credits__ = "Valerio Molinari"
+__maintainer__ = "Valerio Molinari"
+__email__ = "valeriomolinariprogrammazione@gmail.com"
+
+import mmap
+import os
+import pickle
+import struct
+from collections import deque
+from pathlib import Path
+from typing import Any, Generic, Optional, TypeVar
+from zlib import crc32
+from rizlib.documentation.types import PathHint
+
+T = TypeVar('T')
+
+_HEADER = struct.Struct('<II')
+_ACK = struct.Struct('<QQ')
+_SEGMENT_SUFFIX = '.seg'
+_ACK_FILE = 'ack'
+
+
+class SegmentError(OSError):
+    """Raised when a segment file of a PersistentQueue can't be used"""
+
+
+class _Segment:
+    def __init__(self, path: Path, size: Optional[int] = None):
+        """A memory-mapped segment file. If size is given the file is created and preallocated
+        with zeros, otherwise the existing file is opened.
+
+        :param path: path to the segment file
+        :param size: (optional) size of the segment to create
+        """
+        self.path = path
+        self.id = int(path.stem)
+        flags = os.O_RDWR | (os.O_CREAT | os.O_EXCL if size is not None else 0)
+        fd = os.open(path, flags, 0o644)
+        try:
+            if size is not None:
+                os.ftruncate(fd, size)
+            self.size = os.fstat(fd).st_size
+            if self.size < _HEADER.size:
+                raise SegmentError(f"{path} is too small to be a segment")
+            self.map = mmap.mmap(fd, self.size, access=mmap.ACCESS_WRITE)
+        finally:
+            os.close(fd)
+
+    def read(self, offset: int) -> Optional[tuple[bytes, int]]:
+        """Reads the record at offset
+
+        :return: a (payload, next offset) couple or None if there's no valid record at offset
+        """
+        if offset + _HEADER.size > self.size:
+            return None
+        length, checksum = _HEADER.unpack_from(self.map, offset)
+        end = offset + _HEADER.size + length
+        if not length or end > self.size:
+            return None
+        payload = self.map[offset + _HEADER.size:end]
+        if crc32(payload) != checksum:
+            return None
+        return payload, end
+
+    def fits(self, offset: int, payload: bytes) -> bool:
+        return offset + _HEADER.size + len(payload) <= self.size
+
+    def write(self, offset: int, payload: bytes) -> int:
+        """Writes a record at offset. The payload is written before its header, so a torn write
+        is never mistaken for a valid record.
+
+        :return: the offset after the record
+        """
+        start = offset + _HEADER.size
+        end = start + len(payload)
+        self.map[start:end] = payload
+        self.map[offset:start] = _HEADER.pack(len(payload), crc32(payload))
+        return end
+
+    def wipe(self, offset: int) -> None:
+        """Zeroes the header at offset, used to discard a torn record during recovery"""
+        if offset + _HEADER.size <= self.size:
+            self.map[offset:offset + _HEADER.size] = bytes(_HEADER.size)
+
+    def flush(self) -> None:
+        self.map.flush()
+
+    def close(self) -> None:
+        self.map.close()
+
+
+class PersistentQueue(Generic[T]):
+    def __init__(self,
+                 directory: PathHint,
+                 *,
+                 memory_limit: int = 10_000,
+                 segment_size: int = 64 * 1024 * 1024,
+                 sync: bool = False
+                 ) -> None:
+        """This class implements a FIFO queue stored in segment files inside a directory.
+
+        Every enqueued element is pickled and appended to the current segment, a preallocated
+        memory-mapped file. At most memory_limit elements are kept in memory, the others are only
+        on disk and are loaded back in batches when the in-memory window runs empty.
+
+        Dequeued elements are only delivered, the position of the queue on disk is committed by
+        :meth:`ack`. If the program crashes, reopening the same directory recovers the queue from
+        the segments and redelivers every element dequeued after the last ack. Segments whose
+        elements have all been acknowledged are deleted.
+
+        :param directory: the directory holding the segments, created if it doesn't exist
+        :param memory_limit: the maximum number of elements kept in memory
+        :param segment_size: the size in bytes of a new segment file
+        :param sync: if True, every enqueue is flushed to disk before returning
+        """
+        if memory_limit < 1:
+            raise ValueError("memory_limit must be at least 1")
+        if segment_size <= _HEADER.size:
+            raise ValueError(f"segment_size must be greater than {_HEADER.size}")
+
+        self.__directory = Path(directory)
+        self.__directory.mkdir(parents=True, exist_ok=True)
+        self.__memory_limit = memory_limit
+        self.__segment_size = segment_size
+        self.__sync = sync
+
+        self.__segments: dict[int, _Segment] = {}
+        self.__window: deque[tuple[Any, int, int]] = deque()
+        self.__length = 0
+        self.__recover()
+
+    # -- recovery ----------------------------------------------------------------------------------
+
+    def __segment_path(self, segment_id: int) -> Path:
+        return self.__directory / f'{segment_id:016d}{_SEGMENT_SUFFIX}'
+
+    def __segment_ids(self) -> list[int]:
+        return sorted(int(p.stem) for p in self.__directory.glob(f'*{_SEGMENT_SUFFIX}') if p.stem.isdigit())
+
+    def __read_ack(self) -> Optional[tuple[int, int]]:
+        try:
+            with open(self.__directory / _ACK_FILE, 'rb') as file:
+                return _ACK.unpack(file.read(_ACK.size))
+        except (FileNotFoundError, struct.error):
+            return None
+
+    def __recover(self) -> None:
+        """Opens the segments found in the directory, finds the acknowledged position and the end
+        of the written data, discarding a record torn by a crash
+        """
+        ids = self.__segment_ids()
+        if not ids:
+            segment = self.__new_segment(0)
+            self.__acked = self.__disk = self.__delivered = self.__write = (segment.id, 0)
+            return
+
+        for segment_id in ids:
+            self.__segments[segment_id] = _Segment(self.__segment_path(segment_id))
+
+        ack = self.__read_ack()
+        if ack is None or ack[0] not in self.__segments:
+            ack = (ids[0], 0)
+        self.__acked = self.__disk = self.__delivered = ack
+
+        self.__gc()
+        position, length = ack, 0
+        while True:
+            record = self.__next_record(position)
+            if record is None:
+                break
+            position, length = record[1], length + 1
+        self.__write = position
+        self.__segments[position[0]].wipe(position[1])
+        self.__length = length
+
+    # -- disk access -------------------------------------------------------------------------------
+
+    def __new_segment(self, segment_id: int, size: int = 0) -> _Segment:
+        segment = _Segment(self.__segment_path(segment_id), max(size, self.__segment_size))
+        self.__segments[segment_id] = segment
+        return segment
+
+    def __next_record(self, position: tuple[int, int]) -> Optional[tuple[bytes, tuple[int, int]]]:
+        """Reads the record at position, moving to the next segment when the current one is over
+
+        :return: a (payload, next position) couple or None if there are no more records
+        """
+        segment_id, offset = position
+        while True:
+            record = self.__segments[segment_id].read(offset)
+            if record is not None:
+                return record[0], (segment_id, record[1])
+            if segment_id + 1 not in self.__segments:
+                return None
+            segment_id, offset = segment_id + 1, 0
+
+    def __append(self, payload: bytes) -> tuple[int, int]:
+        segment_id, offset = self.__write
+        segment = self.__segments[segment_id]
+        if not segment.fits(offset, payload):
+            segment.flush()
+            segment_id, offset = segment_id + 1, 0
+            segment = self.__new_segment(segment_id, _HEADER.size + len(payload))
+        self.__write = segment_id, segment.write(offset, payload)
+        if self.__sync:
+            segment.flush()
+        return self.__write
+
+    def __refill(self) -> None:
+        """Loads the next batch of spilled elements from disk into the in-memory window"""
+        position = self.__disk
+        while len(self.__window) < self.__memory_limit and position != self.__write:
+            record = self.__next_record(position)
+            if record is None:
+                break
+            payload, position = record
+            self.__window.append((pickle.loads(payload), *position))
+        self.__disk = position
+
+    def __gc(self) -> None:
+        """Deletes the segments preceding the acknowledged one"""
+        for segment_id in [s for s in self.__segments if s < self.__acked[0]]:
+            self.__segments.pop(segment_id).close()
+            os.remove(self.__segment_path(segment_id))
+
+    # -- public interface --------------------------------------------------------------------------
+
+    def is_empty(self) -> bool:
+        """Returns whether there are elements left to dequeue"""
+        return not self.__length
+
+    def __len__(self) -> int:
+        return self.__length
+
+    def enqueue(self, data: T) -> None:
+        """Appends a new element to the tail of the queue. The element is kept in memory only
+        if the in-memory window isn't full and no other element is waiting on disk.
+
+        :param data: any picklable data
+        """
+        caught_up = self.__disk == self.__write
+        position = self.__append(pickle.dumps(data, pickle.HIGHEST_PROTOCOL))
+        if caught_up and len(self.__window) < self.__memory_limit:
+            self.__window.append((data, *position))
+            self.__disk = position
+        self.__length += 1
+
+    def dequeue(self) -> Optional[T]:
+        """Delivers the element at the head of the queue. The element is removed from disk
+        only once it's acknowledged with :meth:`ack`.
+
+        :return: the element's data or None if the queue is empty
+        """
+        if not self.__window:
+            self.__refill()
+            if not self.__window:
+                return None
+        data, segment_id, offset = self.__window.popleft()
+        self.__delivered = segment_id, offset
+        self.__length -= 1
+        return data
+
+    def ack(self) -> None:
+        """Acknowledges every element delivered so far. The elements can't be redelivered after
+        a crash anymore and the segments they were in are deleted.
+        """
+        if self.__delivered == self.__acked:
+            return
+        self.flush()
+        tmp = self.__directory / f'{_ACK_FILE}.tmp'
+        with open(tmp, 'wb') as file:
+            file.write(_ACK.pack(*self.__delivered))
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp, self.__directory / _ACK_FILE)
+        self.__acked = self.__delivered
+        self.__gc()
+
+    def flush(self) -> None:
+        """Flushes the segment being written to disk"""
+        self.__segments[self.__write[0]].flush()
+
+    def close(self) -> None:
+        """Flushes and closes every segment. Unacknowledged elements will be redelivered
+        when the directory is opened again.
+        """
+        if not self.__segments:
+            return
+        self.flush()
+        for segment in self.__segments.values():
+            segment.close()
+        self.__segments.clear()
+        self.__window.clear()
+
+    def __enter__(self) -> 'PersistentQueue[T]':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    @property
+    def directory(self) -> Path:
+        return self.__directory
+
+    @property
+    def memory_limit(self) -> int:
+        return self.__memory_limit
+
+
+if __name__ == '__main__':
+    from tempfile import TemporaryDirectory
+
+    with TemporaryDirectory() as tmp_dir:
+        with PersistentQueue[int](tmp_dir, memory_limit=2, segment_size=64) as queue:
+            for n in range(10):
+                queue.enqueue(n)
+            print(queue.dequeue(), queue.dequeue())
+            queue.ack()
+            print(queue.dequeue())
+
+        with PersistentQueue[int](tmp_dir) as queue:
+            while not queue.is_empty():
+                print(queue.dequeue(), end=' ')
+            print()
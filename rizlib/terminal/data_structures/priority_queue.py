@@ -0,0 +1,96 @@
+"""
+Provides the PriorityQueue class, a heap-backed queue which always dequeues the element with the
+lowest priority first. Elements with the same priority are dequeued in insertion order.
+"""
+
+__all__ = ["PriorityQueue"]
+
+__author__ = "Valerio Molinari"
+__credits__ = "Valerio Molinari"
+__maintainer__ = "Valerio Molinari"
+__email__ = "valeriomolinariprogrammazione@gmail.com"
+
+from heapq import heappush, heappop, heapify
+from itertools import count
+from typing import Any, Generic, Iterable, Optional, TypeVar
+
+T = TypeVar('T')
+
+
+class PriorityQueue(Generic[T]):
+    def __init__(self, items: Optional[Iterable[tuple[Any, T]]] = None):
+        """This class implements a min priority queue backed by a binary heap. Both enqueue and dequeue
+        run in O(log n), peek runs in O(1).
+
+        :param items: (optional) an iterable of (priority, data) couples used to fill the queue in O(n)
+        """
+        self.__counter = count()
+        self.__heap: list[tuple[Any, int, T]] = []
+        if items is not None:
+            self.__heap = [(priority, next(self.__counter), data) for priority, data in items]
+            heapify(self.__heap)
+
+    def is_empty(self) -> bool:
+        """Returns whether the queue is empty or not"""
+        return not self.__heap
+
+    def __len__(self) -> int:
+        return len(self.__heap)
+
+    def enqueue(self, data: T, priority: Any = 0) -> None:
+        """Adds a new element to the queue
+
+        :param data: Any type of data to store
+        :param priority: any comparable value, the lowest priority is dequeued first
+        """
+        heappush(self.__heap, (priority, next(self.__counter), data))
+
+    def dequeue(self) -> Optional[T]:
+        """Dequeues the element with the lowest priority
+
+        :return: the element's data or None if the queue is empty
+        """
+        if self.is_empty():
+            return None
+        return heappop(self.__heap)[2]
+
+    def dequeue_with_priority(self) -> Optional[tuple[Any, T]]:
+        """Dequeues the element with the lowest priority
+
+        :return: a (priority, data) couple or None if the queue is empty
+        """
+        if self.is_empty():
+            return None
+        priority, _, data = heappop(self.__heap)
+        return priority, data
+
+    def peek(self) -> Optional[T]:
+        """Returns the element with the lowest priority without removing it
+
+        :return: the element's data or None if the queue is empty
+        """
+        if self.is_empty():
+            return None
+        return self.__heap[0][2]
+
+    def peek_priority(self) -> Any:
+        """Returns the lowest priority in the queue without removing the element
+
+        :return: the priority or None if the queue is empty
+        """
+        if self.is_empty():
+            return None
+        return self.__heap[0][0]
+
+    def clear(self) -> None:
+        """Removes every element from the queue"""
+        self.__heap.clear()
+
+
+if __name__ == '__main__':
+    queue = PriorityQueue[str]()
+    queue.enqueue('write report', 3)
+    queue.enqueue('fix production', 1)
+    queue.enqueue('lunch', 2)
+    while not queue.is_empty():
+        print(queue.dequeue())
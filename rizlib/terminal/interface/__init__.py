@@ -0,0 +1,11 @@
+from rizlib.tools.lazy import lazy_exports
+
+__getattr__, __dir__, __all__ = lazy_exports(__name__, globals(), {
+    'Menu': 'menu',
+    'MenuInterrupt': 'menu',
+    'ActionTiming': 'menu',
+    'BatchReport': 'menu',
+    'clear': 'commands',
+    'Screen': 'screen',
+    'confirm': 'prompts',
+}, submodules=['commands', 'menu', 'prompts', 'screen'])
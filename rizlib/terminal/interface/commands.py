@@ -1,6 +1,6 @@
-import os
+from rizlib.terminal.interface import screen
 
 
 def clear():
     """Clear the screen"""
-    os.system('clear')
\ No newline at end of file
+    screen.clear()
@@ -3,7 +3,7 @@ Declares the Menu class which allows to instantiate a menu object which can whet
 the user selected or perform actions as consequence of the input.
 """
 
-__all__ = ["Menu", "MenuInterrupt"]
+__all__ = ["Menu", "MenuInterrupt", "ActionTiming", "BatchReport"]
 
 __author__ = "Valerio Molinari"
 __credits__ = "Valerio Molinari"
@@ -11,8 +11,13 @@ __maintainer__ = "Valerio Molinari"
 __email__ = "valeriomolinariprogrammazione@gmail.com"
 
 import os
-from typing import *
-from rizlib.terminal.text.colors import *
+import re
+from dataclasses import dataclass, field
+from time import perf_counter_ns
+from typing import Any, Iterable, Iterator, Optional, TextIO, Union
+from rizlib.documentation.types import PathHint
+from rizlib.terminal.interface.screen import Screen
+from rizlib.terminal.text.colors import colored, cyan
 from rizlib.terminal.text.stdin import Stdin
 
 
@@ -20,6 +25,85 @@ class MenuInterrupt(Exception):
     """Raised when user types exit char"""
 
 
+@dataclass(slots=True)
+class ActionTiming:
+    """How long the choices of a menu item took during a batch run, see :meth:`Menu.run_batch`
+
+    Args:
+        text: the text of the menu item
+        count: the number of times the item was chosen
+        total_ns: the time spent in the action, in nanoseconds
+        min_ns: the fastest call
+        max_ns: the slowest call
+    """
+    text: str
+    count: int = 0
+    total_ns: int = 0
+    min_ns: int = 0
+    max_ns: int = 0
+
+    def add(self, ns: int) -> None:
+        if not self.count or ns < self.min_ns:
+            self.min_ns = ns
+        if ns > self.max_ns:
+            self.max_ns = ns
+        self.count += 1
+        self.total_ns += ns
+
+    @property
+    def mean_ns(self) -> float:
+        return self.total_ns / self.count if self.count else 0.0
+
+
+@dataclass
+class BatchReport:
+    """The outcome of :meth:`Menu.run_batch`
+
+    Args:
+        choices: the number of choices read from the script
+        invalid: the choices which weren't a number of the menu, skipped like the interactive menu does
+        exited: True if the script chose the exit item
+        values: the values of the chosen items of return_value menus,
+            the results of the actions otherwise
+        errors: (position in the script, exception) of the actions which raised
+        timings: the timing of every chosen item, by (menu name, item value)
+        elapsed_ns: the duration of the whole run
+    """
+    choices: int = 0
+    invalid: int = 0
+    exited: bool = False
+    values: list = field(default_factory=list)
+    errors: list[tuple[int, BaseException]] = field(default_factory=list)
+    timings: dict[Any, ActionTiming] = field(default_factory=dict)
+    elapsed_ns: int = 0
+
+    def __str__(self):
+        from rizlib.terminal.text.format import Table
+
+        table = Table(['item', 'calls', 'total ms', 'mean us', 'min us', 'max us'],
+                      align=['left', 'right', 'right', 'right', 'right', 'right'])
+        rows = [(t.text, t.count, f'{t.total_ns / 1e6:.3f}', f'{t.mean_ns / 1e3:.1f}',
+                 f'{t.min_ns / 1e3:.1f}', f'{t.max_ns / 1e3:.1f}') for t in self.timings.values()]
+        summary = (f'{self.choices} choices in {self.elapsed_ns / 1e6:.3f} ms, '
+                   f'{self.invalid} invalid, {len(self.errors)} errors'
+                   f'{", exited" if self.exited else ""}')
+        return '\n'.join([*table.render(rows), summary])
+
+
+def _script_tokens(script: Union[PathHint, TextIO, Iterable]) -> Iterator:
+    """Yields the choices of a batch script. Text scripts have whitespace separated choices,
+    anything after a # is a comment
+    """
+    if isinstance(script, (str, bytes, os.PathLike)):
+        with open(script, encoding='utf-8') as file:
+            yield from _script_tokens(file)
+    elif hasattr(script, 'read'):
+        for line in script:
+            yield from line.partition('#')[0].split()
+    else:
+        yield from script
+
+
 class Menu:
     def __init__(self,
                  name: str,
@@ -31,7 +115,8 @@ class Menu:
                  print_name: bool = True,
                  pre_text: str = '',
                  stdin: Optional[Stdin] = None,
-                 raise_ex_on_exit: bool = True
+                 raise_ex_on_exit: bool = True,
+                 page_size: Optional[int] = None
                  ) -> None:
         """This class instantiate a menu object which can whether return the value
         the user selected or perform actions as consequence of the input.
@@ -43,6 +128,12 @@ class Menu:
 
         It can also rely an the :class:`Stdin` queue to memorize multiple inputs.
 
+        Items are indexed by value, so adding, removing and looking them up doesn't depend on
+        their number. Menus with many items can be paginated: the user types n or p to move to the
+        next or previous page and /text to show only the items whose text fuzzy matches text,
+        a single / shows every item again. Like the choices, commands are single words, so that many
+        of them can be typed on one line. Choices are numbered within the shown items.
+
         :param name: the name of the menu
         :param intro_message: a message to print before the panel of menu items
         :param exit_message: the name of the exit menu item
@@ -56,9 +147,16 @@ class Menu:
         :param raise_ex_on_exit: if is False, when the user exit the menu the value None is returned
         :param stdin: an instance of Stdin queue. If passed the menu will use the queue instead of standard
             input
+        :param page_size: (optional) the number of items shown at once, which enables the page and search
+            commands
         """
         self.name = name
-        self.__items = []
+        self.__items: dict[Any, Menu.MenuItem] = {}
+        self.__ordered: Optional[list[Menu.MenuItem]] = []
+        self.__search_cache: tuple[str, list[Menu.MenuItem]] = ('', [])
+        self.__page_size = page_size
+        self.__page = 0
+        self.__query = ''
         self.__exit_message = exit_message
         self.__intro_message = intro_message
         self.__return_value = return_value
@@ -67,6 +165,7 @@ class Menu:
         self.__pre_text = pre_text
         self.__stdin = stdin
         self.__raise_ex_on_exit = raise_ex_on_exit
+        self.__screen = Screen()
 
     class MenuItem:
         def __init__(self, value: Any, text: str, action: callable, *args, **kwargs):
@@ -95,6 +194,7 @@ class Menu:
         """Adds a new menu item.
 
         If the menu's return_value is not required, a function must be passed to this item.
+        An item with the same value is replaced, keeping its position.
 
         :param value: can be any type of value, it will be returned if the menu's return_value
             flag is set to True
@@ -105,7 +205,13 @@ class Menu:
         """
         if not self.__return_value and action is None:
             raise TypeError("add_item() requires an action function when return_value it's False")
-        self.__items.append(self.MenuItem(value, text, action, *args, **kwargs))
+        item = self.MenuItem(value, text, action, *args, **kwargs)
+        if self.__ordered is not None and value not in self.__items:
+            self.__ordered.append(item)
+        else:
+            self.__ordered = None
+        self.__items[value] = item
+        self.__search_cache = ('', [])
         return self
 
     def remove_item(self, value: Union[str, int]) -> 'Menu':
@@ -113,11 +219,83 @@ class Menu:
 
         :param value: the value of the item
         """
-        delis = (i for i, option in enumerate(self.__items) if option.value == value)
-        for deli in delis:
-            del self.__items[deli]
+        if self.__items.pop(value, None) is not None:
+            self.__ordered = None
+            self.__search_cache = ('', [])
         return self
 
+    def get_item(self, value: Any) -> 'Menu.MenuItem':
+        """Returns the item with the given value
+
+        :raises KeyError: if there isn't such an item
+        """
+        return self.__items[value]
+
+    def __contains__(self, value: Any) -> bool:
+        return value in self.__items
+
+    def __len__(self) -> int:
+        return len(self.__items)
+
+    def __item_list(self) -> list['Menu.MenuItem']:
+        # rebuilt after a removal, which would otherwise cost a scan of the list
+        if self.__ordered is None:
+            self.__ordered = list(self.__items.values())
+        return self.__ordered
+
+    def search(self, query: str) -> list['Menu.MenuItem']:
+        """Returns the items whose text contains the characters of query in the same order,
+        ignoring the case, e.g. "mnu" matches "Main menu".
+
+        The last result is kept, so a query extending the previous one only scans its matches:
+        typing a query character by character stays fast on large menus.
+
+        :param query: the text to look for, an empty query matches every item
+        """
+        if not query:
+            return self.__item_list()
+        previous, matches = self.__search_cache
+        candidates = matches if previous and query.startswith(previous) else self.__item_list()
+        # "abc" becomes a[^b]*b[^c]*c, which matches like a.*?b.*?c without backtracking
+        pattern = re.escape(query[0]) + ''.join(f'[^{re.escape(c)}]*{re.escape(c)}' for c in query[1:])
+        pattern = re.compile(pattern, re.IGNORECASE)
+        matches = [item for item in candidates if pattern.search(item.text)]
+        self.__search_cache = (query, matches)
+        return matches
+
+    def __frame(self, view: list['Menu.MenuItem']) -> list[str]:
+        lines = [self.__pre_text] if self.__pre_text else []
+        lines.append(f'{self.__intro_message}:')
+        first, last = 0, len(view)
+        if self.__page_size is not None:
+            pages = max(1, -(-len(view) // self.__page_size))
+            self.__page = min(self.__page, pages - 1)
+            first = self.__page * self.__page_size
+            last = min(first + self.__page_size, len(view))
+        lines.extend(f'\t{i}. {view[i - 1].text}' for i in range(first + 1, last + 1))
+        lines.append(f'\t{len(view) + 1}. {self.__exit_message}')
+        if self.__page_size is not None:
+            search = f', search "{self.__query}"' if self.__query else ''
+            lines.append(f'Page {self.__page + 1}/{pages}{search} (n: next, p: previous, /text: search)')
+        return lines
+
+    def __command(self, answer: str) -> bool:
+        """Runs a page or search command
+
+        :return: whether answer was a command
+        """
+        answer = answer.strip()
+        if answer == 'n':
+            self.__page += 1
+        elif answer == 'p':
+            self.__page = max(0, self.__page - 1)
+        elif answer.startswith('/'):
+            self.__query = answer[1:]
+            self.__page = 0
+        else:
+            return False
+        return True
+
     def start(self) -> Any:
         """Shows the menu to the user.
 
@@ -126,31 +304,47 @@ class Menu:
             the item will be called
         :raises MenuInterrupt: when users types exit char
         """
-        user_choice = 0
-        while user_choice != len(self.__items) + 1:
+        paginated = self.__page_size is not None
+        while True:
+            view = self.search(self.__query) if paginated else self.__item_list()
+            exit_choice = len(view) + 1
+            lines = self.__frame(view)
             if self.__auto_clean:
-                os.system('clear')
-            if self.__print_name:
-                cyan(self.name + '\n')
-            menu = self.__pre_text + '\n' if self.__pre_text else ''
-            menu += f'{self.__intro_message}:\n'
-            for i, choice in enumerate(self.__items):
-                menu += f'\t{i + 1}. {choice.text}\n'
-            menu += f'\t{len(self.__items) + 1}. {self.__exit_message}'
-            user_choice = self.__stdin(int, menu) if self.__stdin is not None else input(menu + '\n> ')
+                # the whole frame is drawn in-process, rewriting only the lines which changed
+                if self.__print_name:
+                    lines[:0] = [colored(self.name, 'cyan'), '']
+                self.__screen.render(lines)
+                menu = ''
+                prefix = '> '
+            else:
+                if self.__print_name:
+                    cyan(self.name + '\n')
+                menu = '\n'.join(lines)
+                prefix = '\n> '
+            if self.__stdin is None:
+                user_choice = input(menu + prefix)
+            elif paginated:
+                # one word at a time, like the numeric choices, so that the rest of the line stays queued
+                user_choice = self.__stdin(str, menu, sequence_len=1, prefix=prefix)
+            else:
+                user_choice = self.__stdin(int, menu, prefix=prefix)
+            if paginated and self.__command(str(user_choice)):
+                continue
             try:
                 user_choice = int(user_choice)
-                if user_choice < 1 or user_choice > len(self.__items) + 1:
+                if user_choice < 1 or user_choice > exit_choice:
                     raise ValueError
             except ValueError:
                 continue
 
-            if user_choice != len(self.__items) + 1:
-                item = self.__items[user_choice - 1]
+            if user_choice != exit_choice:
+                item = view[user_choice - 1]
                 if self.__return_value:
                     return item.value
                 else:
                     item.action(*item.args, **item.kwargs)
+                    # the action may have printed over the menu
+                    self.__screen.invalidate()
             else:
                 if self.__raise_ex_on_exit:
                     raise MenuInterrupt
@@ -160,13 +354,85 @@ class Menu:
     def __call__(self) -> Any:
         return self.start()
 
+    def run_batch(self, script: Union[PathHint, TextIO, Iterable], *, stop_on_error: bool = False) -> BatchReport:
+        """Runs the menu headlessly on a script of choices: nothing is printed, the screen is never
+        cleared and nothing is read from the user or from the Stdin queue.
+
+        Every choice is the number the user would type. Items of return_value menus are collected
+        into the values of the report instead of returning at the first choice, actions are called
+        and timed. The run stops at the exit choice or at the end of the script.
+
+        If the action of an item is another menu, or its start method, that menu runs headlessly
+        on the same script until its own exit choice, and its timings are merged in the report.
+
+        :param script: a path or a text stream with whitespace separated choices, where # starts a comment,
+            or an iterable of choices as numbers or strings
+        :param stop_on_error: if True, the first exception raised by an action is raised again,
+            otherwise it's recorded in the report and the run goes on
+        :return: the per action timings and the outcome of the run
+        """
+        report = BatchReport()
+        start = perf_counter_ns()
+        try:
+            self.__run_batch(_script_tokens(script), report, stop_on_error)
+        finally:
+            report.elapsed_ns = perf_counter_ns() - start
+        return report
+
+    def __run_batch(self, tokens: Iterator, report: BatchReport, stop_on_error: bool) -> None:
+        items = self.__item_list()
+        exit_choice = len(items) + 1
+        timings = report.timings
+        for token in tokens:
+            report.choices += 1
+            try:
+                choice = int(token)
+            except (TypeError, ValueError):
+                report.invalid += 1
+                continue
+            if choice == exit_choice:
+                report.exited = True
+                return
+            if not 1 <= choice < exit_choice:
+                report.invalid += 1
+                continue
+
+            item = items[choice - 1]
+            if self.__return_value:
+                report.values.append(item.value)
+                continue
+
+            action = item.action
+            submenu = action if isinstance(action, Menu) else getattr(action, '__self__', None)
+            if getattr(action, '__func__', None) not in (None, Menu.start, Menu.__call__):
+                submenu = None
+            position = report.choices
+            start = perf_counter_ns()
+            try:
+                if isinstance(submenu, Menu) and not item.args and not item.kwargs:
+                    submenu.__run_batch(tokens, report, stop_on_error)
+                    report.exited = False
+                else:
+                    report.values.append(action(*item.args, **item.kwargs))
+            except Exception as e:
+                if stop_on_error:
+                    raise
+                report.errors.append((position, e))
+            finally:
+                elapsed = perf_counter_ns() - start
+                key = self.name, item.value
+                timing = timings.get(key)
+                if timing is None:
+                    timing = timings[key] = ActionTiming(item.text)
+                timing.add(elapsed)
+
     @property
     def cases(self):
-        return '\n'.join(map(str, self.__items))
+        return '\n'.join(map(str, self.__items.values()))
 
     @property
     def items(self):
-        return self.__items
+        return list(self.__items.values())
 
     @property
     def auto_clean(self):
@@ -1,4 +1,4 @@
-from collections import Callable
+from typing import Callable
 
 
 def confirm(prompt: str, color: Callable = lambda s: s) -> bool:
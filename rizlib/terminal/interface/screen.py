@@ -0,0 +1,133 @@
+"""
+Declares the Screen class, which draws full screen frames on the terminal with ANSI escape sequences,
+without spawning a clear process.
+
+A Screen remembers the last frame it drew and only rewrites the lines which changed, so an
+interface can redraw many times per second.
+
+Example:
+    screen = Screen()
+    for i in range(100):
+        screen.render(['Downloading', f'{i}%'])     # only the second line is written again
+"""
+
+__all__ = ["Screen", "clear", "CLEAR", "HOME", "ERASE_LINE", "ERASE_BELOW", "move_to"]
+
+__author__ = "Valerio Molinari"
+__credits__ = "Valerio Molinari"
+__maintainer__ = "Valerio Molinari"
+__email__ = "valeriomolinariprogrammazione@gmail.com"
+
+import os
+import sys
+from typing import Iterable, Optional, TextIO, Union
+from rizlib.terminal.text.format import display_width
+
+HOME = '\x1b[H'
+ERASE_LINE = '\x1b[K'
+ERASE_BELOW = '\x1b[J'
+CLEAR = HOME + '\x1b[2J'
+CLEAR_SCROLLBACK = '\x1b[3J'
+HIDE_CURSOR = '\x1b[?25l'
+SHOW_CURSOR = '\x1b[?25h'
+
+
+def move_to(row: int, column: int = 1) -> str:
+    """Returns the escape sequence moving the cursor, rows and columns start from 1"""
+    return f'\x1b[{row};{column}H'
+
+
+def clear(stream: Optional[TextIO] = None, scrollback: bool = True) -> None:
+    """Clears the screen and moves the cursor to the top left corner, like the clear command
+
+    :param stream: the terminal stream, the current sys.stdout by default
+    :param scrollback: if True, the lines scrolled out of the screen are erased too
+    """
+    stream = stream if stream is not None else sys.stdout
+    stream.write(CLEAR + CLEAR_SCROLLBACK if scrollback else CLEAR)
+    stream.flush()
+
+
+class Screen:
+    def __init__(self, stream: Optional[TextIO] = None) -> None:
+        """Draws frames on the whole terminal screen, starting from the top left corner.
+
+        The first frame clears the screen, then only the lines which differ from the previous frame
+        are rewritten, in a single write. After a frame the cursor is left on the line below it,
+        so a prompt can follow. Anything printed below the frame is erased by the next one.
+
+        If something else draws over the frame, call invalidate so that the next frame is drawn
+        from scratch. Frames taller or wider than the terminal are always drawn from scratch, because
+        the terminal scrolls or wraps them. When the stream isn't a terminal, frames are just printed.
+
+        :param stream: the stream to draw to, the current sys.stdout by default
+        """
+        self.stream = stream
+        self.__lines: Optional[list[str]] = None
+
+    @property
+    def lines(self) -> Optional[list[str]]:
+        """The lines currently on the screen, None if unknown"""
+        return self.__lines
+
+    def invalidate(self) -> None:
+        """Forgets the previous frame, the next one will clear the screen"""
+        self.__lines = None
+
+    def clear(self) -> None:
+        """Clears the screen"""
+        clear(self.__stream())
+        self.__lines = []
+
+    def __stream(self) -> TextIO:
+        return self.stream if self.stream is not None else sys.stdout
+
+    def render(self, frame: Union[str, Iterable[str]]) -> int:
+        """Draws a frame
+
+        :param frame: a string or its lines
+        :return: the number of lines written
+        """
+        lines = (frame if isinstance(frame, str) else '\n'.join(frame)).split('\n')
+        stream = self.__stream()
+        try:
+            terminal = stream.isatty()
+        except (AttributeError, ValueError):
+            terminal = False
+        if not terminal:
+            stream.write('\n'.join(lines) + '\n')
+            stream.flush()
+            return len(lines)
+
+        # os and not shutil, which imports the compression modules
+        try:
+            columns, rows = os.get_terminal_size(stream.fileno())
+        except (AttributeError, ValueError, OSError):
+            columns, rows = 80, 24
+        fits = len(lines) < rows and all(display_width(line) <= columns for line in lines)
+        previous = self.__lines
+        if previous is None or not fits:
+            out = [CLEAR, '\n'.join(lines), '\n']
+            written = len(lines)
+        else:
+            out = [HIDE_CURSOR]
+            written = 0
+            for i, line in enumerate(lines):
+                if i >= len(previous) or previous[i] != line:
+                    out.append(move_to(i + 1) + line + ERASE_LINE)
+                    written += 1
+            out.append(move_to(len(lines) + 1) + ERASE_BELOW + SHOW_CURSOR)
+
+        self.__lines = lines if fits else None
+        stream.write(''.join(out))
+        stream.flush()
+        return written
+
+
+if __name__ == '__main__':
+    from time import sleep
+
+    screen = Screen()
+    for i in range(101):
+        screen.render(['Screen demo', '', f'progress: {i}%', '#' * (i // 4)])
+        sleep(.02)
@@ -0,0 +1,47 @@
+from rizlib.tools.lazy import lazy_exports
+
+_COLORS = ['red', 'green', 'yellow', 'blue', 'magenta', 'cyan', 'white']
+
+__getattr__, __dir__, __all__ = lazy_exports(__name__, globals(), {
+    **{f'{prefix}{color}': 'colors' for prefix in ('', 'b_', 'c_', 'cb_') for color in _COLORS},
+    'colored': 'colors',
+    'set_color_mode': 'colors',
+    'color_enabled': 'colors',
+    'style_prefix': 'colors',
+    'human_join': 'format',
+    'indent_lines': 'format',
+    'spaced': 'format',
+    'Table': 'format',
+    'display_width': 'format',
+    'strip_ansi': 'format',
+    'truncate': 'format',
+    'pad': 'format',
+    'Silence': 'logs',
+    'Level': 'logs',
+    'debug': 'logs',
+    'info': 'logs',
+    'success': 'logs',
+    'warning': 'logs',
+    'error': 'logs',
+    'set_level': 'logs',
+    'set_policy': 'logs',
+    'LogPolicy': 'log_policy',
+    'add_sink': 'logs',
+    'set_sinks': 'logs',
+    'ConsoleSink': 'log_sinks',
+    'JSONLinesSink': 'log_sinks',
+    'RingBufferSink': 'log_sinks',
+    'LoggingSink': 'log_sinks',
+    'typewrite': 'print_tools',
+    'Animator': 'animation',
+    'Typewriter': 'animation',
+    'Spinner': 'animation',
+    'ProgressBar': 'animation',
+    'spinner': 'animation',
+    'progress': 'animation',
+    'track': 'animation',
+    'Stdin': 'stdin',
+    'BulkStdin': 'stdin',
+    'StyledWriter': 'writer',
+}, submodules=['animation', 'colors', 'format', 'log_bridge', 'log_policy', 'log_sinks', 'logs', 'print_tools',
+              'stdin', 'writer'])
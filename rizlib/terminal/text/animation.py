@@ -0,0 +1,345 @@
+"""
+Provides terminal animations: typewriter texts, spinners and progress bars.
+
+Every widget is drawn by a single background thread, at a fixed frame rate, so the code doing the
+work never sleeps nor writes: updating a progress bar is just a counter increment. All the live
+widgets are redrawn together with a single write per frame, below what has already been printed.
+
+Example:
+    with progress(total=len(rows), text='rows') as bar:
+        for row in rows:
+            process(row)
+            bar.advance()
+
+    for page in track(pages, text='pages'):
+        scrape(page)
+
+    with spinner('connecting'):
+        connect()
+
+When the stream isn't a terminal, widgets are only printed once, when they're done.
+"""
+
+__all__ = ["Animator", "Widget", "Typewriter", "Spinner", "ProgressBar", "spinner", "progress", "track",
+           "get_animator"]
+
+__author__ = "Valerio Molinari"
+__credits__ = "Valerio Molinari"
+__maintainer__ = "Valerio Molinari"
+__email__ = "valeriomolinariprogrammazione@gmail.com"
+
+import os
+import sys
+import threading
+from time import monotonic
+from typing import Iterable, Iterator, Optional, Sequence, TextIO, TypeVar
+from rizlib.terminal.text.format import truncate
+
+T = TypeVar('T')
+
+
+class Widget:
+    """Base class of the animated widgets. Subclasses implement render, and set done when finished"""
+
+    def __init__(self) -> None:
+        self.done = False
+        self.started = monotonic()
+        self.__finished = threading.Event()
+        self._animator: Optional['Animator'] = None
+
+    def render(self, now: float) -> str:
+        """Returns the line showing the widget at the time now, as returned by time.monotonic"""
+        raise NotImplementedError
+
+    def final(self) -> str:
+        """Returns the text printed when the widget is done, which stays on the screen"""
+        return self.render(monotonic()) + '\n'
+
+    def finish(self) -> None:
+        """Marks the widget as done, it's printed for the last time by the next frame"""
+        self.done = True
+        if self._animator is not None:
+            self._animator.wake()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Waits until the widget has been printed for the last time
+
+        :return: False if the timeout expired
+        """
+        return self.__finished.wait(timeout)
+
+    def _printed(self) -> None:
+        self.__finished.set()
+
+    def __enter__(self):
+        if self._animator is None:
+            get_animator().add(self)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.finish()
+        self.wait(1)
+
+
+class Typewriter(Widget):
+    def __init__(self, text: str, interval: float = .05, end: str = '\n') -> None:
+        """Shows a text one character at a time
+
+        :param text: the text to write
+        :param interval: the seconds between two characters
+        :param end: printed after the text
+        """
+        super().__init__()
+        self.text = text
+        self.interval = interval
+        self.end = end
+
+    def render(self, now: float) -> str:
+        shown = int((now - self.started) / self.interval) + 1 if self.interval > 0 else len(self.text)
+        if shown >= len(self.text):
+            self.done = True
+        return self.text[:shown]
+
+    def final(self) -> str:
+        return self.text + self.end
+
+
+class Spinner(Widget):
+    FRAMES = '⠋⠙⠹⠸⠼⠴⠦⠧⠇⠏'
+
+    def __init__(self, text: str = '', frames: Sequence[str] = FRAMES, interval: float = .08,
+                 done_text: str = '✓') -> None:
+        """Shows a spinning symbol before a text, until finish is called
+
+        :param text: the text after the spinner, it can be changed while spinning
+        :param frames: the symbols shown in turn
+        :param interval: the seconds each symbol is shown
+        :param done_text: shown instead of the spinner when done
+        """
+        super().__init__()
+        self.text = text
+        self.frames = frames
+        self.interval = interval
+        self.done_text = done_text
+
+    def render(self, now: float) -> str:
+        if self.done:
+            return f'{self.done_text} {self.text}'
+        frame = self.frames[int((now - self.started) / self.interval) % len(self.frames)]
+        return f'{frame} {self.text}'
+
+
+def _duration(seconds: float) -> str:
+    seconds = int(seconds)
+    hours, seconds = divmod(seconds, 3600)
+    minutes, seconds = divmod(seconds, 60)
+    return f'{hours}:{minutes:02}:{seconds:02}' if hours else f'{minutes:02}:{seconds:02}'
+
+
+class ProgressBar(Widget):
+    def __init__(self, total: Optional[int] = None, text: str = '', *, width: int = 30, unit: str = 'it',
+                 smoothing: float = .3) -> None:
+        """Shows the progress of a task, its throughput and the estimated time left, e.g.
+        rows  ████████████░░░░░░░░░░░░░░░░░░  40%  4000/10000  1250.0 rows/s  ETA 00:04
+
+        Calling advance only increments a counter, the bar is computed by the animator thread.
+        Advancing the same bar from many threads may lose some increments, use a bar per thread.
+
+        :param total: the number of steps of the task, if None only the count and the throughput are shown
+        :param text: the text before the bar
+        :param width: the number of characters of the bar
+        :param unit: the name of a step
+        :param smoothing: the weight of the last frame in the throughput, between 0 and 1
+        """
+        super().__init__()
+        self.total = total
+        self.text = text
+        self.width = width
+        self.unit = unit
+        self.smoothing = smoothing
+        self.count = 0
+        self.__rate: Optional[float] = None
+        self.__last = (self.started, 0)
+
+    def advance(self, n: int = 1) -> None:
+        """Adds n completed steps"""
+        self.count += n
+
+    def __throughput(self, now: float) -> float:
+        last_time, last_count = self.__last
+        if now - last_time < .05:
+            return self.__rate or 0.
+        rate = (self.count - last_count) / (now - last_time)
+        self.__rate = rate if self.__rate is None else self.smoothing * rate + (1 - self.smoothing) * self.__rate
+        self.__last = (now, self.count)
+        return self.__rate
+
+    def render(self, now: float) -> str:
+        count = self.count
+        parts = [self.text] if self.text else []
+        if self.done:
+            elapsed = now - self.started
+            rate = count / elapsed if elapsed > 0 else 0.
+        else:
+            rate = self.__throughput(now)
+        if self.total:
+            ratio = min(count / self.total, 1.)
+            filled = int(ratio * self.width)
+            parts.append('█' * filled + '░' * (self.width - filled))
+            parts.append(f'{ratio:4.0%}')
+            parts.append(f'{count}/{self.total}')
+        else:
+            parts.append(str(count))
+        parts.append(f'{rate:.1f} {self.unit}/s')
+        if self.done:
+            parts.append(_duration(now - self.started))
+        elif self.total and rate > 0:
+            parts.append(f'ETA {_duration(max(self.total - count, 0) / rate)}')
+        return '  '.join(parts)
+
+
+class Animator:
+    def __init__(self, stream: Optional[TextIO] = None, fps: float = 20) -> None:
+        """Draws widgets from a background thread, which runs only while there are widgets to draw.
+
+        Every frame moves the cursor back to the first line of the live widgets, prints the widgets
+        which are done so that they stay on the screen and redraws the others, in a single write.
+        The animator only knows how many lines it drew itself: text printed on the same stream while
+        widgets are live, e.g. by the main thread, shifts them down and the next frame overwrites the
+        wrong lines, so print only after the widgets are done.
+
+        :param stream: the stream to draw to, the current sys.stdout by default
+        :param fps: the frames per second
+        """
+        self.stream = stream
+        self.fps = fps
+        self.__widgets: list[Widget] = []
+        self.__lock = threading.Lock()
+        self.__wakeup = threading.Event()
+        self.__thread: Optional[threading.Thread] = None
+        self.__drawn = 0
+
+    def add(self, widget: Widget) -> Widget:
+        """Starts drawing a widget
+
+        :return: the widget
+        """
+        widget._animator = self
+        with self.__lock:
+            self.__widgets.append(widget)
+            if self.__thread is None:
+                self.__thread = threading.Thread(target=self.__run, name='rizlib-animator', daemon=True)
+                self.__thread.start()
+        return widget
+
+    def wake(self) -> None:
+        """Draws the next frame immediately"""
+        self.__wakeup.set()
+
+    def __run(self) -> None:
+        while True:
+            self.__wakeup.wait(1 / self.fps)
+            self.__wakeup.clear()
+            with self.__lock:
+                try:
+                    self.frame()
+                except Exception as e:  # a broken stream must not leave the widgets waiting forever
+                    print(f'rizlib animator: {e!r}', file=sys.stderr)
+                    for widget in self.__widgets:
+                        widget._printed()
+                    self.__widgets.clear()
+                if not self.__widgets:
+                    self.__thread = None
+                    return
+
+    def frame(self) -> None:
+        """Draws a frame, it's called by the animator thread"""
+        stream = self.stream if self.stream is not None else sys.stdout
+        try:
+            terminal = stream.isatty()
+        except (AttributeError, ValueError):
+            terminal = False
+
+        now = monotonic()
+        # os and not shutil, which imports the compression modules, and the widgets' own stream
+        try:
+            columns = os.get_terminal_size(stream.fileno()).columns - 1
+        except (AttributeError, ValueError, OSError):
+            columns = 79
+        out = [f'\r\x1b[{self.__drawn}A\x1b[J'] if terminal and self.__drawn else []
+        live = []
+        finished = []
+        drawn = 0
+        for widget in self.__widgets:
+            line = widget.render(now)
+            if widget.done:
+                out.append(widget.final())
+                finished.append(widget)
+            elif terminal:
+                # the frame of a widget can span many lines, e.g. a typewriter writing a newline,
+                # and a wrapped line would break the count of the lines to go back to
+                lines = line.split('\n')
+                out.extend(truncate(line, columns) + '\n' for line in lines)
+                drawn += len(lines)
+                live.append(widget)
+            else:
+                live.append(widget)
+
+        self.__widgets = live
+        self.__drawn = drawn
+        if out:
+            stream.write(''.join(out))
+            stream.flush()
+        for widget in finished:
+            widget._printed()
+
+
+_animator: Optional[Animator] = None
+
+
+def get_animator() -> Animator:
+    """Returns the animator used by the widgets which aren't added to one explicitly"""
+    global _animator
+    if _animator is None:
+        _animator = Animator()
+    return _animator
+
+
+def spinner(text: str = '', **kwargs) -> Spinner:
+    """Starts a :class:`Spinner`, to be used as a context manager or stopped with finish"""
+    return get_animator().add(Spinner(text, **kwargs))
+
+
+def progress(total: Optional[int] = None, text: str = '', **kwargs) -> ProgressBar:
+    """Starts a :class:`ProgressBar`, to be used as a context manager or stopped with finish"""
+    return get_animator().add(ProgressBar(total, text, **kwargs))
+
+
+def track(iterable: Iterable[T], total: Optional[int] = None, text: str = '', **kwargs) -> Iterator[T]:
+    """Iterates over iterable showing a :class:`ProgressBar`
+
+    :param iterable: the items to iterate over
+    :param total: the number of items, len(iterable) by default if it's available
+    :param text: the text before the bar
+    :param kwargs: other arguments for ProgressBar
+    """
+    if total is None:
+        try:
+            total = len(iterable)
+        except TypeError:
+            pass
+    with progress(total, text, **kwargs) as bar:
+        for item in iterable:
+            yield item
+            bar.count += 1
+
+
+if __name__ == '__main__':
+    from time import sleep
+
+    with spinner('loading') as s, progress(2000, 'rows', unit='rows') as bar:
+        for _ in range(2000):
+            sleep(.001)
+            bar.advance()
+        s.text = 'loaded'
+    get_animator().add(Typewriter('Typewriter', .1)).wait()
@@ -11,9 +11,13 @@ The functions used to return colored text start with a c_.
 The functions used to return or print bold colored text
 start with a b_ if they print, with with cb_ if they return.
 
-There's also a chance of passing some additional keyword arguments to the c_ function
-as required by the colored function in the module termcolor. Available arguments are
-dark, underline, blink, reverse, concealed.
+There's also a chance of passing some additional keyword arguments to the c_ function:
+attrs, a list of attributes among bold, dark, underline, blink, reverse, concealed,
+which are added to the ones of the function, and on_color, a background like 'on_blue'.
+
+Escape sequences are precomputed for every color and attribute combination and
+colors are disabled when the output is not a terminal or the NO_COLOR environment variable
+is set (FORCE_COLOR forces them), see :func:`set_color_mode`.
 
 Example:
     blue("Hello World")     will print a blue string;
@@ -32,7 +36,7 @@ __all__ = ['b_blue', 'b_cyan', 'b_green', 'b_magenta', 'b_red', 'b_white', 'b_ye
            'blue', 'c_blue', 'c_cyan', 'c_green', 'c_magenta', 'c_red', 'c_white',
            'c_yellow', 'cb_blue', 'cb_cyan', 'cb_green', 'cb_magenta', 'cb_red',
            'cb_white', 'cb_yellow', 'colored', 'cyan', 'green', 'magenta',
-           'red', 'white', 'yellow'
+           'red', 'white', 'yellow', 'set_color_mode', 'color_enabled', 'style_prefix', 'RESET'
            ]
 
 __author__ = "Valerio Molinari"
@@ -40,39 +44,158 @@ __credits__ = "Valerio Molinari"
 __maintainer__ = "Valerio Molinari"
 __email__ = "valeriomolinariprogrammazione@gmail.com"
 
-from termcolor import colored
+import os
+import sys
+from itertools import combinations
+from typing import Iterable, Literal, Optional, TextIO
+from rizlib.tools.decorators import copy_func_attrs_in_wrapper
+
+COLORS = {'grey': 30, 'black': 30, 'red': 31, 'green': 32, 'yellow': 33,
+          'blue': 34, 'magenta': 35, 'cyan': 36, 'white': 37}
+HIGHLIGHTS = {f'on_{color}': code + 10 for color, code in COLORS.items()}
+ATTRIBUTES = {'bold': 1, 'dark': 2, 'underline': 4, 'blink': 5, 'reverse': 7, 'concealed': 8}
+RESET = '\033[0m'
+
+
+def _build_prefix(color: Optional[str], on_color: Optional[str], attrs: frozenset) -> str:
+    try:
+        codes = [ATTRIBUTES[a] for a in sorted(attrs, key=ATTRIBUTES.__getitem__)]
+        if on_color is not None:
+            codes.append(HIGHLIGHTS[on_color])
+        if color is not None:
+            codes.append(COLORS[color])
+    except KeyError as e:
+        raise ValueError(f"unknown color or attribute {e.args[0]!r}") from None
+    return f"\033[{';'.join(map(str, codes))}m" if codes else ''
+
+
+# every color and attribute combination is computed once, backgrounds are added on first use
+_PREFIXES: dict[tuple[Optional[str], Optional[str], frozenset], str] = {
+    (color, None, frozenset(attrs)): _build_prefix(color, None, frozenset(attrs))
+    for color in (None, *COLORS)
+    for n in range(len(ATTRIBUTES) + 1)
+    for attrs in combinations(ATTRIBUTES, n)
+}
+
+
+def style_prefix(color: Optional[str], on_color: Optional[str] = None, attrs: Iterable[str] = ()) -> str:
+    """Returns the escape sequence which starts a style, the text is closed by RESET.
+    The sequences are precomputed or cached, so it's only a dictionary lookup.
+
+    :param color: a text color, e.g. 'red', or None
+    :param on_color: a background, e.g. 'on_blue', or None
+    :param attrs: attributes among bold, dark, underline, blink, reverse, concealed
+    """
+    key = color, on_color, attrs if isinstance(attrs, frozenset) else frozenset(attrs)
+    try:
+        return _PREFIXES[key]
+    except KeyError:
+        prefix = _PREFIXES[key] = _build_prefix(*key)
+        return prefix
+
+
+def _mode_from_env() -> str:
+    if os.getenv('NO_COLOR') or os.getenv('ANSI_COLORS_DISABLED'):
+        return 'never'
+    if os.getenv('FORCE_COLOR'):
+        return 'always'
+    return 'auto'
+
+
+_mode = _mode_from_env()
+_tty_cache: tuple[Optional[TextIO], bool] = (None, False)
+
+
+def set_color_mode(mode: Optional[Literal['auto', 'always', 'never']] = None) -> None:
+    """Sets when colors are used.
+
+    :param mode: 'always', 'never' or 'auto' which colors only the output going to a terminal.
+        If None, the mode is read again from the NO_COLOR and FORCE_COLOR environment variables
+    """
+    global _mode
+    if mode not in (None, 'auto', 'always', 'never'):
+        raise ValueError(f"unknown color mode {mode!r}")
+    _mode = mode if mode is not None else _mode_from_env()
+
+
+def color_enabled(stream: Optional[TextIO] = None) -> bool:
+    """Returns whether the text written to stream, stdout by default, must be colored,
+    according to the color mode, see :func:`set_color_mode`"""
+    global _tty_cache
+    if _mode != 'auto':
+        return _mode == 'always'
+    if stream is None:
+        stream = sys.stdout
+    cached_stream, cached = _tty_cache
+    if stream is cached_stream:
+        return cached
+    try:
+        tty = stream.isatty()
+    except (AttributeError, ValueError):
+        tty = False
+    _tty_cache = stream, tty
+    return tty
+
+
+def _style(prefix: str, args: Iterable, sep: str = ' ') -> str:
+    """Colors every arg and joins them in one pass"""
+    return prefix + (RESET + sep + prefix).join(map(str, args)) + RESET
+
+
+def colored(text: str,
+            color: Optional[str] = None,
+            on_color: Optional[str] = None,
+            attrs: Optional[Iterable[str]] = None) -> str:
+    """Colors a text, compatible with termcolor.colored
+
+    :param text: the text to color
+    :param color: one of red, green, yellow, blue, magenta, cyan, white, grey
+    :param on_color: a background, one of the colors prefixed with on_
+    :param attrs: a list of attributes among bold, dark, underline, blink, reverse, concealed
+    :return: the colored text
+    """
+    if not color_enabled():
+        return text
+    prefix = style_prefix(color, on_color, attrs or ())
+    return prefix + text + RESET if prefix else text
 
 
 def text_color(attrs=None):
-    if attrs is None:
-        attrs = {"attrs": []}
+    base = frozenset(attrs["attrs"] if attrs is not None else ())
 
     def inner(func):
         def wrapper(*args, **kwargs):
             if not len(args):
                 return ""
             color, args, kwargs = func(*args, **kwargs)
-            attrs.update(kwargs)
-            args = map(lambda a: colored(a, color, attrs=attrs['attrs']), args)
-            return ' '.join(args)
-
-        wrapper.__doc__ = func.__doc__
+            if not color_enabled():
+                return ' '.join(map(str, args))
+            if kwargs:
+                prefix = style_prefix(color, kwargs.get('on_color'), base.union(kwargs.get('attrs', ())))
+            else:
+                prefix = style_prefix(color, None, base)
+            return _style(prefix, args)
+
+        copy_func_attrs_in_wrapper(wrapper, func)
         return wrapper
 
     return inner
 
 
 def printer(attrs=None):
-    if attrs is None:
-        attrs = []
+    base = frozenset(attrs or ())
 
     def inner(func):
         def wrapper(*args, **kwargs):
             color, args, kwargs = func(*args, **kwargs)
-            args = list(map(lambda a: colored(a, color, attrs=attrs), args))
-            print(*args, **kwargs)
-
-        wrapper.__doc__ = func.__doc__
+            if not color_enabled(kwargs.get('file')):
+                print(*args, **kwargs)
+                return
+            sep = kwargs.pop('sep', None)
+            text = _style(style_prefix(color, None, base), args, ' ' if sep is None else sep) if args else ''
+            print(text, **kwargs)
+
+        copy_func_attrs_in_wrapper(wrapper, func)
         return wrapper
 
     return inner
@@ -1,4 +1,13 @@
-from typing import Iterable, Iterator
+import re
+import sys
+import unicodedata
+from functools import lru_cache
+from itertools import chain, islice
+from typing import Any, Iterable, Iterator, Literal, Optional, Sequence, TextIO, Union
+
+ANSI_ESCAPE = re.compile(r'\x1b\[[0-9;?]*[ -/]*[@-~]')
+
+Align = Literal['left', 'right', 'center']
 
 
 def human_join(sequence: Iterable, conjunction: str = 'and'):
@@ -57,11 +66,213 @@ def spaced(sequence: list[str], extraspace: int = 0, after: bool = True) -> Iter
         str_spaces = ' ' * spaces
         return string + str_spaces if after else str_spaces + string
 
-    max_len = max(map(len, sequence))
-    spaces_sequence = map(lambda s: max_len - len(s) + extraspace, sequence)
+    widths = list(map(display_width, sequence))
+    max_len = max(widths)
+    spaces_sequence = map(lambda w: max_len - w + extraspace, widths)
     return map(lambda zipped: add_spaces(*zipped), zip(sequence, spaces_sequence))
 
 
+def strip_ansi(text: str) -> str:
+    """Removes the ANSI escape sequences, like the colors added by the c_ functions of
+    :mod:`rizlib.terminal.text.colors`, from a string
+    """
+    return ANSI_ESCAPE.sub('', text) if '\x1b' in text else text
+
+
+@lru_cache(maxsize=4096)
+def _char_width(char: str) -> int:
+    if unicodedata.combining(char) or unicodedata.category(char) in ('Mn', 'Me', 'Cf'):
+        return 0
+    return 2 if unicodedata.east_asian_width(char) in ('W', 'F') else 1
+
+
+def display_width(text: str) -> int:
+    """Returns the number of terminal columns a string takes up. ANSI escape sequences take no
+    space, wide East Asian characters take two columns and combining characters none.
+
+    Example:
+        >>> display_width(c_red('hello'))
+        5
+        >>> display_width('日本')
+        4
+
+    :param text: a string
+    :return: the display width of the string
+    """
+    if '\x1b' in text:
+        text = ANSI_ESCAPE.sub('', text)
+    if text.isascii():
+        return len(text)
+    return sum(map(_char_width, text))
+
+
+def truncate(text: str, width: int, ellipsis: str = '…') -> str:
+    """Cuts a string so that its display width is at most width, keeping its ANSI escape sequences
+
+    :param text: a string, which can contain ANSI escape sequences
+    :param width: the maximum display width
+    :param ellipsis: a string appended to the cut string, included in width
+    :return: the cut string, or the string itself if it's not wider than width
+    """
+    if display_width(text) <= width:
+        return text
+    room = width - display_width(ellipsis)
+    if room < 0:
+        return ellipsis[:max(width, 0)]
+
+    out = []
+    escaped = False
+    position = 0
+    for match in chain(ANSI_ESCAPE.finditer(text), (None,)):
+        end = match.start() if match is not None else len(text)
+        for char in text[position:end]:
+            char_width = _char_width(char) if not char.isascii() else 1
+            if char_width > room:
+                room = -1
+                break
+            room -= char_width
+            out.append(char)
+        if room < 0 or match is None:
+            break
+        out.append(match.group())
+        escaped = True
+        position = match.end()
+    return ''.join(out) + ellipsis + ('\x1b[0m' if escaped else '')
+
+
+def pad(text: str, width: int, align: Align = 'left', fill: str = ' ') -> str:
+    """Pads a string to a display width, ignoring ANSI escape sequences and counting wide characters
+
+    :param text: a string
+    :param width: the display width of the result
+    :param align: 'left', 'right' or 'center'
+    :param fill: a one column character used to pad
+    :return: the padded string, or the string itself if it's already wide enough
+    """
+    missing = width - display_width(text)
+    if missing <= 0:
+        return text
+    if align == 'left':
+        return text + fill * missing
+    if align == 'right':
+        return fill * missing + text
+    left = missing // 2
+    return fill * left + text + fill * (missing - left)
+
+
+class Table:
+    def __init__(self,
+                 headers: Optional[Sequence[str]] = None,
+                 *,
+                 align: Union[Align, Sequence[Align]] = 'left',
+                 widths: Optional[Sequence[int]] = None,
+                 sample: Optional[int] = 1000,
+                 max_width: Optional[int] = None,
+                 sep: str = '  ',
+                 header_sep: Optional[str] = '-'
+                 ) -> None:
+        """A table layout engine aware of ANSI colors and wide characters.
+
+        Column widths are computed on the headers and on the first sample rows, then the rows are
+        rendered one at a time, so that millions of rows are rendered with constant memory.
+        Cells wider than their column are truncated, and a row with more cells than the measured
+        columns raises ValueError. With sample=None every row is measured before rendering,
+        as :func:`spaced` does.
+
+        Example:
+            >>> table = Table(['name', 'score'], align=['left', 'right'])
+            >>> for line in table.render(rows):
+            ...     print(line)
+
+        :param headers: (optional) the titles of the columns
+        :param align: the alignment of every column or a sequence with the alignment of each one
+        :param widths: (optional) the display widths of the columns, which disables sampling
+        :param sample: the number of rows used to compute the column widths, None for every row
+        :param max_width: (optional) the maximum display width of a column
+        :param sep: the string between two columns
+        :param header_sep: the character of the line under the headers, None for no line
+        """
+        self.headers = [str(h) for h in headers] if headers is not None else None
+        self.align = align
+        self.widths = list(widths) if widths is not None else None
+        self.sample = sample
+        self.max_width = max_width
+        self.sep = sep
+        self.header_sep = header_sep
+
+    def __alignment(self, column: int) -> Align:
+        if isinstance(self.align, str):
+            return self.align
+        return self.align[column] if column < len(self.align) else 'left'
+
+    def __measure(self, rows: list[list[str]]) -> list[int]:
+        widths = []
+        for row in rows:
+            if len(row) > len(widths):
+                widths.extend([0] * (len(row) - len(widths)))
+            for i, cell in enumerate(row):
+                width = display_width(cell)
+                if width > widths[i]:
+                    widths[i] = width
+        if self.max_width is not None:
+            widths = [min(w, self.max_width) for w in widths]
+        return widths
+
+    def format_row(self, row: Sequence[Any], widths: Sequence[int]) -> str:
+        """Formats a single row with the given column widths
+
+        :raises ValueError: if the row has more cells than columns, e.g. a row after the sampled ones
+        """
+        if len(row) > len(widths):
+            raise ValueError(f"the row has {len(row)} cells but the table has {len(widths)} columns, "
+                             f"pass widths or a larger sample")
+        cells = []
+        last = len(widths) - 1
+        for i, width in enumerate(widths):
+            cell = truncate(str(row[i]) if i < len(row) else '', width)
+            align = self.__alignment(i)
+            # a left aligned last column isn't padded, so lines have no trailing blanks
+            cells.append(cell if i == last and align == 'left' else pad(cell, width, align))
+        return self.sep.join(cells)
+
+    def render(self, rows: Iterable[Sequence[Any]]) -> Iterator[str]:
+        """Lazily renders the rows, preceded by the headers if any
+
+        :param rows: an iterable of sequences of cells, any object is converted with str
+        :return: an iterator over the lines of the table
+        """
+        rows = iter(rows)
+        if self.widths is not None:
+            head, widths = [], self.widths
+        else:
+            head = [[str(c) for c in row] for row in (rows if self.sample is None else islice(rows, self.sample))]
+            widths = self.__measure(head + ([self.headers] if self.headers else []))
+
+        if self.headers:
+            yield self.format_row(self.headers, widths)
+            if self.header_sep:
+                yield self.sep.join(self.header_sep * w for w in widths)
+        for row in chain(head, rows):
+            yield self.format_row(row, widths)
+
+    def write(self, rows: Iterable[Sequence[Any]], file: Optional[TextIO] = None, batch: int = 1000) -> int:
+        """Renders the rows and writes them to file, batch lines at a time
+
+        :param rows: an iterable of sequences of cells
+        :param file: the stream to write to, stdout by default
+        :param batch: the number of lines written at once
+        :return: the number of lines written
+        """
+        file = file if file is not None else sys.stdout
+        lines = self.render(rows)
+        written = 0
+        while chunk := list(islice(lines, batch)):
+            file.write('\n'.join(chunk) + '\n')
+            written += len(chunk)
+        file.flush()
+        return written
+
+
 if __name__ == '__main__':
     hobbies = ['birdwatching', 'videogames', 'reading', 'jogging']
     print(' '.join(spaced(hobbies, extraspace=5)))
@@ -69,3 +280,6 @@ if __name__ == '__main__':
     for hobby in spaced(hobbies, after=False):
         print(hobby)
 
+    table = Table(['hobby', 'hours', '趣味'], align=['left', 'right', 'center'])
+    table.write([hobby, len(hobby) * 3, '日本語'] for hobby in hobbies)
+
@@ -0,0 +1,43 @@
+"""
+Provides RizlibHandler, a handler of the logging module which writes its records as rizlib logs.
+
+It's kept apart from :mod:`rizlib.terminal.text.logs` so that importing the logs doesn't import
+the logging module, use logs.capture_logging to add it to a logger.
+"""
+
+__all__ = ["RizlibHandler"]
+
+__author__ = "Valerio Molinari"
+__credits__ = "Valerio Molinari"
+__maintainer__ = "Valerio Molinari"
+__email__ = "valeriomolinariprogrammazione@gmail.com"
+
+import logging
+from rizlib.terminal.text import logs
+from rizlib.terminal.text.logs import Level, _CapturedRecord
+
+
+class RizlibHandler(logging.Handler):
+    """A logging handler which writes the records of the logging module as rizlib logs,
+    through the same pipeline, levels and colors
+    """
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if getattr(record, 'rizlib', False):
+            return
+        try:
+            levelno = record.levelno
+            if levelno >= Level.error:
+                level = Level.error
+            elif levelno >= Level.warning:
+                level = Level.warning
+            elif levelno >= Level.success:
+                level = Level.success
+            elif levelno >= Level.info:
+                level = Level.info
+            else:
+                level = Level.debug
+            if level >= logs._threshold:
+                logs._emit(_CapturedRecord(level, self.format(record), record.created))
+        except Exception:
+            self.handleError(record)
@@ -0,0 +1,193 @@
+"""
+Provides the LogPolicy class, used by :mod:`rizlib.terminal.text.logs` to sample, rate limit and
+collapse logs fired inside hot loops.
+
+Logs are grouped by key, which is the message unless a key is passed to the log function.
+
+Example:
+    set_policy(LogPolicy(rate=5, per=1.0, summary_interval=10))
+    for row in rows:
+        warning(f"row {row.id} has no date", key="missing date")
+
+    prints at most 5 "missing date" warnings per second, then every 10 seconds a line like
+    WARNING: row 97 has no date [suppressed 12000 times in the last 10s]
+
+Identical consecutive logs are printed once, followed by a line like
+    WARNING: disk almost full [repeated 999 times]
+when a different log arrives or the policy is flushed.
+"""
+
+__all__ = ["LogPolicy"]
+
+__author__ = "Valerio Molinari"
+__credits__ = "Valerio Molinari"
+__maintainer__ = "Valerio Molinari"
+__email__ = "valeriomolinariprogrammazione@gmail.com"
+
+import math
+import threading
+from collections import OrderedDict
+from time import time
+from typing import Iterable, Optional
+
+
+class _KeyState:
+    __slots__ = ('tokens', 'updated', 'seen', 'suppressed', 'last')
+
+    def __init__(self, tokens: float, updated: float) -> None:
+        self.tokens = tokens
+        self.updated = updated
+        self.seen = 0
+        self.suppressed = 0
+        self.last: Optional[object] = None
+
+
+class LogPolicy:
+    def __init__(self,
+                 *,
+                 rate: Optional[float] = None,
+                 per: float = 1.0,
+                 burst: Optional[int] = None,
+                 sample: int = 1,
+                 collapse_repeats: bool = True,
+                 summary_interval: Optional[float] = 10.0,
+                 levels: Optional[Iterable[int]] = None,
+                 max_keys: int = 10_000
+                 ) -> None:
+        """Decides which logs are written. Suppressed logs are counted and reported by periodic
+        summaries, so that nothing disappears silently.
+
+        :param rate: the maximum number of logs with the same key written every per seconds,
+            no limit if None
+        :param per: the period of rate, in seconds
+        :param burst: the number of logs with the same key which can be written at once, at least 1,
+            rate rounded up by default
+        :param sample: only one log every sample logs with the same key is written
+        :param collapse_repeats: if True, identical consecutive logs are written once and then counted
+        :param summary_interval: seconds between two summaries of the suppressed logs,
+            if None summaries are only written by flush
+        :param levels: the levels the policy applies to, every level by default
+        :param max_keys: the maximum number of keys remembered, the least recently used ones are forgotten
+            after the summary of their suppressed logs
+        """
+        if sample < 1:
+            raise ValueError("sample must be at least 1")
+        if burst is not None and burst < 1:
+            raise ValueError("burst must be at least 1")
+        self.__rate = rate / per if rate is not None else None
+        if burst is None:
+            # a log costs a whole token, so a burst lower than 1 would never allow one
+            burst = max(1, math.ceil(rate)) if rate is not None else 0
+        self.__burst = burst
+        self.__sample = sample
+        self.__collapse = collapse_repeats
+        self.__summary_interval = summary_interval
+        self.__levels = frozenset(levels) if levels is not None else None
+        self.__max_keys = max_keys
+
+        self.__lock = threading.Lock()
+        self.__keys: OrderedDict[str, _KeyState] = OrderedDict()
+        self.__last_key: Optional[str] = None
+        self.__last_record = None
+        self.__repeats = 0
+        self.__last_summary = time()
+
+    def process(self, record) -> list:
+        """Filters a record
+
+        :param record: a :class:`rizlib.terminal.text.logs.LogRecord`
+        :return: the records to write, which can be none, the record itself and summaries
+        """
+        if self.__levels is not None and record.level not in self.__levels:
+            return [record]
+
+        now = record.created
+        key = record.key if record.key is not None else record.message
+        with self.__lock:
+            out = self.__summaries(now) if self.__summary_due(now) else []
+
+            if self.__collapse and key == self.__last_key and record.message == self.__last_record.message:
+                self.__repeats += 1
+                return out
+
+            state = self.__keys.get(key)
+            if state is None:
+                if len(self.__keys) >= self.__max_keys:
+                    _, evicted = self.__keys.popitem(last=False)
+                    if evicted.suppressed:
+                        out.append(self.__summary(evicted, now))
+                state = self.__keys[key] = _KeyState(self.__burst, now)
+            else:
+                self.__keys.move_to_end(key)
+
+            state.seen += 1
+            if not self.__allowed(state, now):
+                state.suppressed += 1
+                state.last = record
+                return out
+
+            out.extend(self.__collapsed())
+            self.__last_key, self.__last_record = key, record
+            out.append(record)
+            return out
+
+    def __allowed(self, state: _KeyState, now: float) -> bool:
+        if (state.seen - 1) % self.__sample:
+            return False
+        if self.__rate is None:
+            return True
+        state.tokens = min(self.__burst, state.tokens + (now - state.updated) * self.__rate)
+        state.updated = now
+        if state.tokens < 1:
+            return False
+        state.tokens -= 1
+        return True
+
+    def __summary_due(self, now: float) -> bool:
+        return self.__summary_interval is not None and now - self.__last_summary >= self.__summary_interval
+
+    def __collapsed(self) -> list:
+        if not self.__repeats:
+            return []
+        record = self.__last_record
+        repeats, self.__repeats = self.__repeats, 0
+        return [record.replace(message=f'{record.message} [repeated {repeats} times]')]
+
+    def __summaries(self, now: float) -> list:
+        elapsed = now - self.__last_summary
+        self.__last_summary = now
+        out = self.__collapsed()
+        self.__last_key = None
+        for state in self.__keys.values():
+            if state.suppressed:
+                out.append(self.__summary(state, now, elapsed))
+        return out
+
+    def __summary(self, state: _KeyState, now: float, elapsed: Optional[float] = None):
+        if elapsed is None:
+            elapsed = now - self.__last_summary
+        message = f'{state.last.message} [suppressed {state.suppressed} times in the last {elapsed:.1f}s]'
+        state.suppressed = 0
+        return state.last.replace(message=message, created=now)
+
+    def flush(self, now: Optional[float] = None, due_only: bool = False) -> list:
+        """Returns the summaries of the suppressed and repeated logs
+
+        :param now: the current time, time.time() by default
+        :param due_only: if True, nothing is returned unless summary_interval seconds have passed
+            since the last summary
+        :return: the summary records to write
+        """
+        now = now if now is not None else time()
+        with self.__lock:
+            if due_only and not self.__summary_due(now):
+                return []
+            return self.__summaries(now)
+
+    def reset(self) -> None:
+        """Forgets every key and counter"""
+        with self.__lock:
+            self.__keys.clear()
+            self.__last_key = self.__last_record = None
+            self.__repeats = 0
+            self.__last_summary = time()
@@ -0,0 +1,283 @@
+"""
+Provides the sinks where the logs of :mod:`rizlib.terminal.text.logs` are written.
+
+Every sink receives the records in batches: one record at a time when logging synchronously,
+many records at once from the background thread started by logs.start_async.
+
+Available sinks:
+    ConsoleSink     prints colored logs to stdout, it's the default sink
+    JSONLinesSink   writes a JSON object per line to a file, rotated by size or time and optionally gzipped
+    RingBufferSink  keeps the last records in memory, to be dumped after a failure
+    LoggingSink     forwards the records to a logger of the logging module
+
+Example:
+    set_sinks([ConsoleSink(), JSONLinesSink('app.jsonl', max_bytes=50_000_000, compress=True)])
+"""
+
+__all__ = ["Sink", "ConsoleSink", "JSONLinesSink", "RingBufferSink", "LoggingSink"]
+
+__author__ = "Valerio Molinari"
+__credits__ = "Valerio Molinari"
+__maintainer__ = "Valerio Molinari"
+__email__ = "valeriomolinariprogrammazione@gmail.com"
+
+import os
+import sys
+import threading
+from collections import deque
+from time import time
+from typing import Optional, TextIO, Union
+from rizlib.documentation.types import PathHint
+from rizlib.terminal.text.colors import RESET, color_enabled, style_prefix
+
+# the modules used by the file and logging sinks are imported by them, since the logs import this module
+
+
+class Sink:
+    """Base class of the log sinks. Subclasses must implement write, flush and close are optional"""
+
+    def write(self, records: list) -> None:
+        """Writes a batch of records
+
+        :param records: a list of :class:`rizlib.terminal.text.logs.LogRecord`
+        """
+        raise NotImplementedError
+
+    def flush(self) -> None:
+        """Writes what is buffered by the sink"""
+
+    def close(self) -> None:
+        """Flushes and releases the resources of the sink"""
+        self.flush()
+
+
+class ConsoleSink(Sink):
+    STYLES = {
+        'debug': ('white', ('dark',)),
+        'info': ('blue', ()),
+        'success': ('green', ()),
+        'warning': ('yellow', ()),
+        'error': ('red', ('bold',)),
+    }
+
+    def __init__(self, stream: Optional[TextIO] = None):
+        """Prints the records as "LEVEL: message", colored if the stream is a terminal
+
+        :param stream: the stream to write to, the current sys.stdout by default
+        """
+        self.stream = stream
+
+    def _format(self, record, colored: bool) -> str:
+        level = record.level.name
+        line = f'{level.upper()}: {record.message}'
+        if colored:
+            color, attrs = self.STYLES[level]
+            return style_prefix(color, None, attrs) + line + RESET + '\n'
+        return line + '\n'
+
+    def write(self, records: list) -> None:
+        stream = self.stream if self.stream is not None else sys.stdout
+        colored = color_enabled(stream)
+        stream.write(''.join(self._format(record, colored) for record in records))
+        stream.flush()
+
+
+class JSONLinesSink(Sink):
+    def __init__(self,
+                 path: PathHint,
+                 *,
+                 max_bytes: Optional[int] = None,
+                 rotate_every: Optional[float] = None,
+                 backup_count: int = 5,
+                 compress: bool = False,
+                 buffer_size: int = 1 << 16
+                 ) -> None:
+        """Writes every record as a JSON object on its own line, e.g.
+        {"time": 1760000000.0, "level": "warning", "message": "task skipped", "key": null}
+
+        Lines are written through a buffer of buffer_size bytes, so many records cost a single
+        write. When the file grows beyond max_bytes or has been open for rotate_every seconds, it's
+        renamed adding a timestamp to its name, optionally gzipped in a background thread,
+        and a new file is started. Only the newest backup_count rotated files are kept.
+
+        :param path: the path of the log file
+        :param max_bytes: the size which triggers a rotation, no limit if None
+        :param rotate_every: the seconds since the file was opened which trigger a rotation, no limit if None
+        :param backup_count: the number of rotated files to keep
+        :param compress: if True, rotated files are gzipped
+        :param buffer_size: the size of the write buffer
+        """
+        from pathlib import Path
+
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.rotate_every = rotate_every
+        self.backup_count = backup_count
+        self.compress = compress
+        self.buffer_size = buffer_size
+        self.__lock = threading.Lock()
+        self.__compressors: list[threading.Thread] = []
+        self.__compress_lock = threading.Lock()
+        self.__stamp: Optional[str] = None
+        self.__rotations = 0
+        self.__open()
+
+    def __open(self) -> None:
+        # binary, so that the size is counted in bytes and not in characters
+        self.__file = open(self.path, 'ab', buffering=self.buffer_size)
+        self.__size = self.__file.tell()
+        # the modification time would restart the age at every write
+        self.__opened = time()
+
+    def write(self, records: list) -> None:
+        import json
+
+        lines = ''.join(json.dumps({'time': r.created,
+                                    'level': r.level.name,
+                                    'message': r.message,
+                                    'key': r.key}, ensure_ascii=False) + '\n' for r in records)
+        with self.__lock:
+            if self.__rotation_due():
+                self.__rotate()
+            data = lines.encode('utf-8')
+            self.__file.write(data)
+            self.__size += len(data)
+
+    def __rotation_due(self) -> bool:
+        if not self.__size:
+            return False
+        if self.max_bytes is not None and self.__size >= self.max_bytes:
+            return True
+        return self.rotate_every is not None and time() - self.__opened >= self.rotate_every
+
+    def __rotate(self) -> None:
+        from datetime import datetime
+
+        self.__file.close()
+        stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+        # the files rotated in the same second are numbered after the previous ones, even if these
+        # have been pruned meanwhile, so that the names keep the order of the rotations
+        n = self.__rotations + 1 if stamp == self.__stamp else 0
+        while True:
+            target = self.path.with_name(f'{self.path.name}.{stamp}' + (f'.{n}' if n else ''))
+            if not target.exists() and not target.with_name(target.name + '.gz').exists():
+                break
+            n += 1
+        self.__stamp, self.__rotations = stamp, n
+        os.replace(self.path, target)
+        self.__open()
+
+        if self.compress:
+            # not a daemon, even when rotating from the logs thread, so that exiting doesn't truncate it
+            thread = threading.Thread(target=self.__compress, args=(target,), name='rizlib-log-gzip',
+                                      daemon=False)
+            self.__compressors = [t for t in self.__compressors if t.is_alive()] + [thread]
+            thread.start()
+        else:
+            self.__prune()
+
+    def __compress(self, target) -> None:
+        import gzip
+        import shutil
+
+        # one file at a time, so that pruning never races with a compression
+        with self.__compress_lock:
+            tmp = target.with_name(target.name + '.gz.tmp')
+            with open(target, 'rb') as src, gzip.open(tmp, 'wb') as dst:
+                shutil.copyfileobj(src, dst, 1 << 20)
+            os.replace(tmp, target.with_name(target.name + '.gz'))
+            os.remove(target)
+            self.__prune()
+
+    def __prune(self) -> None:
+        prefix = self.path.name + '.'
+        rotated = []
+        for path in self.path.parent.iterdir():
+            name = path.name
+            # while compressing, only the compressed files are complete backups
+            if not name.startswith(prefix) or (self.compress and not name.endswith('.gz')):
+                continue
+            # ordered by the name, <log>.<stamp>[.<n>][.gz], and not by the modification time,
+            # which is the time of the compression
+            stamp, _, n = name[len(prefix):].removesuffix('.gz').partition('.')
+            if n and not n.isdigit():
+                continue
+            rotated.append(((stamp, int(n or 0)), path))
+        rotated.sort(reverse=True)
+        for _, old in rotated[self.backup_count:]:
+            try:
+                old.unlink()
+            except FileNotFoundError:
+                pass
+
+    def flush(self) -> None:
+        with self.__lock:
+            if not self.__file.closed:
+                self.__file.flush()
+
+    def close(self) -> None:
+        with self.__lock:
+            self.__file.close()
+        for thread in self.__compressors:
+            thread.join()
+
+
+class RingBufferSink(Sink):
+    def __init__(self, capacity: int = 10_000):
+        """Keeps the last capacity records in memory, so that they can be inspected or dumped
+        after a failure without having written them anywhere
+
+        :param capacity: the number of records kept
+        """
+        self.__records: deque = deque(maxlen=capacity)
+
+    def write(self, records: list) -> None:
+        self.__records.extend(records)
+
+    def records(self) -> list:
+        """Returns the kept records, from the oldest"""
+        return list(self.__records)
+
+    def clear(self) -> None:
+        self.__records.clear()
+
+    def dump(self, target: Union[PathHint, TextIO, None] = None) -> None:
+        """Writes the kept records as JSON lines
+
+        :param target: a path or a text stream, stderr by default
+        """
+        import json
+
+        lines = ''.join(json.dumps({'time': r.created, 'level': r.level.name, 'message': r.message,
+                                    'key': r.key}, ensure_ascii=False) + '\n' for r in self.records())
+        if target is None:
+            target = sys.stderr
+        if hasattr(target, 'write'):
+            target.write(lines)
+            target.flush()
+        else:
+            with open(target, 'w', encoding='utf-8') as file:
+                file.write(lines)
+
+    def __len__(self) -> int:
+        return len(self.__records)
+
+
+class LoggingSink(Sink):
+    def __init__(self, logger: Union[str, 'logging.Logger', None] = None):
+        """Forwards the records to a logger of the logging module, with the equivalent level
+
+        :param logger: a logger or its name, the root logger by default
+        """
+        import logging
+
+        self.logger = logger if isinstance(logger, logging.Logger) else logging.getLogger(logger)
+
+    def write(self, records: list) -> None:
+        for record in records:
+            if record.captured:
+                continue  # it comes from the logging module through a RizlibHandler
+            if self.logger.isEnabledFor(record.level):
+                # marked so that a RizlibHandler on the same logger doesn't log it again
+                self.logger.log(int(record.level), record.message, extra={'rizlib': True})
@@ -5,6 +5,10 @@ Example:
     success("file loaded") prints the string "SUCCESS: file loaded" colored in green
     warning("task skipped") prints the string "WARNING: task skipped" colored in yellow
 
+The available levels, from the lowest, are debug, info, success, warning and error.
+Logs below the level set by set_level are discarded with a single comparison, debug
+logs are disabled by default.
+
 It also contains an enum class called Silence, used to silence warnings.
 
 Example:
@@ -17,17 +21,43 @@ Example:
         success(msg, silence)
 
     foo(*args, Silence.success) will only print a warning
+
+By default logs are printed synchronously. After start_async() they're only appended to a queue
+by the caller, while a background thread formats them and prints them in batches.
+
+Example:
+    start_async()
+    for item in items:
+        success(f"{item} processed")    # returns immediately
+    stop_async()                        # prints what's left and stops the thread
+
+Logs fired inside hot loops can be sampled, rate limited and collapsed by a LogPolicy, see set_policy.
+
+Logs are written to the console by default, other sinks like JSON lines files or in-memory ring buffers
+can be added, see add_sink, set_sinks and :mod:`rizlib.terminal.text.log_sinks`.
+
+Records logged with the standard logging module can be printed by rizlib adding a
+RizlibHandler to a logger, see capture_logging.
 """
 
-__all__ = {'Silence', 'success', 'warning'}
+__all__ = ['Silence', 'Level', 'LogRecord', 'RizlibHandler', 'debug', 'info', 'success', 'warning',
+           'error', 'set_level', 'get_level', 'is_enabled', 'start_async', 'stop_async', 'flush',
+           'capture_logging', 'LogPolicy', 'set_policy', 'get_policy', 'set_sinks', 'add_sink',
+           'remove_sink', 'get_sinks']
 __author__ = "Valerio Molinari"
 __credits__ = "Valerio Molinari"
 __maintainer__ = "Valerio Molinari"
 __email__ = "valeriomolinariprogrammazione@gmail.com"
 
-from typing import Callable
-from rizlib.terminal.text.colors import yellow, green
-from enum import Enum, auto
+import sys
+import threading
+from collections import deque
+from enum import Enum, IntEnum, auto
+from time import time
+from typing import Optional, Union
+from rizlib.terminal.text.log_sinks import Sink, ConsoleSink
+
+# logging, atexit and the log policies are imported on first use, since every rizlib module logs
 
 
 class Silence(Enum):
@@ -36,45 +66,380 @@ class Silence(Enum):
     success = auto()
     warning = auto()
     all = auto()
+    debug = auto()
+    info = auto()
+    error = auto()
+
+
+class Level(IntEnum):
+    """Severity of a log, the values are compatible with the logging module ones"""
+    debug = 10      # logging.DEBUG
+    info = 20       # logging.INFO
+    success = 25
+    warning = 30    # logging.WARNING
+    error = 40      # logging.ERROR
+
+
+class LogRecord:
+    __slots__ = ('level', 'message', 'created', 'key')
+
+    # True for the records coming from the logging module
+    captured = False
+
+    def __init__(self, level: Level, message: str, created: float, key: Optional[str] = None) -> None:
+        """A log waiting to be written
+
+        :param level: the severity of the log
+        :param message: the message of the log
+        :param created: the time the log was created, as returned by time.time
+        :param key: an identifier of the log, used to group repeated logs, the message by default
+        """
+        self.level = level
+        self.message = message
+        self.created = created
+        self.key = key
+
+    def __repr__(self) -> str:
+        return (f'{type(self).__name__}(level={self.level!r}, message={self.message!r}, '
+                f'created={self.created!r}, key={self.key!r})')
+
+    def __eq__(self, other: object) -> bool:
+        if type(other) is not type(self):
+            return NotImplemented
+        return (self.level, self.message, self.created, self.key) == \
+            (other.level, other.message, other.created, other.key)
+
+    __hash__ = None
+
+    def replace(self, **changes) -> 'LogRecord':
+        """Returns a copy of the record with some attributes changed, e.g. record.replace(message='...')"""
+        values = {name: getattr(self, name) for name in LogRecord.__slots__}
+        return type(self)(**(values | changes))
+
+
+class _CapturedRecord(LogRecord):
+    __slots__ = ()
+    captured = True
+
+
+# the lowest enabled level, read by every log function before doing anything else
+_threshold: int = Level.info
+
+
+def set_level(level: Union[Level, int]) -> None:
+    """Sets the lowest level which is logged, Level.info by default
+
+    :param level: a Level value or an integer compatible with the logging module levels
+    """
+    global _threshold
+    _threshold = int(level)
+
+
+def get_level() -> Union[Level, int]:
+    """Returns the lowest level which is logged"""
+    try:
+        return Level(_threshold)
+    except ValueError:
+        return _threshold
+
+
+def is_enabled(level: Union[Level, int]) -> bool:
+    """Returns whether logs of level are written. Useful to skip building expensive messages"""
+    return level >= _threshold
+
+
+_sinks: list[Sink] = [ConsoleSink()]
+
+
+def set_sinks(sinks: list[Sink]) -> list[Sink]:
+    """Replaces the sinks where logs are written, see :mod:`rizlib.terminal.text.log_sinks`.
+    The previous sinks are flushed, not closed.
+
+    :param sinks: the new sinks, [ConsoleSink()] is the default
+    :return: the previous sinks
+    """
+    global _sinks
+    _flush_at_exit()
+    flush()
+    previous, _sinks = _sinks, list(sinks)
+    return previous
+
+
+def add_sink(sink: Sink) -> Sink:
+    """Adds a sink where logs are written
+
+    :return: the sink
+    """
+    global _sinks
+    _flush_at_exit()
+    _sinks = [*_sinks, sink]
+    return sink
+
+
+def remove_sink(sink: Sink) -> None:
+    """Removes a sink, flushing it"""
+    global _sinks
+    flush()
+    _sinks = [s for s in _sinks if s is not sink]
+    sink.flush()
+
+
+def get_sinks() -> list[Sink]:
+    """Returns the sinks where logs are written"""
+    return list(_sinks)
+
+
+def _write(records: list[LogRecord]) -> None:
+    """Writes a batch of records to every sink"""
+    for sink in _sinks:
+        try:
+            sink.write(records)
+        except Exception as e:  # a broken sink must not break the others
+            print(f'rizlib logs: {type(sink).__name__} failed: {e!r}', file=sys.stderr)
+
+
+class _Pipeline:
+    def __init__(self, flush_interval: float, batch_size: int):
+        """A background thread writing the records appended to its queue in batches.
+
+        The callers only append to a deque, which is thread safe without locks, and wake the thread
+        up when a batch is ready. The thread also wakes up every flush_interval seconds.
+        """
+        self.queue: deque[LogRecord] = deque()
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.running = True
+        self.thread = threading.Thread(target=self.__run, name='rizlib-logs', daemon=True)
+        self.thread.start()
+
+    def put(self, record: LogRecord) -> None:
+        self.queue.append(record)
+        if len(self.queue) >= self.batch_size:
+            self.wakeup.set()
 
+    def drain(self) -> None:
+        """Writes every queued record, it's called by the thread and by flush"""
+        with self.lock:
+            popleft = self.queue.popleft
+            while self.queue:
+                batch = []
+                try:
+                    for _ in range(self.batch_size):
+                        batch.append(popleft())
+                except IndexError:
+                    pass
+                _write(batch)
 
-def __silenced_by(silence: Silence):
-    """A decorator to tell log functions what Silence enum disable them
+    def __run(self) -> None:
+        while self.running:
+            self.wakeup.wait(self.flush_interval)
+            self.wakeup.clear()
+            try:
+                policy = _policy
+                if policy is not None:
+                    self.queue.extend(policy.flush(due_only=True))
+                self.drain()
+            except Exception as e:  # a broken stream must not kill the thread
+                print(f'rizlib logs: {e!r}', file=sys.stderr)
 
-    :param silence: logs.Success enum class value
+    def stop(self) -> None:
+        self.running = False
+        self.wakeup.set()
+        self.thread.join()
+        self.drain()
+
+
+_pipeline: Optional[_Pipeline] = None
+_policy: Optional['LogPolicy'] = None
+
+
+def _deliver(record: LogRecord) -> None:
+    pipeline = _pipeline
+    if pipeline is not None:
+        pipeline.put(record)
+    else:
+        _write([record])
+
+
+def _emit(record: LogRecord) -> None:
+    policy = _policy
+    if policy is None:
+        _deliver(record)
+    else:
+        for record in policy.process(record):
+            _deliver(record)
+
+
+def set_policy(policy: Optional['LogPolicy']) -> None:
+    """Sets the policy used to sample, rate limit and collapse logs, see :class:`LogPolicy`.
+    The summaries of the previous policy are written before replacing it.
+
+    :param policy: the new policy, None to write every log
+    """
+    global _policy
+    if policy is not None:
+        _flush_at_exit()
+    previous, _policy = _policy, policy
+    if previous is not None:
+        for record in previous.flush():
+            _deliver(record)
+
+
+def get_policy() -> Optional['LogPolicy']:
+    """Returns the current log policy"""
+    return _policy
+
+
+def start_async(flush_interval: float = .1, batch_size: int = 1024) -> None:
+    """Starts writing logs from a background thread. Logging functions only enqueue the record
+    and return, the thread writes them in batches. Pending logs are written at exit.
+
+    :param flush_interval: the maximum number of seconds a log waits before being written
+    :param batch_size: the number of records written at once, reaching it wakes the thread up
+    """
+    global _pipeline
+    if _pipeline is not None:
+        return
+    _flush_at_exit()
+    _pipeline = _Pipeline(flush_interval, batch_size)
+
+
+def stop_async() -> None:
+    """Writes the pending logs and goes back to synchronous logging"""
+    global _pipeline
+    pipeline, _pipeline = _pipeline, None
+    if pipeline is not None:
+        pipeline.stop()
+
+
+def flush() -> None:
+    """Writes the pending logs, including the summaries of the log policy,
+    without waiting for the background thread
     """
+    if _policy is not None:
+        for record in _policy.flush():
+            _deliver(record)
+    if _pipeline is not None:
+        _pipeline.drain()
+    for sink in _sinks:
+        sink.flush()
+
+
+def _shutdown() -> None:
+    flush()
+    stop_async()
+    for sink in _sinks:
+        sink.close()
+
+
+_shutdown_registered = False
+
+
+def _flush_at_exit() -> None:
+    """Registers the final flush, once anything which can hold logs back is set up"""
+    global _shutdown_registered
+    if not _shutdown_registered:
+        import atexit
+        atexit.register(_shutdown)
+        _shutdown_registered = True
 
-    def function_wrapper(function: Callable[[str, Silence], None]):
-        def wrap(message: str, silencer: Silence = Silence.none):
-            if silencer not in (silence, Silence.all):
-                function(message, None)
 
-        wrap.__doc__ = function.__doc__
-        wrap.__name__ = function.__name__
-        return wrap
+# the levels as plain integers, compared to the threshold faster than the enum members
+_DEBUG, _INFO, _SUCCESS, _WARNING, _ERROR = (int(Level.debug), int(Level.info), int(Level.success),
+                                             int(Level.warning), int(Level.error))
 
-    return function_wrapper
 
+def debug(message: str, silence: Silence = Silence.none, *, key: Optional[str] = None) -> None:
+    """Prints "DEBUG: message" colored in dark white
 
-def __set_doc__(function: Callable, color: str):
-    name = function.__name__
-    function.__doc__ = f"""Prints "{name.upper()}: message" colored in {color}
-    
     :param message: the message to be print on the screen
-    :param silence: a log.Silence enum value which, when equal to Silence.{name} disables
+    :param silence: a log.Silence enum value which, when equal to Silence.debug disables
     this log
+    :param key: (optional) groups different messages under the same key for the log policy,
+    see set_policy
     """
+    if _DEBUG >= _threshold and silence is not Silence.debug and silence is not Silence.all:
+        _emit(LogRecord(Level.debug, message, time(), key))
 
 
-@__silenced_by(Silence.success)
-def success(message: str, silence: Silence = Silence.none):
-    green(f"SUCCESS: {message}")
+def info(message: str, silence: Silence = Silence.none, *, key: Optional[str] = None) -> None:
+    """Prints "INFO: message" colored in blue
 
+    :param message: the message to be print on the screen
+    :param silence: a log.Silence enum value which, when equal to Silence.info disables
+    this log
+    :param key: (optional) groups different messages under the same key for the log policy,
+    see set_policy
+    """
+    if _INFO >= _threshold and silence is not Silence.info and silence is not Silence.all:
+        _emit(LogRecord(Level.info, message, time(), key))
+
+
+def success(message: str, silence: Silence = Silence.none, *, key: Optional[str] = None) -> None:
+    """Prints "SUCCESS: message" colored in green
+
+    :param message: the message to be print on the screen
+    :param silence: a log.Silence enum value which, when equal to Silence.success disables
+    this log
+    :param key: (optional) groups different messages under the same key for the log policy,
+    see set_policy
+    """
+    if _SUCCESS >= _threshold and silence is not Silence.success and silence is not Silence.all:
+        _emit(LogRecord(Level.success, message, time(), key))
+
+
+def warning(message: str, silence: Silence = Silence.none, *, key: Optional[str] = None) -> None:
+    """Prints "WARNING: message" colored in yellow
+
+    :param message: the message to be print on the screen
+    :param silence: a log.Silence enum value which, when equal to Silence.warning disables
+    this log
+    :param key: (optional) groups different messages under the same key for the log policy,
+    see set_policy
+    """
+    if _WARNING >= _threshold and silence is not Silence.warning and silence is not Silence.all:
+        _emit(LogRecord(Level.warning, message, time(), key))
+
+
+def error(message: str, silence: Silence = Silence.none, *, key: Optional[str] = None) -> None:
+    """Prints "ERROR: message" colored in bold red
+
+    :param message: the message to be print on the screen
+    :param silence: a log.Silence enum value which, when equal to Silence.error disables
+    this log
+    :param key: (optional) groups different messages under the same key for the log policy,
+    see set_policy
+    """
+    if _ERROR >= _threshold and silence is not Silence.error and silence is not Silence.all:
+        _emit(LogRecord(Level.error, message, time(), key))
+
+
+def capture_logging(logger: Optional[Union[str, 'logging.Logger']] = None,
+                    level: Union[Level, int] = 0) -> 'RizlibHandler':  # 0 is logging.NOTSET
+    """Adds a :class:`RizlibHandler` to a logger of the logging module
+
+    :param logger: a logger or its name, the root logger by default
+    :param level: the level of the handler
+    :return: the handler, to be removed with logger.removeHandler
+    """
+    import logging
+    from rizlib.terminal.text.log_bridge import RizlibHandler
 
-@__silenced_by(Silence.warning)
-def warning(message: str, silence: Silence = Silence.none):
-    yellow(f'WARNING: {message}')
+    if not isinstance(logger, logging.Logger):
+        logger = logging.getLogger(logger)
+    handler = RizlibHandler(level)
+    logger.addHandler(handler)
+    return handler
 
 
-__set_doc__(success, 'green')
-__set_doc__(warning, 'yellow')
+def __getattr__(name: str) -> object:
+    # the names defined by the modules which are imported on first use
+    if name == 'LogPolicy':
+        from rizlib.terminal.text.log_policy import LogPolicy
+        return LogPolicy
+    if name == 'RizlibHandler':
+        from rizlib.terminal.text.log_bridge import RizlibHandler
+        return RizlibHandler
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -9,26 +9,30 @@ __credits__ = "Valerio Molinari"
 __maintainer__ = "Valerio Molinari"
 __email__ = "valeriomolinariprogrammazione@gmail.com"
 
-import sys
-from time import sleep
+from typing import Optional
+from rizlib.terminal.text.animation import Typewriter, get_animator
 
 
-def typewrite(text: str, time: float = .05, end: str = '\n'):
+def typewrite(text: str, time: float = .05, end: str = '\n', block: bool = True) -> Optional[Typewriter]:
     """Prints a string like a typewriter with a time interval between each char.
 
     By default at the end it prints a \\\\n char, this behavior can be modified by
     changing the "end" parameter.
 
+    The text is drawn by the animator thread of :mod:`rizlib.terminal.text.animation`, which
+    writes once per frame however short the interval is.
+
     :param text: the string to print
     :param time: the time to wait between each char, 0.05s by default
     :param end: a char to print at the end of the string, endline char by default
+    :param block: if False, it returns immediately the Typewriter widget, whose wait method
+        waits for the end of the animation
     """
-    for char in text:
-        sys.stdout.write(char)
-        sys.stdout.flush()
-        sleep(time)
-
-    print(end=end)
+    widget = get_animator().add(Typewriter(text, time, end))
+    if block:
+        widget.wait()
+        return None
+    return widget
 
 
 if __name__ == '__main__':
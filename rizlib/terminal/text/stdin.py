@@ -3,14 +3,17 @@ Provides the Stdin class, which is a :class:`Queue` of :class:`Word` used to
 emulate the C language input style, with some slight difference.
 """
 
-__all__ = ["Stdin"]
+__all__ = ["Stdin", "BulkStdin"]
 
 __author__ = "Valerio Molinari"
 __credits__ = "Valerio Molinari"
 __maintainer__ = "Valerio Molinari"
 __email__ = "valeriomolinariprogrammazione@gmail.com"
 
-from typing import Optional, Type, Sequence, Union
+import re
+import sys
+from array import array
+from typing import BinaryIO, Optional, Type, Sequence, Union
 from rizlib.terminal.data_structures.queue import QueueNode, Queue
 
 
@@ -100,6 +103,192 @@ class Stdin(Queue[Word]):
         return res
 
 
+class BulkStdin:
+    _TOKEN = re.compile(rb'\S+')
+    _LAST_SPACE = re.compile(rb'\s\S*\Z')
+    _SMALL_READ = 64
+
+    def __init__(self,
+                 stream: Optional[BinaryIO] = None,
+                 chunk_size: Optional[int] = 1 << 20,
+                 echo: bool = False,
+                 encoding: str = 'utf-8'
+                 ):
+        """A batch alternative to :class:`Stdin`, meant to read millions of tokens from a pipe.
+
+        Instead of calling input() for each prompt and enqueueing the extra words as queue nodes,
+        it reads the binary stream in large chunks and tokenizes it lazily over a byte buffer, so
+        that no object is allocated per token except the returned value.
+
+        It can be called like a :class:`Stdin` object, thus it can replace it, for example in a
+        :class:`Menu`.
+
+        :param stream: a binary stream, sys.stdin.buffer by default
+        :param chunk_size: the number of bytes read at once, if None the whole stream is read at once
+        :param echo: if True, prompts and read values are printed like :class:`Stdin` does
+            with dequeued values
+        :param encoding: the encoding used to decode strings
+        """
+        self.__stream = stream if stream is not None else sys.stdin.buffer
+        self.__chunk_size = chunk_size
+        self.__echo = echo
+        self.__encoding = encoding
+        self.__buffer = b''
+        self.__pos = 0
+        self.__eof = False
+
+    def __fill(self) -> bool:
+        """Reads the next chunk, dropping the consumed part of the buffer
+
+        :return: False if the stream is over
+        """
+        if self.__eof:
+            return False
+        chunk = self.__stream.read() if self.__chunk_size is None else self.__stream.read(self.__chunk_size)
+        if not chunk:
+            self.__eof = True
+            return False
+        self.__buffer = self.__buffer[self.__pos:] + chunk
+        self.__pos = 0
+        return True
+
+    def __next_token(self) -> Optional[bytes]:
+        """Returns the next whitespace separated token or None if the stream is over"""
+        while True:
+            match = self._TOKEN.search(self.__buffer, self.__pos)
+            if match is not None and (match.end() < len(self.__buffer) or self.__eof):
+                self.__pos = match.end()
+                return match.group()
+            # the token may continue in the next chunk
+            if match is None:
+                self.__pos = len(self.__buffer)
+            if not self.__fill():
+                if match is None:
+                    return None
+
+    def is_empty(self) -> bool:
+        """Returns whether there are tokens left to read"""
+        while self._TOKEN.search(self.__buffer, self.__pos) is None:
+            self.__pos = len(self.__buffer)
+            if not self.__fill():
+                return True
+        return False
+
+    def token(self) -> bytes:
+        """Returns the next whitespace separated token
+
+        :raises EOFError: if the stream is over
+        """
+        token = self.__next_token()
+        if token is None:
+            raise EOFError("no more tokens in stdin")
+        return token
+
+    def read_int(self) -> int:
+        """Returns the next token as an int"""
+        return int(self.token())
+
+    def read_float(self) -> float:
+        """Returns the next token as a float"""
+        return float(self.token())
+
+    def read_str(self) -> str:
+        """Returns the next token as a string"""
+        return self.token().decode(self.__encoding)
+
+    def read_words(self, n: int) -> str:
+        """Returns the next n tokens joined by a white space"""
+        return ' '.join(self.read_str() for _ in range(n))
+
+    def read_line(self) -> str:
+        """Returns the text up to the end of the line, skipping leading blanks and empty lines
+
+        :raises EOFError: if the stream is over
+        """
+        if self.is_empty():
+            raise EOFError("no more lines in stdin")
+        self.__pos = self._TOKEN.search(self.__buffer, self.__pos).start()
+        parts = []
+        while True:
+            end = self.__buffer.find(b'\n', self.__pos)
+            if end != -1:
+                parts.append(self.__buffer[self.__pos:end])
+                self.__pos = end + 1
+                break
+            # the scanned part is set aside, so a long line is searched and copied only once
+            parts.append(self.__buffer[self.__pos:])
+            self.__pos = len(self.__buffer)
+            if not self.__fill():
+                break
+        return b''.join(parts).rstrip().decode(self.__encoding)
+
+    def read_ints(self, n: int, typecode: str = 'q') -> array:
+        """Reads the next n tokens as integers at once
+
+        :param n: the number of integers to read
+        :param typecode: the typecode of the returned array, 'q' (signed 64 bit) by default
+        :return: an array of n integers
+        :raises EOFError: if the stream ends before n integers are read
+        """
+        result = array(typecode)
+        if n <= self._SMALL_READ:
+            result.extend(self.read_int() for _ in range(n))
+            return result
+
+        while len(result) < n:
+            # only the complete tokens of the buffer can be used, the last one may continue in the next chunk
+            if self.__eof:
+                cut = len(self.__buffer)
+            else:
+                last_space = self._LAST_SPACE.search(self.__buffer, self.__pos)
+                cut = last_space.start() + 1 if last_space is not None else self.__pos
+
+            missing = n - len(result)
+            tokens = self.__buffer[self.__pos:cut].split(None, missing)
+            if len(tokens) > missing:
+                # more tokens than needed: the last item is the unsplit rest of the buffer
+                cut -= len(tokens.pop())
+
+            result.extend(map(int, tokens))
+            self.__pos = cut
+            if len(result) < n and not self.__fill() and self.__pos >= len(self.__buffer):
+                raise EOFError(f"expected {n} integers, found {len(result)}")
+        return result
+
+    def __call__(self,
+                 input_type: type,
+                 prompt: str = '',
+                 sequence_len: Optional[int] = None,
+                 prefix: str = '\n> ',
+                 suffix: str = '\n'
+                 ) -> Union[int, float, str]:
+        """Reads a typed input like :meth:`Stdin.__call__` does. A numeric type reads the next token,
+        a string reads the next sequence_len words or, if it's not specified, the rest of the line.
+
+        :param input_type: type of the required input (str, int or float)
+        :param prompt: the message shown if echo is enabled
+        :param sequence_len: in case of type:str, indicates the number of words to read
+        :param prefix: a string shown between the prompt and the input if echo is enabled
+        :param suffix: a string shown after the input if echo is enabled
+        :return: the required input, or an empty string if a numeric input can't be converted
+        :raises EOFError: if the stream is over
+        """
+        if input_type in (int, float):
+            try:
+                res = input_type(self.token())
+            except ValueError:
+                res = ''
+        elif sequence_len is not None:
+            res = self.read_words(sequence_len)
+        else:
+            res = self.read_line()
+
+        if self.__echo:
+            print(f'{prompt}{prefix}{res}{suffix}')
+
+        return res
+
+
 if __name__ == '__main__':
     # print(help(Stdin))
     stdin = Stdin()
@@ -0,0 +1,157 @@
+"""
+Provides the StyledWriter class, a buffer which collects plain and colored text and writes it
+to the underlying stream in a few large writes instead of one small write per print.
+
+Example:
+    with StyledWriter() as out:
+        for row in report:
+            red(row.error, file=out)
+            out.style(row.detail, 'cyan', attrs=['bold'])
+            out.write('\\n')
+
+    with StyledWriter(redirect=True):
+        for row in report:
+            green(row)      # every print is buffered until the end of the block
+"""
+
+__all__ = ["StyledWriter"]
+
+__author__ = "Valerio Molinari"
+__credits__ = "Valerio Molinari"
+__maintainer__ = "Valerio Molinari"
+__email__ = "valeriomolinariprogrammazione@gmail.com"
+
+import sys
+from typing import Iterable, Literal, Optional, TextIO
+from rizlib.terminal.text.colors import RESET, color_enabled, style_prefix
+
+
+class StyledWriter:
+    def __init__(self,
+                 stream: Optional[TextIO] = None,
+                 *,
+                 buffer_size: int = 1 << 16,
+                 flush_policy: Literal['size', 'line'] = 'size',
+                 redirect: bool = False
+                 ) -> None:
+        """A text buffer in front of a stream. It can be passed as file to print and to the color
+        printers of :mod:`rizlib.terminal.text.colors`, since it behaves like a text file.
+
+        The buffer is written to the stream when it reaches buffer_size characters, when
+        :meth:`flush` is called or when the writer is closed. With the 'line' flush policy it is
+        also written at the end of every write containing a new line, like a line buffered terminal.
+
+        The writer is not thread safe.
+
+        :param stream: the stream to write to, stdout by default
+        :param buffer_size: the number of characters after which the buffer is flushed
+        :param flush_policy: 'size' to flush only when the buffer is full, 'line' to flush also on new lines
+        :param redirect: if True, sys.stdout is replaced by the writer while it's used as a context manager
+        """
+        if flush_policy not in ('size', 'line'):
+            raise ValueError(f"unknown flush policy {flush_policy!r}")
+        self.__stream = stream
+        self.__buffer_size = buffer_size
+        self.__line = flush_policy == 'line'
+        self.__redirect = redirect
+        self.__previous_stdout: Optional[TextIO] = None
+        self.__segments: list[str] = []
+        self.__size = 0
+        self.__closed = False
+
+    @property
+    def stream(self) -> TextIO:
+        """The underlying stream"""
+        return self.__stream if self.__stream is not None else self.__previous_stdout or sys.stdout
+
+    def write(self, text: str) -> int:
+        """Adds text to the buffer
+
+        :return: the number of characters written
+        """
+        if self.__closed:
+            raise ValueError("write to closed StyledWriter")
+        self.__segments.append(text)
+        self.__size += len(text)
+        if self.__size >= self.__buffer_size or self.__line and '\n' in text:
+            self.flush()
+        return len(text)
+
+    def writelines(self, lines: Iterable[str]) -> None:
+        for line in lines:
+            self.write(line)
+
+    def style(self,
+              text: str,
+              color: Optional[str] = None,
+              on_color: Optional[str] = None,
+              attrs: Iterable[str] = ()) -> int:
+        """Adds colored text to the buffer, the colors are skipped if the stream is not a terminal
+
+        :param text: the text to write
+        :param color: one of the colors of :mod:`rizlib.terminal.text.colors`
+        :param on_color: a background, one of the colors prefixed with on_
+        :param attrs: a list of attributes among bold, dark, underline, blink, reverse, concealed
+        :return: the number of characters written
+        """
+        if color_enabled(self.stream):
+            prefix = style_prefix(color, on_color, attrs)
+            if prefix:
+                return self.write(prefix + text + RESET)
+        return self.write(text)
+
+    def flush(self) -> None:
+        """Writes the whole buffer to the stream with a single write"""
+        if self.__segments:
+            stream = self.stream
+            stream.write(''.join(self.__segments))
+            self.__segments.clear()
+            self.__size = 0
+            stream.flush()
+
+    def close(self) -> None:
+        """Flushes the buffer, the underlying stream is left open"""
+        if not self.__closed:
+            self.flush()
+            self.__closed = True
+
+    @property
+    def closed(self) -> bool:
+        return self.__closed
+
+    def isatty(self) -> bool:
+        return self.stream.isatty()
+
+    def fileno(self) -> int:
+        return self.stream.fileno()
+
+    def writable(self) -> bool:
+        return True
+
+    def __len__(self) -> int:
+        """The number of characters waiting in the buffer"""
+        return self.__size
+
+    def __enter__(self) -> 'StyledWriter':
+        if self.__redirect:
+            self.__previous_stdout = sys.stdout
+            sys.stdout = self
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        if self.__redirect:
+            sys.stdout = self.__previous_stdout
+        self.close()
+        self.__previous_stdout = None
+
+
+if __name__ == '__main__':
+    from rizlib.terminal.text.colors import red, b_green
+
+    with StyledWriter() as out:
+        for n in range(5):
+            red('line', n, file=out)
+            out.style('styled\n', 'cyan', attrs=['bold'])
+
+    with StyledWriter(redirect=True):
+        b_green('printed at the end of the block')
@@ -0,0 +1,18 @@
+from rizlib.tools.lazy import lazy_exports
+
+__getattr__, __dir__, __all__ = lazy_exports(__name__, globals(), {
+    'speed_test': 'time',
+    'benchmark': 'benchmarking',
+    'compare': 'benchmarking',
+    'BenchmarkResult': 'benchmarking',
+    'Comparison': 'benchmarking',
+    'load_results': 'benchmarking',
+    'profile': 'profiling',
+    'profilers': 'profiling',
+    'registry': 'metrics',
+    'counter': 'metrics',
+    'gauge': 'metrics',
+    'histogram': 'metrics',
+    'timed': 'metrics',
+    'counted': 'metrics',
+}, submodules=['benchmarking', 'metrics', 'profiling', 'time'])
@@ -0,0 +1,251 @@
+"""
+Provides a benchmarking harness, more reliable than a single timed call.
+
+Every function is called a few times to warm up, then the number of calls per measure is
+calibrated so that a measure is long enough for the clock resolution, and many measures are
+taken. Outliers caused by other processes are rejected before computing the statistics.
+
+Example:
+    result = benchmark(sorted, data)
+    print(result)       # sorted: median 1.21 ms, min 1.19 ms, p95 1.30 ms, ...
+
+    comparison = compare({'sorted': lambda: sorted(data), 'heapq': lambda: heap_sort(data)})
+    print(comparison)   # a table with the statistics of both and how much slower each one is
+    comparison.save('bench.json')
+
+    # later, after a change
+    regressions = compare(...).check('bench.json', tolerance=.1)
+"""
+
+__all__ = ["BenchmarkResult", "Comparison", "Regression", "benchmark", "compare", "load_results"]
+
+__author__ = "Valerio Molinari"
+__credits__ = "Valerio Molinari"
+__maintainer__ = "Valerio Molinari"
+__email__ = "valeriomolinariprogrammazione@gmail.com"
+
+import gc
+import json
+import math
+import statistics
+import sys
+from dataclasses import dataclass, asdict
+from time import perf_counter_ns
+from typing import Any, Callable, Mapping, Optional, Sequence, Union
+from rizlib.documentation.types import PathHint
+
+
+@dataclass
+class BenchmarkResult:
+    """The statistics of a benchmark, times are per call in nanoseconds
+
+    Args:
+        name: the name of the benchmarked function
+        loops: the calls timed together in a measure
+        runs: the measures kept
+        outliers: the measures rejected as outliers
+        min_ns: the fastest measure, the closest to the real cost of the function
+        median_ns: the median measure
+        mean_ns: the mean measure
+        p95_ns: the 95th percentile
+        stddev_ns: the standard deviation
+    """
+    name: str
+    loops: int
+    runs: int
+    outliers: int
+    min_ns: float
+    median_ns: float
+    mean_ns: float
+    p95_ns: float
+    stddev_ns: float
+
+    @classmethod
+    def from_samples(cls, name: str, samples: Sequence[float], loops: int,
+                     reject_outliers: bool = True) -> 'BenchmarkResult':
+        """Computes the statistics of the measures
+
+        :param name: the name of the benchmarked function
+        :param samples: the time per call of every measure, in nanoseconds
+        :param loops: the calls timed together in a measure
+        :param reject_outliers: if True, samples beyond 1.5 interquartile ranges from the quartiles are ignored
+        """
+        samples = sorted(samples)
+        kept = samples
+        if reject_outliers and len(samples) >= 4:
+            q1, _, q3 = statistics.quantiles(samples, n=4)
+            low, high = q1 - 1.5 * (q3 - q1), q3 + 1.5 * (q3 - q1)
+            kept = [s for s in samples if low <= s <= high]
+        p95 = kept[min(len(kept) - 1, math.ceil(.95 * len(kept)) - 1)]
+        return cls(name, loops, len(kept), len(samples) - len(kept), kept[0], statistics.median(kept),
+                   statistics.fmean(kept), p95, statistics.stdev(kept) if len(kept) > 1 else 0.)
+
+    def __str__(self):
+        return (f'{self.name}: median {_ns(self.median_ns)}, min {_ns(self.min_ns)}, p95 {_ns(self.p95_ns)}, '
+                f'stddev {_ns(self.stddev_ns)} ({self.runs} runs x {self.loops} loops, {self.outliers} outliers)')
+
+
+@dataclass
+class Regression:
+    """A benchmark slower than its baseline, comparing the medians"""
+    name: str
+    baseline_ns: float
+    current_ns: float
+
+    @property
+    def ratio(self) -> float:
+        return self.current_ns / self.baseline_ns
+
+    def __str__(self):
+        return f'{self.name}: {_ns(self.current_ns)}, baseline {_ns(self.baseline_ns)} ({self.ratio:.2f}x)'
+
+
+def _ns(ns: float) -> str:
+    for unit, scale in (('s', 1e9), ('ms', 1e6), ('us', 1e3)):
+        if ns >= scale:
+            return f'{ns / scale:.3g} {unit}'
+    return f'{ns:.3g} ns'
+
+
+def _time(function: Callable, args: tuple, kwargs: dict, loops: int) -> int:
+    r = range(loops)
+    start = perf_counter_ns()
+    for _ in r:
+        function(*args, **kwargs)
+    return perf_counter_ns() - start
+
+
+def benchmark(function: Callable,
+              *args,
+              name: Optional[str] = None,
+              warmup: int = 3,
+              loops: Optional[int] = None,
+              repeat: Optional[int] = None,
+              target_time: float = .01,
+              max_time: float = 1.,
+              disable_gc: bool = True,
+              reject_outliers: bool = True,
+              **kwargs
+              ) -> BenchmarkResult:
+    """Measures how long function(*args, **kwargs) takes
+
+    :param function: the function to benchmark
+    :param args: the positional arguments of the function
+    :param name: the name of the result, the function name by default
+    :param warmup: the calls made before measuring, to fill caches
+    :param loops: the calls timed together in a measure, by default the smallest power of 2
+        which takes at least target_time seconds
+    :param repeat: the number of measures, by default as many as fit in max_time seconds, between 5 and 10000
+    :param target_time: the minimum duration of a measure when loops is calibrated
+    :param max_time: the time budget of the measures when repeat is calibrated
+    :param disable_gc: if True, the garbage collector is disabled while measuring
+    :param reject_outliers: if True, measures beyond 1.5 interquartile ranges from the quartiles are ignored
+    :param kwargs: the keyword arguments of the function
+    :return: the statistics of the measures
+    """
+    name = name or getattr(function, '__qualname__', None) or repr(function)
+    for _ in range(warmup):
+        function(*args, **kwargs)
+
+    gc_enabled = gc.isenabled()
+    if disable_gc:
+        gc.disable()
+    try:
+        if loops is None:
+            loops = 1
+            target = target_time * 1e9
+            while (elapsed := _time(function, args, kwargs, loops)) < target and loops < 1 << 30:
+                loops *= 2
+        else:
+            elapsed = _time(function, args, kwargs, loops)
+        if repeat is None:
+            repeat = max(5, min(10_000, int(max_time * 1e9 / max(elapsed, 1))))
+        samples = [_time(function, args, kwargs, loops) / loops for _ in range(repeat)]
+    finally:
+        if gc_enabled:
+            gc.enable()
+    return BenchmarkResult.from_samples(name, samples, loops, reject_outliers)
+
+
+class Comparison:
+    def __init__(self, results: Sequence[BenchmarkResult]) -> None:
+        """The results of some candidates benchmarked side by side, see :func:`compare`
+
+        :param results: the results, in any order
+        """
+        self.results = sorted(results, key=lambda r: r.median_ns)
+
+    @property
+    def fastest(self) -> BenchmarkResult:
+        return self.results[0]
+
+    def __getitem__(self, name: str) -> BenchmarkResult:
+        for result in self.results:
+            if result.name == name:
+                return result
+        raise KeyError(name)
+
+    def __str__(self):
+        from rizlib.terminal.text.format import Table
+
+        best = self.fastest.median_ns
+        table = Table(['name', 'median', 'min', 'p95', 'stddev', 'runs', 'relative'],
+                      align=['left'] + ['right'] * 6)
+        rows = [(r.name, _ns(r.median_ns), _ns(r.min_ns), _ns(r.p95_ns), _ns(r.stddev_ns),
+                 f'{r.runs}x{r.loops}', f'{r.median_ns / best:.2f}x') for r in self.results]
+        return '\n'.join(table.render(rows))
+
+    def to_json(self) -> dict:
+        return {'python': sys.version, 'results': [asdict(r) for r in self.results]}
+
+    def save(self, path: PathHint) -> None:
+        """Saves the results as JSON, to be used as a baseline by check"""
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(self.to_json(), file, indent=2)
+
+    def check(self, baseline: Union[PathHint, Mapping[str, BenchmarkResult]],
+              tolerance: float = .1) -> list[Regression]:
+        """Compares the medians with a baseline
+
+        :param baseline: a JSON file saved by save, or results by name
+        :param tolerance: how much slower a result can be, .1 means 10% slower
+        :return: the results slower than their baseline beyond the tolerance, results missing
+            from the baseline are ignored
+        """
+        if not isinstance(baseline, Mapping):
+            baseline = load_results(baseline)
+        regressions = []
+        for result in self.results:
+            base = baseline.get(result.name)
+            if base is not None and result.median_ns > base.median_ns * (1 + tolerance):
+                regressions.append(Regression(result.name, base.median_ns, result.median_ns))
+        return regressions
+
+
+def load_results(path: PathHint) -> dict[str, BenchmarkResult]:
+    """Loads the results saved by :meth:`Comparison.save`
+
+    :return: the results by name
+    """
+    with open(path, encoding='utf-8') as file:
+        data = json.load(file)
+    return {r['name']: BenchmarkResult(**r) for r in data['results']}
+
+
+def compare(candidates: Union[Mapping[str, Callable], Sequence[Callable]], *args, **options: Any) -> Comparison:
+    """Benchmarks some functions with the same arguments
+
+    :param candidates: the functions by name, or a sequence of functions named after their __qualname__
+    :param args: the positional arguments of every function
+    :param options: the options of :func:`benchmark`, the other keyword arguments are passed to the functions
+    :return: the results, from the fastest
+    """
+    if not isinstance(candidates, Mapping):
+        candidates = {getattr(f, '__qualname__', repr(f)): f for f in candidates}
+    return Comparison([benchmark(function, *args, name=name, **options) for name, function in candidates.items()])
+
+
+if __name__ == '__main__':
+    data = list(range(10_000, 0, -1))
+    print(benchmark(sorted, data))
+    print(compare({'sorted': lambda: sorted(data), 'sort copy': lambda: data.copy().sort()}, max_time=.3))
@@ -0,0 +1,432 @@
+"""
+Provides a thread safe registry of metrics: counters, gauges and latency histograms, which can be
+exported as JSON or in the Prometheus text format.
+
+Example:
+    @timed('db_write_seconds')
+    def write(row):
+        ...
+
+    @counted()
+    def scrape(url):
+        ...
+
+    errors = counter('scrape_errors_total', 'pages which could not be scraped')
+    errors.inc()
+
+    histogram('db_write_seconds').percentile(99)    # the 99th percentile of the write latency
+    registry.write('metrics.prom')                  # for the Prometheus textfile collector
+
+Histograms keep their values in logarithmic buckets, so they use little memory whatever the number
+of observations, and percentiles have a relative error lower than 1 / buckets_per_octave. Observing a
+value only appends it to a deque: a background thread counts the values in their buckets.
+"""
+
+__all__ = ["Counter", "Gauge", "Histogram", "Registry", "registry", "counter", "gauge", "histogram",
+           "timed", "counted"]
+
+__author__ = "Valerio Molinari"
+__credits__ = "Valerio Molinari"
+__maintainer__ = "Valerio Molinari"
+__email__ = "valeriomolinariprogrammazione@gmail.com"
+
+import collections
+import json
+import math
+import os
+import re
+import threading
+import weakref
+from itertools import repeat, starmap
+from time import perf_counter, sleep, time
+from typing import Callable, Literal, Optional
+from rizlib.documentation.types import PathHint
+from rizlib.tools.decorators import copy_func_attrs_in_wrapper
+
+
+class Counter:
+    kind = 'counter'
+
+    def __init__(self, name: str, help: str = '') -> None:
+        """A value which can only increase, like the number of calls of a function
+
+        :param name: the name of the metric
+        :param help: a description of the metric
+        """
+        self.name = name
+        self.help = help
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1) -> None:
+        if amount < 0:
+            raise ValueError("a counter can't decrease")
+        with self._lock:
+            self.value += amount
+
+    def snapshot(self) -> dict:
+        return {'value': self.value}
+
+    def _prometheus(self) -> list[str]:
+        return [f'{self.name} {self.value}']
+
+
+class Gauge(Counter):
+    kind = 'gauge'
+
+    def __init__(self, name: str, help: str = '') -> None:
+        """A value which can go up and down, like the size of a queue
+
+        :param name: the name of the metric
+        :param help: a description of the metric
+        """
+        super().__init__(name, help)
+
+    def inc(self, amount: float = 1) -> None:
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1) -> None:
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value: float) -> None:
+        with self._lock:
+            self.value = value
+
+
+class _Folder:
+    def __init__(self, interval: float) -> None:
+        """Counts the pending values of every live histogram in their buckets, from a background thread
+        which runs only while there are histograms
+
+        :param interval: the seconds between two folds
+        """
+        self.interval = interval
+        self.__histograms: weakref.WeakSet = weakref.WeakSet()
+        self.__lock = threading.Lock()
+        self.__thread: Optional[threading.Thread] = None
+
+    def add(self, histogram: 'Histogram') -> None:
+        with self.__lock:
+            self.__histograms.add(histogram)
+            if self.__thread is None:
+                self.__start()
+
+    def __start(self) -> None:
+        self.__thread = threading.Thread(target=self.__run, name='rizlib-metrics', daemon=True)
+        self.__thread.start()
+
+    def __run(self) -> None:
+        while True:
+            sleep(self.interval)
+            with self.__lock:
+                histograms = list(self.__histograms)
+                if not histograms:
+                    self.__thread = None
+                    return
+            for histogram in histograms:
+                histogram._fold()
+            del histograms, histogram  # the unused histograms must be collectable while sleeping
+
+    def _after_fork(self) -> None:
+        # only the forking thread survives in the child
+        self.__lock = threading.Lock()
+        self.__thread = None
+        if self.__histograms:
+            self.__start()
+
+
+_folder = _Folder(0.05)
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_folder._after_fork)
+
+
+class Histogram:
+    kind = 'histogram'
+
+    def __init__(self, name: str, help: str = '', buckets_per_octave: int = 16) -> None:
+        """The distribution of some positive values, like latencies in seconds.
+
+        Every power of 2 is split in buckets_per_octave geometric buckets, so a value is counted in a bucket
+        whose bounds differ by less than 1 / buckets_per_octave of the value. Values lower or equal
+        to 0 are counted in a bucket of their own.
+
+        Observed values are appended to a deque, which is thread safe without locks, and they're
+        counted in their buckets in batches, by a background thread every 50 ms or when the histogram
+        is read, so observing a value costs little more than the append.
+
+        :param name: the name of the metric
+        :param help: a description of the metric
+        :param buckets_per_octave: the precision of the histogram
+        """
+        self.name = name
+        self.help = help
+        self.buckets_per_octave = buckets_per_octave
+        self.__count = 0
+        self.__sum = 0.
+        self.__min = math.inf
+        self.__max = -math.inf
+        self.__buckets: collections.Counter = collections.Counter()
+        self.__pending: collections.deque = collections.deque()
+        self._lock = threading.Lock()
+        # the bound append, which skips the call of the method below
+        self.observe = self.__pending.append
+        _folder.add(self)
+
+    def observe(self, value: float) -> None:
+        """Records a value, which is counted in its bucket by the next fold"""
+        self.__pending.append(value)
+
+    def _fold(self) -> None:
+        pending = self.__pending
+        if not pending:
+            return
+        with self._lock:
+            popleft = pending.popleft
+            # values appended meanwhile stay in the deque, for the next fold
+            values = list(starmap(popleft, repeat((), len(pending))))
+            if not values:
+                return
+            octave = float(self.buckets_per_octave)
+            positive = values if min(values) > 0 else [v for v in values if v > 0]
+            # maps of builtins only, the fold runs no bytecode per value
+            self.__buckets.update(list(map(math.floor, map(octave.__mul__, map(math.log2, positive)))))
+            if len(positive) < len(values):
+                self.__buckets[None] += len(values) - len(positive)
+            self.__count += len(values)
+            self.__sum += math.fsum(values)
+            self.__min = min(self.__min, min(values))
+            self.__max = max(self.__max, max(values))
+
+    @property
+    def count(self) -> int:
+        self._fold()
+        return self.__count
+
+    @property
+    def sum(self) -> float:
+        self._fold()
+        return self.__sum
+
+    @property
+    def min(self) -> float:
+        self._fold()
+        return self.__min
+
+    @property
+    def max(self) -> float:
+        self._fold()
+        return self.__max
+
+    def _upper_bound(self, index: Optional[int]) -> float:
+        if index is None:
+            return 0.
+        return 2 ** ((index + 1) / self.buckets_per_octave)
+
+    def buckets(self) -> list[tuple[float, int]]:
+        """Returns the non empty buckets as (upper bound, count), from the lowest"""
+        self._fold()
+        with self._lock:
+            items = list(self.__buckets.items())
+        items.sort(key=lambda item: -math.inf if item[0] is None else item[0])
+        return [(self._upper_bound(index), count) for index, count in items]
+
+    def percentile(self, q: float) -> float:
+        """Returns an estimate of the q-th percentile, the upper bound of its bucket clamped to
+        the observed range, or nan without observations
+
+        :param q: a percentile between 0 and 100
+        """
+        buckets = self.buckets()
+        total = sum(count for _, count in buckets)
+        if not total:
+            return math.nan
+        rank = max(1, math.ceil(q / 100 * total))
+        seen = 0
+        for bound, count in buckets:
+            seen += count
+            if seen >= rank:
+                return min(max(bound, self.__min), self.__max)
+        return self.__max
+
+    @property
+    def mean(self) -> float:
+        count = self.count
+        return self.__sum / count if count else math.nan
+
+    def snapshot(self) -> dict:
+        empty = not self.count
+        return {'count': self.__count, 'sum': self.__sum, 'min': None if empty else self.__min,
+                'max': None if empty else self.__max, 'mean': None if empty else self.mean,
+                **{f'p{q}': None if empty else self.percentile(q) for q in (50, 90, 95, 99)}}
+
+    def _prometheus(self) -> list[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in self.buckets():
+            cumulative += count
+            lines.append(f'{self.name}_bucket{{le="{bound:.6g}"}} {cumulative}')
+        lines.append(f'{self.name}_bucket{{le="+Inf"}} {cumulative}')
+        lines.append(f'{self.name}_sum {self.__sum}')
+        lines.append(f'{self.name}_count {cumulative}')
+        return lines
+
+
+class Registry:
+    def __init__(self) -> None:
+        """A collection of metrics by name. Getting a metric which doesn't exist creates it."""
+        self.__metrics: dict[str, object] = {}
+        self.__lock = threading.Lock()
+
+    def __get(self, cls, name: str, help: str, **kwargs):
+        metric = self.__metrics.get(name)
+        if metric is None:
+            with self.__lock:
+                metric = self.__metrics.get(name)
+                if metric is None:
+                    metric = self.__metrics[name] = cls(name, help, **kwargs)
+        if type(metric) is not cls:
+            raise TypeError(f'{name} is a {metric.kind}, not a {cls.kind}')
+        return metric
+
+    def counter(self, name: str, help: str = '') -> Counter:
+        return self.__get(Counter, name, help)
+
+    def gauge(self, name: str, help: str = '') -> Gauge:
+        return self.__get(Gauge, name, help)
+
+    def histogram(self, name: str, help: str = '', buckets_per_octave: int = 16) -> Histogram:
+        return self.__get(Histogram, name, help, buckets_per_octave=buckets_per_octave)
+
+    def __getitem__(self, name: str):
+        return self.__metrics[name]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.__metrics
+
+    def unregister(self, name: str) -> None:
+        with self.__lock:
+            self.__metrics.pop(name, None)
+
+    def snapshot(self) -> dict:
+        """Returns the current values of every metric"""
+        with self.__lock:
+            metrics = list(self.__metrics.values())
+        return {'time': time(),
+                'metrics': {m.name: {'type': m.kind, 'help': m.help, **m.snapshot()} for m in metrics}}
+
+    def to_json(self) -> str:
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self) -> str:
+        """Returns every metric in the Prometheus text exposition format"""
+        with self.__lock:
+            metrics = list(self.__metrics.values())
+        lines = []
+        for metric in metrics:
+            if metric.help:
+                lines.append(f'# HELP {metric.name} {metric.help}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            lines.extend(metric._prometheus())
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path: PathHint, format: Literal['prometheus', 'json'] = 'prometheus') -> None:
+        """Writes every metric to a file, replacing it atomically so that readers never see half a file
+
+        :param path: the path of the file
+        :param format: 'prometheus' or 'json'
+        """
+        if format not in ('prometheus', 'json'):
+            raise ValueError(f"unknown metrics format {format!r}")
+        text = self.to_prometheus() if format == 'prometheus' else self.to_json()
+        tmp = f'{os.fspath(path)}.tmp'
+        with open(tmp, 'w', encoding='utf-8') as file:
+            file.write(text)
+        os.replace(tmp, path)
+
+
+registry = Registry()
+
+
+def counter(name: str, help: str = '') -> Counter:
+    """Returns the counter called name of the default registry, creating it if needed"""
+    return registry.counter(name, help)
+
+
+def gauge(name: str, help: str = '') -> Gauge:
+    """Returns the gauge called name of the default registry, creating it if needed"""
+    return registry.gauge(name, help)
+
+
+def histogram(name: str, help: str = '', buckets_per_octave: int = 16) -> Histogram:
+    """Returns the histogram called name of the default registry, creating it if needed"""
+    return registry.histogram(name, help, buckets_per_octave)
+
+
+def _metric_name(function: Callable, suffix: str) -> str:
+    while hasattr(function, '__wrapped__'):  # the name of the decorated function, not of a wrapper
+        function = function.__wrapped__
+    name = f'{function.__module__}_{function.__qualname__}_{suffix}'
+    return re.sub(r'[^a-zA-Z0-9_:]+', '_', name.replace('<locals>.', ''))
+
+
+def timed(name: Optional[str] = None, help: str = '', metrics: Optional[Registry] = None) -> Callable:
+    """A decorator which observes the duration in seconds of every call of a function in a histogram
+
+    :param name: the name of the histogram, "<module>_<function>_seconds" by default
+    :param help: a description of the metric
+    :param metrics: the registry of the histogram, the default one if None
+    """
+
+    def decorator(function: Callable) -> Callable:
+        observe = (metrics or registry).histogram(name or _metric_name(function, 'seconds'), help).observe
+
+        def wrapper(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                observe(perf_counter() - start)
+
+        copy_func_attrs_in_wrapper(wrapper, function)
+        return wrapper
+
+    return decorator
+
+
+def counted(name: Optional[str] = None, help: str = '', metrics: Optional[Registry] = None) -> Callable:
+    """A decorator which counts the calls of a function
+
+    :param name: the name of the counter, "<module>_<function>_calls_total" by default
+    :param help: a description of the metric
+    :param metrics: the registry of the counter, the default one if None
+    """
+
+    def decorator(function: Callable) -> Callable:
+        calls = (metrics or registry).counter(name or _metric_name(function, 'calls_total'), help)
+        lock = calls._lock
+
+        def wrapper(*args, **kwargs):
+            with lock:
+                calls.value += 1
+            return function(*args, **kwargs)
+
+        copy_func_attrs_in_wrapper(wrapper, function)
+        return wrapper
+
+    return decorator
+
+
+if __name__ == '__main__':
+    import random
+
+    @counted()
+    @timed()
+    def work():
+        return sum(range(random.randint(100, 10_000)))
+
+    for _ in range(1000):
+        work()
+    print(registry.to_prometheus()[:400])
+    print(registry.to_json()[:600])
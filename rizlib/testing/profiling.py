@@ -0,0 +1,450 @@
+"""
+Provides decorators which profile a function across all its calls, from any thread.
+
+Three profilers are available:
+    cprofile    deterministic profiling with cProfile, precise but slowing every call down
+    sampling    a background thread samples the stacks of the running calls every interval seconds,
+                with a cost which doesn't depend on the number of calls
+    memory      tracemalloc tracking of the peak and net memory allocated by every call
+
+Example:
+    @profile(mode='sampling', interval=.005)
+    def parse(line):
+        ...
+
+    for line in lines:
+        parse(line)
+    print(parse.profiler.report())
+
+Profiling is enabled by the enabled argument or, when it isn't passed, by the RIZLIB_PROFILE
+environment variable. A disabled decorator returns a wrapper which only calls the function, costing
+a single call, and whose profiler attribute only reports that profiling is disabled.
+"""
+
+__all__ = ["Profiler", "CProfiler", "SamplingProfiler", "MemoryProfiler", "profile", "profilers"]
+
+__author__ = "Valerio Molinari"
+__credits__ = "Valerio Molinari"
+__maintainer__ = "Valerio Molinari"
+__email__ = "valeriomolinariprogrammazione@gmail.com"
+
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import tracemalloc
+from collections import Counter
+from time import perf_counter_ns, sleep
+from typing import Callable, Literal, Optional
+from rizlib.documentation.types import PathHint
+from rizlib.tools.decorators import copy_func_attrs_in_wrapper
+
+Mode = Literal['cprofile', 'sampling', 'memory']
+
+# since 3.12 cProfile relies on sys.monitoring, which allows one active profiler for every thread
+_SHARED_PROFILER = sys.version_info >= (3, 12)
+
+
+class Profiler:
+    def __init__(self, name: str) -> None:
+        """Base class of the profilers, which count the calls and their total duration
+
+        :param name: the name of the profiled function
+        """
+        self.name = name
+        self.calls = 0
+        self.total_ns = 0
+        self._lock = threading.Lock()
+
+    def run(self, function: Callable, args: tuple, kwargs: dict):
+        """Calls function(*args, **kwargs) profiling it"""
+        raise NotImplementedError
+
+    def _count(self, elapsed: int) -> None:
+        with self._lock:
+            self.calls += 1
+            self.total_ns += elapsed
+
+    def _header(self) -> str:
+        mean = self.total_ns / self.calls / 1e3 if self.calls else 0.
+        return f'{self.name}: {self.calls} calls, {self.total_ns / 1e6:.3f} ms total, {mean:.1f} us per call\n'
+
+    def report(self, limit: int = 20) -> str:
+        """Returns a report of the profile, from the hottest entry
+
+        :param limit: the number of entries shown
+        """
+        return self._header()
+
+    def reset(self) -> None:
+        """Forgets what has been profiled so far"""
+        with self._lock:
+            self.calls = 0
+            self.total_ns = 0
+
+
+class CProfiler(Profiler):
+    def __init__(self, name: str, sort: str = 'cumulative') -> None:
+        """Profiles every call with cProfile. Every thread has its own cProfile.Profile,
+        the report merges them all. Since Python 3.12 a profiler traces every thread, so a single
+        one is enabled while at least a call is running, and it also records the other threads.
+
+        The report should be taken when no call is running.
+
+        :param name: the name of the profiled function
+        :param sort: the pstats sort key of the report
+        """
+        super().__init__(name)
+        self.sort = sort
+        self.__local = threading.local()
+        self.__profiles: list[cProfile.Profile] = []
+        self.__running = 0
+
+    def run(self, function: Callable, args: tuple, kwargs: dict):
+        if _SHARED_PROFILER:
+            return self.__run_shared(function, args, kwargs)
+        local = self.__local
+        profile = getattr(local, 'profile', None)
+        if profile is None:
+            profile = local.profile = cProfile.Profile()
+            local.depth = 0
+            with self._lock:
+                self.__profiles.append(profile)
+        if local.depth:  # a recursive call, already profiled by the outer one
+            return function(*args, **kwargs)
+
+        local.depth += 1
+        start = perf_counter_ns()
+        profile.enable()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            profile.disable()
+            local.depth -= 1
+            self._count(perf_counter_ns() - start)
+
+    def __run_shared(self, function: Callable, args: tuple, kwargs: dict):
+        with self._lock:
+            if not self.__profiles:
+                self.__profiles.append(cProfile.Profile())
+            profile = self.__profiles[0]
+            self.__running += 1
+            if self.__running == 1:
+                profile.enable()
+        start = perf_counter_ns()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            elapsed = perf_counter_ns() - start
+            with self._lock:
+                self.__running -= 1
+                if not self.__running:
+                    profile.disable()
+                self.calls += 1
+                self.total_ns += elapsed
+
+    def stats(self) -> Optional[pstats.Stats]:
+        """Returns the merged statistics of every thread, None if nothing was profiled"""
+        with self._lock:
+            profiles = list(self.__profiles)
+        stats = None
+        for profile in profiles:
+            profile.create_stats()
+            if not profile.stats:
+                continue
+            if stats is None:
+                stats = pstats.Stats(profile, stream=io.StringIO())
+            else:
+                stats.add(profile)
+        return stats
+
+    def report(self, limit: int = 20) -> str:
+        stats = self.stats()
+        if stats is None:
+            return self._header()
+        stats.stream = io.StringIO()
+        stats.sort_stats(self.sort).print_stats(limit)
+        return self._header() + stats.stream.getvalue()
+
+    def dump(self, path: PathHint) -> None:
+        """Saves the merged statistics in the pstats format, to be opened by pstats or snakeviz"""
+        stats = self.stats()
+        if stats is None:
+            raise ValueError(f'{self.name} has not been profiled yet')
+        stats.dump_stats(path)
+
+    def reset(self) -> None:
+        super().reset()
+        with self._lock:
+            self.__profiles = []
+        self.__local = threading.local()
+
+
+class SamplingProfiler(Profiler):
+    def __init__(self, name: str, code=None, interval: float = .001) -> None:
+        """Samples the stacks of the threads running the profiled function every interval seconds,
+        from a background thread which sleeps while no call is running. The calls themselves
+        only register their thread, so the cost is the same for short and long functions.
+
+        :param name: the name of the profiled function
+        :param code: the code object of the profiled function, where the sampled stacks are cut
+        :param interval: the seconds between two samples
+        """
+        super().__init__(name)
+        self.code = code
+        self.interval = interval
+        self.samples = 0
+        self.__own = Counter()
+        self.__inclusive = Counter()
+        self.__paths = Counter()
+        self.__running: dict[int, int] = {}
+        self.__active = threading.Event()
+        self.__thread: Optional[threading.Thread] = None
+
+    def run(self, function: Callable, args: tuple, kwargs: dict):
+        ident = threading.get_ident()
+        running = self.__running
+        with self._lock:
+            running[ident] = running.get(ident, 0) + 1
+            if self.__thread is None:
+                self.__thread = threading.Thread(target=self.__sample, name='rizlib-sampler', daemon=True)
+                self.__thread.start()
+        self.__active.set()
+        start = perf_counter_ns()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            elapsed = perf_counter_ns() - start
+            with self._lock:
+                self.calls += 1
+                self.total_ns += elapsed
+                depth = running.pop(ident) - 1
+                if depth:
+                    running[ident] = depth
+                elif not running:
+                    self.__active.clear()
+
+    def __sample(self) -> None:
+        own, inclusive, paths = self.__own, self.__inclusive, self.__paths
+        while True:
+            self.__active.wait()
+            frames = sys._current_frames()
+            with self._lock:
+                idents = list(self.__running)
+            for ident in idents:
+                frame = frames.get(ident)
+                path = []
+                while frame is not None:
+                    code = frame.f_code
+                    path.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})')
+                    if code is self.code:
+                        break
+                    frame = frame.f_back
+                if not path or frame is None and self.code is not None:
+                    continue  # the thread is entering or leaving the function
+                path.reverse()
+                with self._lock:
+                    self.samples += 1
+                    own[path[-1]] += 1
+                    inclusive.update(set(path))
+                    paths[' > '.join(path)] += 1
+            del frames
+            sleep(self.interval)
+
+    def report(self, limit: int = 20) -> str:
+        with self._lock:
+            samples = self.samples or 1
+            lines = [self._header().rstrip('\n') + f', {self.samples} samples every {self.interval * 1e3:g} ms']
+            lines.append('\n  own%  total%  line')
+            for line, count in self.__own.most_common(limit):
+                lines.append(f'{count / samples:6.1%}  {self.__inclusive[line] / samples:6.1%}  {line}')
+            lines.append('\n  samples  hot path')
+            for path, count in self.__paths.most_common(limit):
+                lines.append(f'{count:9}  {path}')
+        return '\n'.join(lines) + '\n'
+
+    def reset(self) -> None:
+        with self._lock:
+            self.calls = self.total_ns = self.samples = 0
+            self.__own.clear()
+            self.__inclusive.clear()
+            self.__paths.clear()
+
+
+class _DisabledProfiler(Profiler):
+    """The profiler of a function whose profiling is disabled, which only tells how to enable it"""
+
+    def run(self, function: Callable, args: tuple, kwargs: dict):
+        return function(*args, **kwargs)
+
+    def report(self, limit: int = 20) -> str:
+        return f'{self.name}: profiling is disabled, set RIZLIB_PROFILE=1 or pass enabled=True\n'
+
+
+# the calls of the memory profilers which are running, and whether tracemalloc was started by them
+_tracing_lock = threading.Lock()
+_tracing_calls = 0
+_tracing_owned = False
+
+
+def _start_tracing(frames: int) -> bool:
+    """Starts tracemalloc if it isn't running, returns whether it was started by the profilers"""
+    global _tracing_calls, _tracing_owned
+    with _tracing_lock:
+        if not _tracing_calls and not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+            _tracing_owned = True
+        _tracing_calls += 1
+        return _tracing_owned
+
+
+def _stop_tracing() -> None:
+    """Stops tracemalloc when the last running call returns, unless it was already running before"""
+    global _tracing_calls, _tracing_owned
+    with _tracing_lock:
+        _tracing_calls -= 1
+        if not _tracing_calls and _tracing_owned:
+            tracemalloc.stop()
+            _tracing_owned = False
+
+
+class MemoryProfiler(Profiler):
+    def __init__(self, name: str, frames: int = 1) -> None:
+        """Tracks with tracemalloc the memory allocated by every call: its peak and what is still
+        allocated when it returns.
+
+        If tracemalloc isn't running, it's started by the call and stopped when it returns, or when the last
+        of the profiled calls running at the same time returns. If it was already running, e.g. with
+        PYTHONTRACEMALLOC=1, it's left running and the report also shows what has been allocated since
+        the first call, by line.
+
+        tracemalloc traces the whole process, so calls running at the same time in different threads
+        are charged with each other's allocations.
+
+        :param name: the name of the profiled function
+        :param frames: the frames stored by tracemalloc for every allocation, when it's started here
+        """
+        super().__init__(name)
+        self.frames = frames
+        self.max_peak = 0
+        self.total_peak = 0
+        self.net = 0
+        self.__baseline: Optional[tracemalloc.Snapshot] = None
+
+    def run(self, function: Callable, args: tuple, kwargs: dict):
+        owned = _start_tracing(self.frames)
+        try:
+            if self.__baseline is None and not owned:
+                self.__baseline = tracemalloc.take_snapshot()
+            before = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            start = perf_counter_ns()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                elapsed = perf_counter_ns() - start
+                current, peak = tracemalloc.get_traced_memory()
+                with self._lock:
+                    self.calls += 1
+                    self.total_ns += elapsed
+                    self.max_peak = max(self.max_peak, peak - before)
+                    self.total_peak += peak - before
+                    self.net += current - before
+        finally:
+            _stop_tracing()
+
+    def report(self, limit: int = 20) -> str:
+        mean = self.total_peak / self.calls if self.calls else 0
+        lines = [self._header().rstrip('\n'),
+                 f'peak: {self.max_peak / 1024:.1f} KiB max, {mean / 1024:.1f} KiB mean, '
+                 f'net: {self.net / 1024:+.1f} KiB']
+        if self.__baseline is not None and tracemalloc.is_tracing():
+            lines.append('\nallocated since the first call, by line:')
+            diff = tracemalloc.take_snapshot().compare_to(self.__baseline, 'lineno')
+            lines.extend(f'  {stat}' for stat in diff[:limit])
+        return '\n'.join(lines) + '\n'
+
+    def reset(self) -> None:
+        super().reset()
+        self.max_peak = self.total_peak = self.net = 0
+        self.__baseline = None
+
+
+_profilers: list[Profiler] = []
+
+
+def profilers() -> list[Profiler]:
+    """Returns the profilers created by the enabled profile decorators"""
+    return list(_profilers)
+
+
+def profile(function: Optional[Callable] = None,
+            *,
+            mode: Mode = 'cprofile',
+            enabled: Optional[bool] = None,
+            interval: float = .001,
+            sort: str = 'cumulative',
+            frames: int = 1) -> Callable:
+    """A decorator which profiles every call of a function. The profiler is available as the profiler
+    attribute of the decorated function, e.g. function.profiler.report().
+
+    It can be used with or without arguments: @profile or @profile(mode='memory').
+
+    :param function: the decorated function
+    :param mode: 'cprofile', 'sampling' or 'memory', see :mod:`rizlib.testing.profiling`
+    :param enabled: if False, the function is only called by the wrapper, whose profiler attribute reports
+        that profiling is disabled. By default profiling is enabled
+        if the RIZLIB_PROFILE environment variable is set to anything but 0 or an empty string
+    :param interval: the seconds between two samples, for the sampling mode
+    :param sort: the pstats sort key of the report, for the cprofile mode
+    :param frames: the frames stored for every allocation, for the memory mode
+    """
+    if enabled is None:
+        enabled = os.environ.get('RIZLIB_PROFILE', '') not in ('', '0')
+    if mode not in ('cprofile', 'sampling', 'memory'):
+        raise ValueError(f"unknown profiling mode {mode!r}")
+
+    def decorator(function: Callable) -> Callable:
+        name = getattr(function, '__qualname__', function.__name__)
+        if not enabled:
+            profiler = _DisabledProfiler(name)
+
+            # the user's function is left untouched, the profiler lives on the wrapper only
+            def wrapper(*args, **kwargs):
+                return function(*args, **kwargs)
+        else:
+            if mode == 'cprofile':
+                profiler = CProfiler(name, sort)
+            elif mode == 'sampling':
+                profiler = SamplingProfiler(name, getattr(function, '__code__', None), interval)
+            else:
+                profiler = MemoryProfiler(name, frames)
+            _profilers.append(profiler)
+            run = profiler.run
+
+            def wrapper(*args, **kwargs):
+                return run(function, args, kwargs)
+
+        copy_func_attrs_in_wrapper(wrapper, function)
+        wrapper.profiler = profiler
+        return wrapper
+
+    return decorator(function) if function is not None else decorator
+
+
+if __name__ == '__main__':
+    def fib(n: int) -> int:
+        return n if n < 2 else fib(n - 1) + fib(n - 2)
+
+    @profile(mode='sampling', enabled=True)
+    def work(n: int) -> list:
+        return [fib(20) for _ in range(n)]
+
+    threads = [threading.Thread(target=work, args=(20,)) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    print(work.profiler.report(5))
@@ -5,15 +5,17 @@ from rizlib.tools.decorators import copy_func_attrs_in_wrapper
 
 def speed_test(function: Callable) -> Callable:
     """A decorator used to calculate the time execution of a function.
-    Returns a 2-tuple with the return value of the function and the elapsed time.
+    Returns a 2-tuple with the return value of the function and the elapsed time in seconds.
+
+    It times a single call, see :mod:`rizlib.testing.benchmarking` for reliable measures.
 
     :param function: the decorated function
     :return: a tuple with the value returned by the function and the elapsed type
     """
     def wrapper(*args, **kwargs) -> tuple[Any, float]:
-        t = time.time()
+        t = time.perf_counter_ns()
         f = function(*args, **kwargs)
-        return f, time.time() - t
+        return f, (time.perf_counter_ns() - t) / 1e9
 
     copy_func_attrs_in_wrapper(wrapper, function)
     return wrapper
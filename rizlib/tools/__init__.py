@@ -0,0 +1,16 @@
+from rizlib.tools.lazy import lazy_exports
+
+__getattr__, __dir__, __all__ = lazy_exports(__name__, globals(), {
+    'copy_func_attrs_in_wrapper': 'decorators',
+    'memoize': 'decorators',
+    'lru_cache': 'decorators',
+    'lfu_cache': 'decorators',
+    'ttl_cache': 'decorators',
+    'Cache': 'decorators',
+    'CacheInfo': 'decorators',
+    'batched': 'decorators',
+    'lazy_exports': 'lazy',
+    'pmap': 'parallelism',
+    'parallel': 'parallelism',
+    'ParallelError': 'parallelism',
+}, submodules=['decorators', 'lazy', 'parallelism'])
@@ -1,13 +1,530 @@
-from typing import Callable
+"""
+Provides general purpose decorators and the tools to write them.
+
+The memoize family caches the results of pure functions, evicting them by recency (LRU),
+frequency (LFU), age (TTL) or memory footprint, optionally keeping them on disk too.
+
+Example:
+    @lru_cache(maxsize=10_000, ttl=3600)
+    def lookup(code: str) -> dict:
+        ...
+
+    @memoize(policy='lfu', max_memory=100_000_000, disk='~/.cache/rizlib/parse')
+    def parse(page: str) -> Document:
+        ...
+
+    lookup.cache_info()     # CacheInfo(hits=..., misses=..., ...)
+
+The batched decorator coalesces concurrent calls on single items into a call on a list of items,
+for backends which are much faster in bulk.
+"""
+
+__all__ = ["copy_func_attrs_in_wrapper", "memoize", "lru_cache", "lfu_cache", "ttl_cache", "Cache", "CacheInfo",
+           "batched"]
+
+__author__ = "Valerio Molinari"
+__credits__ = "Valerio Molinari"
+__maintainer__ = "Valerio Molinari"
+__email__ = "valeriomolinariprogrammazione@gmail.com"
+
+import functools
+import os
+import sys
+import threading
+from collections import OrderedDict, namedtuple
+from time import monotonic, time
+from typing import Any, Callable, Hashable, Literal, Optional
+from rizlib.documentation.types import PathHint
+
+# this module is imported by the colors module, so pickle and hashlib are imported by the disk tier only
 
 
 def copy_func_attrs_in_wrapper(wrapper: Callable, function: Callable):
     """Used to copy dunder attributes of a function inside its wrapper
-    in order to make the wrapper emulate the function
+    in order to make the wrapper emulate the function, like functools.update_wrapper does:
+    __module__, __name__, __qualname__, __doc__, __annotations__, __dict__ and __wrapped__
 
     :param wrapper: the wrapper inside the decorator
     :param function: the function called inside the wrapper
     """
-    attrs = ['__name__', '__doc__']
-    for attr in attrs:
-        setattr(wrapper, attr, getattr(function, attr))
+    functools.update_wrapper(wrapper, function)
+
+
+class CacheInfo(namedtuple('CacheInfo', 'hits disk_hits misses evictions expirations size memory')):
+    """The statistics of a cache
+
+    Args:
+        hits: calls answered from memory
+        disk_hits: calls answered from the disk tier
+        misses: calls which computed the result
+        evictions: results removed to respect maxsize or max_memory
+        expirations: results removed because older than the ttl
+        size: the results in memory
+        memory: the weight of the results in memory, if max_memory is set
+    """
+    __slots__ = ()
+
+    @property
+    def hit_ratio(self) -> float:
+        calls = self.hits + self.disk_hits + self.misses
+        return (self.hits + self.disk_hits) / calls if calls else 0.
+
+
+class _Entry:
+    __slots__ = ('value', 'weight', 'expires', 'frequency')
+
+    def __init__(self, value: Any, weight: int, expires: float) -> None:
+        self.value = value
+        self.weight = weight
+        self.expires = expires
+        self.frequency = 1
+
+
+_MISSING = object()
+
+
+class Cache:
+    def __init__(self,
+                 policy: Literal['lru', 'lfu'] = 'lru',
+                 maxsize: Optional[int] = 128,
+                 *,
+                 ttl: Optional[float] = None,
+                 max_memory: Optional[int] = None,
+                 weigh: Callable[[Any], int] = sys.getsizeof,
+                 disk: Optional[PathHint] = None
+                 ) -> None:
+        """A thread safe mapping of results, used by :func:`memoize`.
+
+        The least recently used (lru) or the least frequently used (lfu) results are evicted when
+        there are more than maxsize results or their total weight exceeds max_memory. Every operation
+        costs O(1), apart from evicting by memory which removes as many results as needed.
+
+        With a disk directory, every result is also pickled in a file of its own, so it survives
+        the process and results evicted from memory are loaded back instead of being computed again.
+
+        :param policy: 'lru' or 'lfu'
+        :param maxsize: the maximum number of results in memory, no limit if None
+        :param ttl: the seconds after which a result expires, both in memory and on disk, no limit if None
+        :param max_memory: the maximum total weight of the results in memory, no limit if None
+        :param weigh: returns the weight of a result, by default its shallow size in bytes
+        :param disk: (optional) the directory of the disk tier
+        """
+        if policy not in ('lru', 'lfu'):
+            raise ValueError(f"unknown cache policy {policy!r}")
+        self.policy = policy
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.max_memory = max_memory
+        self.weigh = weigh
+        self.disk = os.path.expanduser(os.fsdecode(disk)) if disk is not None else None
+        if self.disk is not None:
+            os.makedirs(self.disk, exist_ok=True)
+
+        self.__lock = threading.RLock()
+        self.__entries: dict[Hashable, _Entry] = {}
+        # lru: a single bucket ordered by recency, lfu: a bucket for every frequency ordered by recency
+        self.__buckets: dict[int, OrderedDict] = {1: OrderedDict()}
+        self.__min_frequency = 1
+        self.__memory = 0
+        self.__hits = self.__disk_hits = self.__misses = self.__evictions = self.__expirations = 0
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key, _MISSING, count=False) is not _MISSING
+
+    def get(self, key: Hashable, default: Any = None, count: bool = True) -> Any:
+        """Returns the result stored under key, or default
+
+        :param key: the key of the result
+        :param default: returned when there's no result
+        :param count: if False, the statistics aren't updated
+        """
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is not None:
+                if self.ttl is not None and entry.expires <= monotonic():
+                    self.__remove(key)
+                    self.__expirations += 1
+                else:
+                    self.__touch(key, entry)
+                    if count:
+                        self.__hits += 1
+                    return entry.value
+
+        if self.disk is not None:
+            value = self.__load(key)
+            if value is not _MISSING:
+                self.__store(key, value)
+                if count:
+                    with self.__lock:
+                        self.__disk_hits += 1
+                return value
+
+        if count:
+            with self.__lock:
+                self.__misses += 1
+        return default
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Stores a result in memory and on disk"""
+        self.__store(key, value)
+        if self.disk is not None:
+            self.__dump(key, value)
+
+    def __store(self, key: Hashable, value: Any) -> None:
+        weight = self.weigh(value) if self.max_memory is not None else 0
+        if self.max_memory is not None and weight > self.max_memory:
+            return
+        expires = monotonic() + self.ttl if self.ttl is not None else 0.
+        with self.__lock:
+            if key in self.__entries:
+                self.__remove(key)
+            # evicting before inserting, so that lfu never evicts the new result
+            while self.__entries and (
+                    (self.maxsize is not None and len(self.__entries) >= self.maxsize) or
+                    (self.max_memory is not None and self.__memory + weight > self.max_memory)):
+                self.__evict()
+            if self.maxsize == 0:
+                return
+            self.__entries[key] = _Entry(value, weight, expires)
+            self.__buckets[1][key] = None
+            self.__min_frequency = 1
+            self.__memory += weight
+
+    def __touch(self, key: Hashable, entry: _Entry) -> None:
+        if self.policy == 'lru':
+            self.__buckets[1].move_to_end(key)
+            return
+        frequency = entry.frequency
+        bucket = self.__buckets[frequency]
+        del bucket[key]
+        if not bucket:
+            if frequency > 1:
+                del self.__buckets[frequency]
+            if self.__min_frequency == frequency:
+                self.__min_frequency = frequency + 1
+        entry.frequency += 1
+        self.__buckets.setdefault(entry.frequency, OrderedDict())[key] = None
+
+    def __remove(self, key: Hashable) -> _Entry:
+        entry = self.__entries.pop(key)
+        frequency = entry.frequency if self.policy == 'lfu' else 1
+        bucket = self.__buckets[frequency]
+        del bucket[key]
+        if not bucket and frequency > 1:
+            del self.__buckets[frequency]
+        self.__memory -= entry.weight
+        return entry
+
+    def __evict(self) -> None:
+        buckets = self.__buckets
+        if self.policy == 'lfu' and not buckets.get(self.__min_frequency):
+            self.__min_frequency = min((f for f, b in buckets.items() if b), default=1)
+        key = next(iter(buckets[self.__min_frequency if self.policy == 'lfu' else 1]))
+        self.__remove(key)
+        self.__evictions += 1
+
+    def __path(self, key: Hashable) -> Optional[str]:
+        import hashlib
+        import pickle
+
+        try:
+            digest = hashlib.sha256(pickle.dumps(key, protocol=4)).hexdigest()
+        except (pickle.PicklingError, TypeError, AttributeError):
+            return None
+        return os.path.join(self.disk, f'{digest}.pickle')
+
+    def __load(self, key: Hashable) -> Any:
+        import pickle
+
+        path = self.__path(key)
+        if path is None:
+            return _MISSING
+        try:
+            if self.ttl is not None and os.stat(path).st_mtime + self.ttl <= time():
+                os.remove(path)
+                return _MISSING
+            with open(path, 'rb') as file:
+                stored_key, value = pickle.load(file)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return _MISSING
+        return value if stored_key == key else _MISSING
+
+    def __dump(self, key: Hashable, value: Any) -> None:
+        import pickle
+
+        path = self.__path(key)
+        if path is None:
+            return
+        tmp = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        try:
+            with open(tmp, 'wb') as file:
+                pickle.dump((key, value), file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, path)
+        except (pickle.PicklingError, TypeError, AttributeError, OSError):
+            # the disk tier is best effort: an unpicklable result or a full, read only or
+            # missing directory only means the result isn't kept on disk
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+
+    def clear(self, disk: bool = False) -> None:
+        """Removes every result from memory and resets the statistics
+
+        :param disk: if True, the disk tier is emptied too
+        """
+        with self.__lock:
+            self.__entries.clear()
+            self.__buckets = {1: OrderedDict()}
+            self.__min_frequency = 1
+            self.__memory = 0
+            self.__hits = self.__disk_hits = self.__misses = self.__evictions = self.__expirations = 0
+        if disk and self.disk is not None:
+            for entry in os.scandir(self.disk):
+                if entry.name.endswith('.pickle'):
+                    try:
+                        os.remove(entry.path)
+                    except FileNotFoundError:
+                        pass
+
+    def info(self) -> CacheInfo:
+        with self.__lock:
+            return CacheInfo(self.__hits, self.__disk_hits, self.__misses, self.__evictions,
+                             self.__expirations, len(self.__entries), self.__memory)
+
+
+class _KeywordMark:
+    """Separates the positional arguments from the keyword ones in a cache key.
+    It's pickled by reference, so keys read back from the disk compare equal to the new ones."""
+    __slots__ = ()
+
+    def __reduce__(self) -> str:
+        return '_KWD_MARK'
+
+    def __repr__(self) -> str:
+        return '<keyword arguments>'
+
+
+_KWD_MARK = _KeywordMark()
+
+
+def _make_key(args: tuple, kwargs: dict, typed: bool) -> Hashable:
+    key = args
+    if kwargs:
+        key += (_KWD_MARK, *kwargs.items())
+    if typed:
+        key += tuple(type(v) for v in args) + tuple(type(v) for v in kwargs.values())
+    elif len(key) == 1 and type(key[0]) in (int, str):
+        return key[0]
+    return key
+
+
+def memoize(function: Optional[Callable] = None,
+            *,
+            policy: Literal['lru', 'lfu'] = 'lru',
+            maxsize: Optional[int] = 128,
+            ttl: Optional[float] = None,
+            max_memory: Optional[int] = None,
+            weigh: Callable[[Any], int] = sys.getsizeof,
+            disk: Optional[PathHint] = None,
+            typed: bool = False) -> Callable:
+    """A decorator which caches the results of a function by its arguments, see :class:`Cache`.
+
+    It can be used with or without arguments: @memoize or @memoize(policy='lfu', maxsize=1000).
+    The decorated function keeps the metadata of the original one and has three more attributes:
+    cache_info() returns a :class:`CacheInfo`, cache_clear(disk=False) empties the cache and cache
+    is the :class:`Cache` itself.
+
+    The arguments must be hashable, and picklable for the disk tier. Two threads calling the function
+    with the same arguments at the same time may both compute the result. Exceptions aren't cached.
+
+    :param function: the decorated function
+    :param policy: 'lru' or 'lfu'
+    :param maxsize: the maximum number of results in memory, no limit if None
+    :param ttl: the seconds after which a result expires, no limit if None
+    :param max_memory: the maximum total weight of the results in memory, no limit if None
+    :param weigh: returns the weight of a result, by default its shallow size in bytes
+    :param disk: (optional) a directory where results are also pickled
+    :param typed: if True, arguments of different types are cached separately, e.g. 1 and 1.0
+    """
+
+    def decorator(function: Callable) -> Callable:
+        cache = Cache(policy, maxsize, ttl=ttl, max_memory=max_memory, weigh=weigh, disk=disk)
+        get, put = cache.get, cache.set
+
+        def wrapper(*args, **kwargs):
+            key = _make_key(args, kwargs, typed)
+            value = get(key, _MISSING)
+            if value is _MISSING:
+                value = function(*args, **kwargs)
+                put(key, value)
+            return value
+
+        functools.update_wrapper(wrapper, function)
+        wrapper.cache = cache
+        wrapper.cache_info = cache.info
+        wrapper.cache_clear = cache.clear
+        return wrapper
+
+    return decorator(function) if function is not None else decorator
+
+
+def lru_cache(maxsize: Optional[int] = 128, **kwargs) -> Callable:
+    """Caches the results of a function evicting the least recently used ones, see :func:`memoize`"""
+    return memoize(policy='lru', maxsize=maxsize, **kwargs)
+
+
+def lfu_cache(maxsize: Optional[int] = 128, **kwargs) -> Callable:
+    """Caches the results of a function evicting the least frequently used ones, see :func:`memoize`"""
+    return memoize(policy='lfu', maxsize=maxsize, **kwargs)
+
+
+def ttl_cache(ttl: float, maxsize: Optional[int] = 128, **kwargs) -> Callable:
+    """Caches the results of a function for ttl seconds, see :func:`memoize`"""
+    return memoize(ttl=ttl, maxsize=maxsize, **kwargs)
+
+
+class _Batch:
+    __slots__ = ('items', 'results', 'error', 'full', 'done', 'future', 'timer')
+
+    def __init__(self) -> None:
+        self.items = []
+        self.results = None
+        self.error = None
+
+
+def batched(function: Optional[Callable] = None, *, max_size: int = 64, max_wait: float = .002) -> Callable:
+    """A decorator which turns a function processing a list of items into a function processing
+    a single item, collecting the items of concurrent calls into a single call.
+
+    The function must return a list of results, one for each item and in the same order.
+    The first call of a batch waits for max_wait seconds, or until max_size items have been collected,
+    then the function is called once and every caller gets its own result. If the function raises,
+    every caller of the batch gets the exception.
+
+    Callers are threads if the function is a regular function, in which case the first caller runs
+    the batch, or asyncio tasks if the function is a coroutine function, in which case the decorated
+    function must be awaited. Calls made one after the other by the same thread or task are never
+    batched together, so the benefit comes with concurrent callers.
+
+    Example:
+        @batched(max_size=100, max_wait=.005)
+        def get_prices(codes: list[str]) -> list[float]:
+            return database.query_many(codes)
+
+        price = get_prices('AAPL')     # called by many threads at the same time
+
+    :param function: the function processing a list of items
+    :param max_size: the maximum number of items of a batch
+    :param max_wait: the maximum seconds the first item of a batch waits for other items
+    """
+    if max_size < 1:
+        raise ValueError("max_size must be at least 1")
+
+    def decorator(function: Callable) -> Callable:
+        import inspect
+
+        if inspect.iscoroutinefunction(function):
+            wrapper = _async_batcher(function, max_size, max_wait)
+        else:
+            wrapper = _thread_batcher(function, max_size, max_wait)
+        functools.update_wrapper(wrapper, function)
+        return wrapper
+
+    return decorator(function) if function is not None else decorator
+
+
+def _check_results(items: list, results: Any) -> list:
+    results = list(results)
+    if len(results) != len(items):
+        raise ValueError(f'a batch of {len(items)} items returned {len(results)} results')
+    return results
+
+
+def _thread_batcher(function: Callable, max_size: int, max_wait: float) -> Callable:
+    lock = threading.Lock()
+    current: list[Optional[_Batch]] = [None]
+
+    def wrapper(item):
+        with lock:
+            batch = current[0]
+            leader = batch is None
+            if leader:
+                batch = current[0] = _Batch()
+                batch.full = threading.Event()
+                batch.done = threading.Event()
+            index = len(batch.items)
+            batch.items.append(item)
+            if len(batch.items) >= max_size:
+                current[0] = None
+                batch.full.set()
+
+        if leader:
+            batch.full.wait(max_wait)
+            with lock:
+                if current[0] is batch:
+                    current[0] = None
+            try:
+                batch.results = _check_results(batch.items, function(batch.items))
+            except BaseException as e:
+                batch.error = e
+            finally:
+                batch.done.set()
+        else:
+            batch.done.wait()
+
+        if batch.error is not None:
+            raise batch.error
+        return batch.results[index]
+
+    return wrapper
+
+
+def _async_batcher(function: Callable, max_size: int, max_wait: float) -> Callable:
+    import asyncio
+    import weakref
+
+    # the batch being collected in every event loop
+    current: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+    async def run(batch: _Batch) -> None:
+        try:
+            batch.future.set_result(_check_results(batch.items, await function(batch.items)))
+        except BaseException as e:
+            batch.future.set_exception(e)
+
+    def close(loop, batch: _Batch) -> None:
+        if current.get(loop) is batch:
+            del current[loop]
+        batch.timer.cancel()
+        loop.create_task(run(batch))
+
+    async def wrapper(item):
+        loop = asyncio.get_running_loop()
+        batch = current.get(loop)
+        if batch is None:
+            batch = current[loop] = _Batch()
+            batch.future = loop.create_future()
+            batch.timer = loop.call_later(max_wait, close, loop, batch)
+        index = len(batch.items)
+        batch.items.append(item)
+        if len(batch.items) >= max_size:
+            close(loop, batch)
+        # shielded, so that a cancelled caller doesn't cancel the batch of the others
+        return (await asyncio.shield(batch.future))[index]
+
+    return wrapper
+
+
+if __name__ == '__main__':
+    @lfu_cache(maxsize=2)
+    def square(n: int) -> int:
+        """Squares n"""
+        return n * n
+
+    for n in (1, 1, 2, 3, 1, 3):
+        square(n)
+    print(square.__name__, square.__doc__, square.cache_info())
@@ -0,0 +1,56 @@
+"""
+Provides the lazy_exports function, used by rizlib packages to expose the names of their modules
+without importing them until they're used for the first time.
+
+Example:
+    # package/__init__.py
+    __getattr__, __dir__, __all__ = lazy_exports(__name__, globals(), {
+        'Queue': 'queue',
+        'Stack': 'stack',
+    }, submodules=['queue', 'stack'])
+
+    # user code, package.queue is imported here and not when the package is imported
+    from package import Queue
+"""
+
+__all__ = ["lazy_exports"]
+
+__author__ = "Valerio Molinari"
+__credits__ = "Valerio Molinari"
+__maintainer__ = "Valerio Molinari"
+__email__ = "valeriomolinariprogrammazione@gmail.com"
+
+from importlib import import_module
+
+
+# typing is not imported here since this module is imported by every rizlib package
+def lazy_exports(package: str,
+                 namespace: dict,
+                 exports: dict[str, str],
+                 submodules: list[str] = ()
+                 ) -> tuple:
+    """Creates the module level __getattr__ and __dir__ functions of a lazy package.
+
+    :param package: the name of the package, __name__
+    :param namespace: the globals of the package, where loaded names are cached
+    :param exports: a mapping from exported names to the relative name of the module defining them
+    :param submodules: relative names of submodules importable as attributes of the package
+    :return: the __getattr__ function, the __dir__ function and the __all__ list of the package
+    """
+    exports = dict(exports)
+    submodules = frozenset(submodules)
+
+    def __getattr__(name: str) -> object:
+        if name in exports:
+            value = getattr(import_module(f'{package}.{exports[name]}'), name)
+        elif name in submodules:
+            value = import_module(f'{package}.{name}')
+        else:
+            raise AttributeError(f"module {package!r} has no attribute {name!r}")
+        namespace[name] = value
+        return value
+
+    def __dir__() -> list[str]:
+        return sorted(set(namespace) | exports.keys() | submodules)
+
+    return __getattr__, __dir__, sorted(exports)
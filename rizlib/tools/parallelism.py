@@ -0,0 +1,196 @@
+"""
+Provides pmap and the parallel decorator, which apply a function to many items in a pool of
+threads or processes and stream the results in input order.
+
+Example:
+    @parallel(executor='process')
+    def parse(path: str) -> Document:
+        ...
+
+    parse('a.html')                         # a normal call
+    for document in parse.map(paths):       # the same function on every core
+        database.add(document)
+
+    for page in pmap(download, urls, executor='thread', workers=32):
+        ...
+
+If the function raises, the iteration stops with a :class:`ParallelError` which tells the item
+that failed and its position.
+"""
+
+__all__ = ["pmap", "parallel", "ParallelError"]
+
+__author__ = "Valerio Molinari"
+__credits__ = "Valerio Molinari"
+__maintainer__ = "Valerio Molinari"
+__email__ = "valeriomolinariprogrammazione@gmail.com"
+
+import functools
+import os
+import traceback
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import islice
+from time import perf_counter
+from typing import Any, Callable, Iterable, Iterator, Literal, Optional, Union
+
+ExecutorHint = Union[Literal['process', 'thread'], Executor]
+
+# the duration of a chunk aimed at when chunks are sized automatically, in seconds
+_CHUNK_TIME = {'process': .02, 'thread': .005}
+_MAX_CHUNK = 4096
+
+
+class ParallelError(Exception):
+    def __init__(self, item: Any, index: int, error: BaseException, trace: str = '') -> None:
+        """Raised by :func:`pmap` when the function raises on an item
+
+        :param item: the item which made the function raise
+        :param index: the position of the item in the input
+        :param error: the exception raised by the function
+        :param trace: the traceback of the exception, formatted in the worker
+        """
+        super().__init__(item, index, error, trace)
+        self.item = item
+        self.index = index
+        self.error = error
+        self.trace = trace
+
+    def __str__(self):
+        return f'{type(self.error).__name__}: {self.error} (item {self.index}: {self.item!r})'
+
+
+def _apply_chunk(function: Callable, chunk: list, start: int) -> tuple[list, float]:
+    """Runs in the workers, returns the results and the seconds they took"""
+    results = []
+    begin = perf_counter()
+    for i, item in enumerate(chunk):
+        try:
+            results.append(function(item))
+        except Exception as e:
+            raise ParallelError(item, start + i, e, traceback.format_exc()) from None
+    return results, perf_counter() - begin
+
+
+def pmap(function: Callable[[Any], Any],
+         iterable: Iterable,
+         *,
+         executor: ExecutorHint = 'thread',
+         workers: Optional[int] = None,
+         chunk_size: Optional[int] = None,
+         max_in_flight: Optional[int] = None
+         ) -> Iterator[Any]:
+    """Applies function to every item of iterable in a pool of workers and yields the results
+    in input order as soon as they are ready.
+
+    The items are sent to the workers in chunks and at most max_in_flight chunks are pending at
+    the same time, so the memory used is bounded even if iterable is endless. When chunk_size isn't
+    given, chunks are sized so that each one takes a few milliseconds, measuring the completed ones.
+
+    :param function: the function to apply, it must be picklable (defined at module level)
+        when executor is 'process'
+    :param iterable: the items to process, consumed lazily
+    :param executor: 'process' for CPU bound functions, 'thread' for I/O bound ones, or an executor
+        to reuse, which is not shut down
+    :param workers: the number of workers of a new pool, the number of CPUs by default. With an executor
+        to reuse, it only sets the default max_in_flight, so pass the size of that executor
+    :param chunk_size: (optional) the number of items sent to a worker at once
+    :param max_in_flight: the maximum number of pending chunks, twice the workers by default
+    :return: an iterator over the results
+    :raises ParallelError: when function raises, after cancelling the pending chunks
+    """
+    if chunk_size is not None and chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = max_in_flight or 2 * workers
+    if not isinstance(executor, Executor) and executor not in ('process', 'thread'):
+        raise ValueError(f"unknown executor {executor!r}")
+    return _stream(executor, workers, function, iterable, chunk_size, max_in_flight)
+
+
+def _stream(executor: ExecutorHint, workers: int, function: Callable, iterable: Iterable,
+            chunk_size: Optional[int], max_in_flight: int) -> Iterator[Any]:
+    # the pool is created by the first next, so an iterator which is never consumed costs nothing
+    if isinstance(executor, Executor):
+        pool, owned = executor, False
+        kind = 'process' if isinstance(executor, ProcessPoolExecutor) else 'thread'
+    else:
+        pool_class = ProcessPoolExecutor if executor == 'process' else ThreadPoolExecutor
+        pool, owned, kind = pool_class(max_workers=workers), True, executor
+
+    adaptive = chunk_size is None
+    size = 1 if adaptive else chunk_size
+    target = _CHUNK_TIME[kind]
+
+    items = iter(iterable)
+    pending = deque()
+    submitted = 0
+    try:
+        while True:
+            while len(pending) < max_in_flight and (chunk := list(islice(items, size))):
+                pending.append(pool.submit(_apply_chunk, function, chunk, submitted))
+                submitted += len(chunk)
+            if not pending:
+                break
+            results, elapsed = pending.popleft().result()
+            if adaptive and results:
+                per_item = elapsed / len(results)
+                size = max(1, min(_MAX_CHUNK, int(target / per_item) if per_item else _MAX_CHUNK))
+            yield from results
+    finally:
+        for future in pending:
+            future.cancel()
+        if owned:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+
+def parallel(function: Optional[Callable] = None,
+             *,
+             executor: ExecutorHint = 'thread',
+             workers: Optional[int] = None,
+             chunk_size: Optional[int] = None,
+             max_in_flight: Optional[int] = None) -> Callable:
+    """A decorator which adds a map method to a function of one argument, applying it to many items
+    in parallel with :func:`pmap`. Calling the function itself doesn't change.
+
+    It can be used with or without arguments: @parallel or @parallel(executor='process').
+    The options can be overridden for a single call: function.map(items, workers=4).
+
+    :param function: the decorated function, defined at module level when executor is 'process'
+    :param executor: 'process', 'thread' or an executor to reuse
+    :param workers: the number of workers, the number of CPUs by default
+    :param chunk_size: the number of items sent to a worker at once, automatic by default
+    :param max_in_flight: the maximum number of pending chunks, twice the workers by default
+    """
+    defaults = {'executor': executor, 'workers': workers, 'chunk_size': chunk_size, 'max_in_flight': max_in_flight}
+
+    def decorator(function: Callable) -> Callable:
+        def wrapper(*args, **kwargs):
+            return function(*args, **kwargs)
+
+        # the wrapper takes the name of the function, so the processes find it by name
+        functools.update_wrapper(wrapper, function)
+
+        def map(iterable: Iterable, **options) -> Iterator[Any]:
+            return pmap(wrapper, iterable, **(defaults | options))
+
+        wrapper.map = map
+        return wrapper
+
+    return decorator(function) if function is not None else decorator
+
+
+if __name__ == '__main__':
+    import math
+
+    @parallel(executor='thread')
+    def square(n: int) -> int:
+        return n * n
+
+    print(sum(square.map(range(100_000))))
+    # functions sent to processes must be importable by name, like builtins and module level functions
+    print(sum(map(math.isqrt, pmap(math.factorial, range(1000), executor='process'))).bit_length())
+    try:
+        list(pmap(lambda n: 1 / (n - 500), range(1000)))
+    except ParallelError as e:
+        print(e)
@@ -0,0 +1,199 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from rizlib.tools.decorators import Cache, batched, memoize
+
+
+def counting(function):
+    calls = []
+
+    def wrapper(*args):
+        calls.append(args)
+        return function(*args)
+
+    wrapper.calls = calls
+    return wrapper
+
+
+# -- cache -------------------------------------------------------------------------------------------
+
+def test_lru_evicts_the_least_recently_used():
+    cache = Cache('lru', maxsize=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+    assert 'a' in cache and 'c' in cache and 'b' not in cache
+    assert cache.info().evictions == 1
+
+
+def test_lfu_evicts_the_least_frequently_used():
+    cache = Cache('lfu', maxsize=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    for _ in range(3):
+        cache.get('a')
+    cache.get('b')
+    cache.set('c', 3)
+    assert 'a' in cache and 'c' in cache and 'b' not in cache
+
+    # the new result has the lowest frequency, but the older one with the same frequency goes first
+    cache.get('c')
+    cache.set('d', 4)
+    assert 'a' in cache and 'd' in cache and 'c' not in cache
+
+
+def test_ttl_expires_results():
+    cache = Cache('lru', maxsize=None, ttl=.05)
+    cache.set('a', 1)
+    assert cache.get('a') == 1
+    time.sleep(.06)
+    assert cache.get('a') is None
+    info = cache.info()
+    assert (info.expirations, info.size) == (1, 0)
+
+
+def test_max_memory_evicts_by_weight():
+    cache = Cache('lru', maxsize=None, max_memory=10, weigh=len)
+    cache.set('a', 'x' * 4)
+    cache.set('b', 'x' * 4)
+    cache.set('c', 'x' * 4)
+    assert 'a' not in cache and 'b' in cache and 'c' in cache
+    assert cache.info().memory == 8
+
+    cache.set('huge', 'x' * 11)  # heavier than the whole cache, never stored
+    assert 'huge' not in cache and len(cache) == 2
+
+
+def test_memoize_counts_hits_and_misses():
+    @memoize(maxsize=2)
+    @counting
+    def double(n):
+        return 2 * n
+
+    assert [double(1), double(1), double(2), double(3), double(1)] == [2, 2, 4, 6, 2]
+    info = double.cache_info()
+    assert (info.hits, info.misses, info.evictions) == (1, 4, 2)
+    assert double.__wrapped__.calls == [(1,), (2,), (3,), (1,)]
+
+
+def test_memoize_keeps_keyword_arguments_apart():
+    @memoize
+    def join(*args, **kwargs):
+        return args, tuple(kwargs.items())
+
+    assert join(1, 2) != join(1, b=2)
+    assert join(a=1) == join(a=1)
+    assert join.cache_info().hits == 1
+
+
+def test_disk_tier_outlives_memory(tmp_path):
+    @memoize(maxsize=1, disk=tmp_path)
+    @counting
+    def square(n):
+        return n * n
+
+    assert square(3) == 9
+    square.cache_clear()
+    assert square(3) == 9
+    assert square.cache_info().disk_hits == 1
+    assert square.__wrapped__.calls == [(3,)]
+
+    square.cache_clear(disk=True)
+    assert square(3) == 9
+    assert len(square.__wrapped__.calls) == 2
+
+
+def test_disk_tier_failures_only_skip_the_disk(tmp_path):
+    @memoize(disk=tmp_path / 'cache')
+    def identity(value):
+        return value
+
+    (tmp_path / 'cache').rmdir()
+    assert identity(1) == 1
+    assert identity(lambda: 0) is not None  # a result which can't be pickled
+    assert not (tmp_path / 'cache').exists()
+
+
+# -- batched -----------------------------------------------------------------------------------------
+
+def test_batched_threads_share_a_call():
+    batches = []
+
+    @batched(max_size=8, max_wait=1)
+    def double(items):
+        batches.append(list(items))
+        return [2 * item for item in items]
+
+    results = [None] * 8
+    barrier = threading.Barrier(8)
+
+    def call(i):
+        barrier.wait()
+        results[i] = double(i)
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == [2 * i for i in range(8)]
+    # max_size items close the batch before max_wait
+    assert len(batches) == 1 and sorted(batches[0]) == list(range(8))
+
+
+def test_batched_sequential_calls_are_not_batched():
+    batches = []
+
+    @batched(max_wait=0)
+    def identity(items):
+        batches.append(items)
+        return items
+
+    assert [identity(1), identity(2)] == [1, 2]
+    assert batches == [[1], [2]]
+
+
+def test_batched_errors_reach_every_caller():
+    @batched(max_size=2, max_wait=1)
+    def broken(items):
+        return items[:1]
+
+    errors = []
+
+    def call(item):
+        try:
+            broken(item)
+        except ValueError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(errors) == 2
+
+
+def test_batched_coroutines():
+    batches = []
+
+    @batched(max_size=100, max_wait=.01)
+    async def double(items):
+        batches.append(list(items))
+        return [2 * item for item in items]
+
+    async def main():
+        return await asyncio.gather(*(double(i) for i in range(10)))
+
+    assert asyncio.run(main()) == [2 * i for i in range(10)]
+    assert batches == [list(range(10))]
+
+
+def test_batched_rejects_an_empty_batch_size():
+    with pytest.raises(ValueError):
+        batched(lambda items: items, max_size=0)
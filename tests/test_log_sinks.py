@@ -0,0 +1,69 @@
+import gzip
+import json
+
+import pytest
+
+from rizlib.terminal.text.log_sinks import JSONLinesSink
+from rizlib.terminal.text.logs import Level, LogRecord
+
+
+def records(start: int, n: int) -> list:
+    return [LogRecord(Level.info, f'message {i}', float(i)) for i in range(start, start + n)]
+
+
+def read_lines(path) -> list[dict]:
+    opener = gzip.open if path.name.endswith('.gz') else open
+    with opener(path, 'rt', encoding='utf-8') as file:
+        return [json.loads(line) for line in file]
+
+
+def rotation_order(path) -> tuple[str, int]:
+    """Sorts app.jsonl.<stamp>[.<n>][.gz] files from the oldest"""
+    stamp, _, n = path.name.removeprefix('app.jsonl.').removesuffix('.gz').partition('.')
+    return stamp, int(n or 0)
+
+
+def test_lines_are_json_records(tmp_path):
+    sink = JSONLinesSink(tmp_path / 'app.jsonl')
+    sink.write(records(0, 2))
+    sink.close()
+    lines = read_lines(tmp_path / 'app.jsonl')
+    assert [line['message'] for line in lines] == ['message 0', 'message 1']
+    assert lines[0]['level'] == Level.info.name and lines[0]['key'] is None
+
+
+@pytest.mark.parametrize('compress', [False, True])
+def test_rotation_by_size_keeps_backup_count_files(tmp_path, compress):
+    path = tmp_path / 'app.jsonl'
+    sink = JSONLinesSink(path, max_bytes=200, backup_count=2, compress=compress)
+    for batch in range(10):
+        sink.write(records(batch * 5, 5))
+    sink.close()
+
+    rotated = sorted((p for p in tmp_path.iterdir() if p.name != path.name), key=rotation_order)
+    assert len(rotated) == 2
+    assert all(p.name.startswith('app.jsonl.') for p in rotated)
+    assert all(p.name.endswith('.gz') == compress for p in rotated)
+
+    # every kept file is complete: the newest records are all there, in order
+    messages = [line['message'] for p in rotated for line in read_lines(p)] + \
+               [line['message'] for line in read_lines(path)]
+    assert messages == [f'message {i}' for i in range(50 - len(messages), 50)]
+
+
+def test_rotation_by_age(tmp_path):
+    path = tmp_path / 'app.jsonl'
+    sink = JSONLinesSink(path, rotate_every=0)
+    sink.write(records(0, 1))
+    sink.write(records(1, 1))
+    sink.close()
+    assert len(list(tmp_path.iterdir())) == 2
+    assert [line['message'] for line in read_lines(path)] == ['message 1']
+
+
+def test_an_empty_file_is_never_rotated(tmp_path):
+    sink = JSONLinesSink(tmp_path / 'app.jsonl', max_bytes=1, rotate_every=0)
+    sink.write([])
+    sink.write(records(0, 1))
+    sink.close()
+    assert [p.name for p in tmp_path.iterdir()] == ['app.jsonl']
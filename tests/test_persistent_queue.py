@@ -0,0 +1,138 @@
+import os
+import pickle
+import struct
+
+import pytest
+
+from rizlib.terminal.data_structures.persistent_queue import PersistentQueue
+
+HEADER = struct.Struct('<II')
+
+
+def segments(directory) -> list:
+    return sorted(p for p in os.listdir(directory) if p.endswith('.seg'))
+
+
+def drain(queue: PersistentQueue) -> list:
+    items = []
+    while not queue.is_empty():
+        items.append(queue.dequeue())
+    return items
+
+
+def record_offsets(items: list) -> list[int]:
+    """The offsets of the records of items written from the start of an empty segment"""
+    offsets, offset = [], 0
+    for item in items:
+        offsets.append(offset)
+        offset += HEADER.size + len(pickle.dumps(item, pickle.HIGHEST_PROTOCOL))
+    return offsets
+
+
+def test_reopen_recovers_every_element(tmp_path):
+    with PersistentQueue(tmp_path) as queue:
+        for n in range(100):
+            queue.enqueue(n)
+
+    with PersistentQueue(tmp_path) as queue:
+        assert len(queue) == 100
+        assert drain(queue) == list(range(100))
+
+
+def test_reopen_without_close_recovers_every_element(tmp_path):
+    crashed = PersistentQueue(tmp_path)
+    for n in range(10):
+        crashed.enqueue(n)
+
+    with PersistentQueue(tmp_path) as queue:
+        assert drain(queue) == list(range(10))
+    crashed.close()
+
+
+def test_elements_beyond_the_memory_limit_are_loaded_from_disk(tmp_path):
+    with PersistentQueue(tmp_path, memory_limit=3, segment_size=128) as queue:
+        for n in range(50):
+            queue.enqueue(n)
+        assert queue.dequeue() == 0
+        queue.enqueue(50)
+        assert drain(queue) == list(range(1, 51))
+        assert queue.dequeue() is None
+
+
+@pytest.mark.parametrize('corrupt', ['payload', 'length'])
+def test_torn_record_is_discarded(tmp_path, corrupt):
+    items = ['first', 'second', 'third']
+    with PersistentQueue(tmp_path) as queue:
+        for item in items:
+            queue.enqueue(item)
+
+    torn = record_offsets(items)[2]
+    with open(tmp_path / segments(tmp_path)[0], 'r+b') as file:
+        if corrupt == 'payload':  # the payload of the last record was only partially written
+            file.seek(torn + HEADER.size + 2)
+            file.write(b'\xff\xff')
+        else:  # the header claims more bytes than the segment holds
+            file.seek(torn)
+            file.write(HEADER.pack(1 << 30, 0))
+
+    with PersistentQueue(tmp_path) as queue:
+        assert len(queue) == 2
+        queue.enqueue('after recovery')
+
+    with PersistentQueue(tmp_path) as queue:
+        assert drain(queue) == ['first', 'second', 'after recovery']
+
+
+def test_unacknowledged_elements_are_redelivered(tmp_path):
+    with PersistentQueue(tmp_path) as queue:
+        for n in range(5):
+            queue.enqueue(n)
+        assert [queue.dequeue(), queue.dequeue()] == [0, 1]
+        queue.ack()
+        assert queue.dequeue() == 2
+
+    with PersistentQueue(tmp_path) as queue:
+        assert drain(queue) == [2, 3, 4]
+
+
+def test_ack_is_written_atomically(tmp_path):
+    with PersistentQueue(tmp_path) as queue:
+        queue.enqueue('a')
+        queue.dequeue()
+        queue.ack()
+        assert os.path.getsize(tmp_path / 'ack') == struct.calcsize('<QQ')
+        assert not (tmp_path / 'ack.tmp').exists()
+
+
+def test_ack_deletes_consumed_segments(tmp_path):
+    with PersistentQueue(tmp_path, segment_size=64) as queue:
+        for n in range(20):
+            queue.enqueue(n)
+        assert len(segments(tmp_path)) > 2
+
+        for _ in range(10):
+            queue.dequeue()
+        kept = segments(tmp_path)
+        queue.ack()
+        collected = segments(tmp_path)
+        assert len(collected) < len(kept)
+        assert collected == kept[-len(collected):]
+
+        assert drain(queue) == list(range(10, 20))
+        queue.ack()
+        assert len(segments(tmp_path)) == 1
+
+    with PersistentQueue(tmp_path) as queue:
+        assert queue.is_empty()
+
+
+def test_a_missing_ack_file_redelivers_from_the_first_segment(tmp_path):
+    with PersistentQueue(tmp_path) as queue:
+        for n in range(3):
+            queue.enqueue(n)
+        queue.dequeue()
+        queue.ack()
+    os.remove(tmp_path / 'ack')
+
+    with PersistentQueue(tmp_path) as queue:
+        assert drain(queue) == [0, 1, 2]